@@ -0,0 +1,149 @@
+import numpy as np
+
+from float_curve import evaluate_curve
+
+# Points the model is evaluated at between sea level and the top of the atmosphere
+GRID_SAMPLES = 4097
+# Largest allowed curve error, as a fraction of sea-level pressure and in K
+PRESSURE_TOLERANCE = 1e-3
+TEMPERATURE_TOLERANCE = 0.1
+MAX_KEYS = 64
+# Pressure rises or values below 0 smaller than this fraction of the highest
+# pressure are rounding noise
+ROUNDING_TOLERANCE = 1e-9
+
+def atmosphere_profile(altitude, static_pressure, surface_temperature, atmosphere_height, scale_height,
+                       lapse_rate=0.0):
+    """
+    Barometric pressure and temperature, with their slopes, over altitude.
+
+    Temperature falls linearly by the lapse rate. Pressure follows the
+    barometric formula for that temperature, which is exponential with the
+    given scale height when the lapse rate is 0. KSP needs the pressure to
+    reach 0 at the top of the atmosphere, so the pressure left there is taken
+    off linearly over the height.
+
+    Args:
+        altitude (np.ndarray): Altitudes in m
+        static_pressure (float): Sea-level pressure in kPa
+        surface_temperature (float): Sea-level temperature in °C
+        atmosphere_height (float): Top of the atmosphere in m
+        scale_height (float): Pressure scale height at sea level in m
+        lapse_rate (float): Temperature drop in K per km
+
+    Returns:
+        tuple: (pressure in kPa, pressure slope in kPa/m, temperature in K,
+               temperature slope in K/m) arrays shaped like altitude
+    """
+    if atmosphere_height <= 0:
+        raise ValueError("The atmosphere needs a height above 0 m")
+    if scale_height <= 0:
+        raise ValueError("The scale height must be above 0 m")
+    surface = surface_temperature + 273.15
+    lapse = lapse_rate / 1000
+    if surface <= 0 or surface - lapse * atmosphere_height <= 0:
+        raise ValueError("The temperature must stay above 0 K up to the top of the atmosphere")
+
+    def raw_pressure(height):
+        if lapse == 0:
+            return static_pressure * np.exp(-height / scale_height)
+        return static_pressure * ((surface - lapse * height) / surface) ** (surface / (lapse * scale_height))
+
+    altitude = np.asarray(altitude, dtype=np.float64)
+    temperature = surface - lapse * altitude
+    pressure = raw_pressure(altitude)
+    # dp/dh = -p T0 / (H T), which is -p / H for an isothermal atmosphere
+    pressure_slope = -pressure * surface / (scale_height * temperature)
+
+    left = float(raw_pressure(np.float64(atmosphere_height)))
+    pressure -= left * altitude / atmosphere_height
+    # Only rounding can take it below 0
+    np.maximum(pressure, 0, out=pressure)
+    pressure_slope -= left / atmosphere_height
+    return pressure, pressure_slope, temperature, np.full_like(altitude, -lapse)
+
+def fit_keys(x, y, slope, tolerance, max_keys=MAX_KEYS, decreasing=False):
+    """
+    Pick few Hermite keys that follow a densely sampled function.
+
+    Starts from the two end samples and keeps adding a key at the sample with
+    the largest error until every sample is within tolerance. Keys carry the
+    function's own slope as both tangents, so a smooth function needs few.
+
+    Args:
+        x (np.ndarray): Sorted sample positions
+        y (np.ndarray): Function values at x
+        slope (np.ndarray): Derivative of the function at x
+        tolerance (float or np.ndarray): Largest allowed absolute error, overall
+                                         or at each sample
+        max_keys (int): Stop adding keys at this many
+        decreasing (bool): The function never rises or drops below 0, and the
+                           curve must not either, even within tolerance
+
+    Returns:
+        np.ndarray: (count, 4) keys of time, value, in tangent and out tangent
+    """
+    chosen = [0, len(x) - 1] if len(x) > 1 else [0]
+    while True:
+        rows = np.array(sorted(chosen))
+        keys = np.stack([x[rows], y[rows], slope[rows], slope[rows]], axis=1)
+        fitted = evaluate_curve(keys, x)
+        error = np.abs(fitted - y) / tolerance
+        if decreasing:
+            # Overshoot near the top of an atmosphere is small in kPa but makes
+            # the pressure negative or rising, so those samples count as over
+            noise = ROUNDING_TOLERANCE * np.abs(y).max()
+            wrong = (fitted < -noise) | np.r_[False, np.diff(fitted) > noise]
+            error[wrong] += 1
+        worst = int(np.argmax(error))
+        if error[worst] <= 1 or len(chosen) >= max_keys or worst in chosen:
+            return keys
+        chosen.append(worst)
+
+def atmosphere_curves(static_pressure, surface_temperature, atmosphere_height, scale_height, lapse_rate=0.0):
+    """
+    Compact pressureCurve and temperatureCurve keys for an atmosphere.
+
+    Args:
+        See atmosphere_profile()
+
+    Returns:
+        tuple: (pressure keys, temperature keys) as (count, 4) arrays, see fit_keys()
+    """
+    altitude = np.linspace(0, atmosphere_height, GRID_SAMPLES)
+    pressure, pressure_slope, temperature, temperature_slope = atmosphere_profile(
+        altitude, static_pressure, surface_temperature, atmosphere_height, scale_height, lapse_rate)
+    pressure_keys = fit_keys(altitude, pressure, pressure_slope, PRESSURE_TOLERANCE * max(static_pressure, 1e-9),
+                             decreasing=True)
+    temperature_keys = fit_keys(altitude, temperature, temperature_slope, TEMPERATURE_TOLERANCE)
+    return pressure_keys, temperature_keys
+
+def check_curves(altitude, pressure, temperature):
+    """
+    Find problems KSP would not complain about in sampled atmosphere curves.
+
+    Args:
+        altitude (np.ndarray): Sorted altitudes in m, up to the top of the atmosphere
+        pressure (np.ndarray): Pressure curve in kPa at those altitudes, or None
+        temperature (np.ndarray): Temperature curve in K at those altitudes, or None
+
+    Returns:
+        list: Warning messages, empty if the curves look right
+    """
+    warnings = []
+    if pressure is not None and len(pressure):
+        noise = ROUNDING_TOLERANCE * max(np.abs(pressure).max(), 1e-12)
+        negative = np.flatnonzero(pressure < -noise)
+        if len(negative):
+            warnings.append(f"Pressure is negative from {altitude[negative[0]]:.0f} m")
+        rises = np.flatnonzero(np.diff(pressure) > noise)
+        if len(rises):
+            warnings.append(f"Pressure rises with altitude between {altitude[rises[0]]:.0f} m "
+                            f"and {altitude[rises[-1] + 1]:.0f} m")
+        if abs(pressure[-1]) > PRESSURE_TOLERANCE * max(pressure[0], 1e-12):
+            warnings.append(f"Pressure is {pressure[-1]:.4g} kPa at the top of the atmosphere instead of 0")
+    if temperature is not None and len(temperature):
+        negative = np.flatnonzero(temperature < 0)
+        if len(negative):
+            warnings.append(f"Temperature is below 0 K from {altitude[negative[0]]:.0f} m")
+    return warnings
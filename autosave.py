@@ -0,0 +1,136 @@
+import json
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from project import project_document, store_for, write_project
+
+# Quiet time after the last edit before the project is saved
+AUTOSAVE_DELAY_MS = 1500
+
+class AutosaveJobSignals(QObject):
+    # The job, its error is None when it succeeded
+    done = pyqtSignal(object)
+
+class AutosaveJob(QRunnable):
+    """Moves new textures into the store and writes the project file on a worker thread"""
+    def __init__(self, path, spec, ui_state, key):
+        super().__init__()
+        self.path = path
+        self.spec = spec
+        self.ui_state = ui_state
+        self.key = key
+        self.error = None
+        self.signals = AutosaveJobSignals()
+        # Kept after run() so wait() can read the outcome
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            write_project(self.path, project_document(self.spec, self.ui_state, store_for(self.path)))
+        except Exception as e:
+            self.error = str(e)
+        self.signals.done.emit(self)
+
+class ProjectAutosaver(QObject):
+    """
+    Saves the open project in the background once editing pauses.
+
+    The GUI thread only takes a snapshot of the form and compares it with
+    the last one saved, so an unchanged project is never written. Hashing and
+    copying textures, which can take a while for very large maps, and writing
+    the file happen on a single worker thread. Edits made while a save runs
+    are saved once it finishes.
+    """
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, snapshot, parent=None):
+        """
+        Args:
+            snapshot (callable): Returns (PlanetSpec, ui state dict) for the form as it is now
+            parent (QObject, optional): Qt parent
+        """
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self.path = None
+        self._saved_key = None
+        self._running = None
+        self._rerun = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(AUTOSAVE_DELAY_MS)
+        self.timer.timeout.connect(self.save_if_changed)
+        # One worker, so saves of the same project never overlap
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.writes = 0
+        self.skipped = 0
+
+    def set_path(self, path, saved_key=None):
+        """
+        Start autosaving to a project file.
+
+        Args:
+            path (str): Project file, or None to stop autosaving
+            saved_key (str, optional): key() of the state the file already holds
+        """
+        self.wait()
+        self.path = path
+        self._saved_key = saved_key
+
+    @staticmethod
+    def key(spec, ui_state):
+        """Comparable form of a snapshot"""
+        return json.dumps([spec.to_dict(), ui_state], sort_keys=True)
+
+    def schedule(self, *args):
+        """Note an edit, connect any change signal of the form here"""
+        if self.path is not None:
+            self.timer.start()
+
+    def save_if_changed(self):
+        if self.path is None:
+            return
+        if self._running is not None:
+            self._rerun = True
+            return
+        spec, ui_state = self.snapshot()
+        key = self.key(spec, ui_state)
+        if key == self._saved_key:
+            self.skipped += 1
+            return
+
+        job = AutosaveJob(self.path, spec, ui_state, key)
+        job.signals.done.connect(self._on_done)
+        self._running = job
+        self.thread_pool.start(job)
+
+    def _finish(self, job):
+        self._running = None
+        if job.error is not None:
+            self.failed.emit(f"Autosave to {job.path} failed: {job.error}")
+        elif job.path == self.path:
+            self._saved_key = job.key
+            self.writes += 1
+            self.saved.emit(job.path)
+
+    def _on_done(self, job):
+        # A job wait() already finished arrives here late
+        if job is not self._running:
+            return
+        self._finish(job)
+        if self._rerun:
+            self._rerun = False
+            self.save_if_changed()
+
+    def wait(self):
+        """Block until a running save is done and take its result"""
+        if self._running is not None:
+            self.thread_pool.waitForDone()
+            self._finish(self._running)
+
+    def flush(self):
+        """Save now if anything changed, for closing the window"""
+        self.timer.stop()
+        self.wait()
+        self.save_if_changed()
+        self.wait()
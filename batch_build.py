@@ -0,0 +1,121 @@
+"""
+Build planet mod folders from a JSON or TOML spec file without starting the GUI.
+
+The file lists bodies either as a top-level array or under a "bodies" key
+([[bodies]] tables in TOML). Each body uses the PlanetSpec field names, and
+relative texture paths are resolved against the spec file's directory.
+
+    python batch_build.py system.json --output build/ --jobs 8
+
+--trace build.json records where each build spent its time as a Chrome trace
+(chrome://tracing or ui.perfetto.dev) and prints a per-stage summary.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tracing
+
+from mod_builder import build_mod
+from planet_model import PlanetSpec
+
+def load_specs(path):
+    """
+    Read every body from a JSON or TOML spec file.
+
+    Args:
+        path (str): Path to a .json or .toml file
+
+    Returns:
+        list: PlanetSpec for each body, in file order
+    """
+    if path.lower().endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+    bodies = data.get('bodies', []) if isinstance(data, dict) else data
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = [PlanetSpec.from_dict(body, base_dir) for body in bodies]
+
+    names = [spec.name for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate planet names: {', '.join(duplicates)}")
+    return specs
+
+def _build_one(planet, output_dir):
+    started = time.perf_counter()
+    mod_folder, timings, errors = build_mod(planet, output_dir)
+    return planet.name, mod_folder, timings, errors, time.perf_counter() - started
+
+def build_all(specs, output_dir, jobs=None):
+    """
+    Build every planet with one planet per worker process.
+
+    Args:
+        specs (list): PlanetSpec objects to build
+        output_dir (str): Directory the mod folders are created in
+        jobs (int, optional): Worker processes, defaults to the CPU count
+
+    Yields:
+        tuple: (name, mod folder, stage timings, texture errors, total seconds) as
+               each planet finishes, or (name, None, {}, {"build": message}, 0.0)
+               if its build raised
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(specs)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        trace = tracing.enabled()
+        futures = {executor.submit(tracing.call_traced, trace, f"build {spec.name}", _build_one, spec, output_dir):
+                   spec.name for spec in specs}
+        for future in as_completed(futures):
+            try:
+                result, events = future.result()
+            except Exception as e:
+                tracing.merge(getattr(e, 'trace_events', None))
+                yield futures[future], None, {}, {'build': str(e)}, 0.0
+                continue
+            tracing.merge(events)
+            yield result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('spec', help="JSON or TOML file listing the bodies")
+    parser.add_argument('-o', '--output', default='.', help="Directory for the mod folders")
+    parser.add_argument('-j', '--jobs', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--trace', metavar='FILE', help="Write a Chrome trace of the build and print a stage summary")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = load_specs(args.spec)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error reading {args.spec}: {e}", file=sys.stderr)
+        return 2
+    if not specs:
+        print(f"No bodies found in {args.spec}", file=sys.stderr)
+        return 2
+
+    if args.trace:
+        tracing.start(args.trace)
+    started = time.perf_counter()
+    failed = 0
+    for name, mod_folder, timings, errors, total in build_all(specs, args.output, args.jobs):
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+        print(f"{name:<20} {total:7.2f}s  {stages}")
+        for stage, message in errors.items():
+            print(f"  Error in {stage}: {message}", file=sys.stderr)
+        failed += bool(errors)
+
+    print(f"Built {len(specs) - failed}/{len(specs)} planets in {time.perf_counter() - started:.2f}s")
+    tracing.finish()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
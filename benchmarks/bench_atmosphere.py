@@ -0,0 +1,76 @@
+"""
+Atmosphere curve benchmark: generating curves and checking typed ones.
+
+Fits curves for a few stock-like atmospheres and reports the generation time,
+the number of keys and the largest error against the model, checked on a
+grid much denser than the one the keys were fitted on. Then times what the
+Atmosphere tab preview does after a keystroke: parse both curves, sample them
+and check them, against the 60 fps frame budget. Run from the repository root:
+    python -m benchmarks.bench_atmosphere [--samples 10000 100000 1000000]
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+
+from atmosphere import PRESSURE_TOLERANCE, TEMPERATURE_TOLERANCE, atmosphere_curves, atmosphere_profile, check_curves
+from float_curve import evaluate_curve, format_keys, parse_keys
+
+FRAME_BUDGET_MS = 1000 / 60
+
+# static pressure kPa, surface temperature °C, height m, scale height m, lapse rate K/km
+ATMOSPHERES = {
+    "Kerbin-like": (101.325, 15, 70000, 5600, 0),
+    "Eve-like": (506.625, 147, 90000, 7200, 2.5),
+    "Duna-like": (6.7, -60, 50000, 5700, 1.8),
+    "Laythe-like": (60.8, -10, 50000, 8000, 0),
+    "Jool-like": (1519.88, 27, 200000, 10000, 1.2),
+}
+
+
+def time_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'atmosphere':>12} {'ms':>6} {'p keys':>6} {'p error':>8} {'T keys':>6} {'T error K':>9}")
+    for name, model in ATMOSPHERES.items():
+        generate = time_ms(lambda: atmosphere_curves(*model), args.repeats)
+        pressure_keys, temperature_keys = atmosphere_curves(*model)
+
+        altitude = np.linspace(0, model[2], 200001)
+        pressure, _, temperature, _ = atmosphere_profile(altitude, *model)
+        pressure_error = np.abs(evaluate_curve(pressure_keys, altitude) - pressure).max() / model[0]
+        temperature_error = np.abs(evaluate_curve(temperature_keys, altitude) - temperature).max()
+        print(f"{name:>12} {generate:6.2f} {len(pressure_keys):>6} {pressure_error:8.1e} "
+              f"{len(temperature_keys):>6} {temperature_error:9.1e}")
+    print(f"Tolerances: {PRESSURE_TOLERANCE:g} of sea-level pressure, {TEMPERATURE_TOLERANCE:g} K")
+
+    model = ATMOSPHERES["Kerbin-like"]
+    pressure_text, temperature_text = (format_keys(keys) for keys in atmosphere_curves(*model))
+
+    def keystroke(count):
+        altitude = np.linspace(0, model[2], count)
+        check_curves(altitude, evaluate_curve(parse_keys(pressure_text), altitude),
+                     evaluate_curve(parse_keys(temperature_text), altitude))
+
+    print()
+    print(f"{'samples':>9} {'preview ms':>11}  60 fps budget")
+    for count in args.samples:
+        preview = time_ms(lambda: keystroke(count), args.repeats)
+        verdict = "ok" if preview <= FRAME_BUDGET_MS else "over budget"
+        print(f"{count:>9} {preview:11.2f}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
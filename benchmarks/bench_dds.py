@@ -0,0 +1,48 @@
+"""
+Throughput benchmark for the built-in DXT1/DXT5 encoder.
+
+Run from the repository root:
+    python -m benchmarks.bench_dds [--width 8192] [--height 4096]
+"""
+import argparse
+import time
+import numpy as np
+
+from dds_encoder import encode_image
+
+
+def synthetic_map(width, height, seed=0):
+    """Build a deterministic RGBA map with smooth gradients and noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    r = 128 + 127 * np.sin(x * (2 * np.pi / width) * 3)
+    g = 128 + 127 * np.cos(y * (2 * np.pi / height) * 5)
+    b = (x + y) * (255 / (width + height))
+    a = np.full_like(r, 255)
+    pixels = np.stack([r, g, b, a], axis=-1)
+    pixels += rng.normal(0, 6, pixels.shape).astype(np.float32)
+    return np.clip(pixels, 0, 255).astype(np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=8192)
+    parser.add_argument("--height", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pixels = synthetic_map(args.width, args.height)
+    megabytes = pixels.nbytes / (1024 * 1024)
+    print(f"{args.width}x{args.height} RGBA, {megabytes:.0f} MB input")
+
+    for fmt in ("DXT1", "DXT5"):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            encode_image(pixels, fmt)
+            best = min(best, time.perf_counter() - start)
+        print(f"{fmt}: {best:.2f} s, {megabytes / best:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Kepler solver benchmark: time to propagate sample arrays of various sizes.
+
+Reports the solve time per call and the cost of handing the resulting points
+to Qt as a QPolygonF, against the 60 fps frame budget. Run from the
+repository root:
+    python -m benchmarks.bench_kepler [--samples 1000 10000 100000] [--eccentricities 0 0.5 0.99]
+"""
+import argparse
+import math
+import statistics
+import time
+import numpy as np
+
+from kepler import solve_kepler
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def time_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--eccentricities", type=float, nargs="+", default=[0.0, 0.5, 0.9, 0.99])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    from orbit_widgets import array_polygon
+
+    print(f"{'samples':>9} {'e':>5} {'solve ms':>9} {'polygon ms':>11} {'max error':>10}  60 fps budget")
+    for count in args.samples:
+        mean_anomaly = np.linspace(0, 2 * math.pi, count, endpoint=False)
+        for eccentricity in args.eccentricities:
+            solve = time_ms(lambda: solve_kepler(mean_anomaly, eccentricity), args.repeats)
+            anomaly = solve_kepler(mean_anomaly, eccentricity)
+            error = np.abs(anomaly - eccentricity * np.sin(anomaly) - mean_anomaly).max()
+            x, y = np.cos(anomaly), np.sin(anomaly)
+            polygon = time_ms(lambda: array_polygon(x, y), args.repeats)
+            verdict = "ok" if solve + polygon <= FRAME_BUDGET_MS else "over budget"
+            print(f"{count:>9} {eccentricity:>5.2f} {solve:9.3f} {polygon:11.3f} {error:10.1e}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
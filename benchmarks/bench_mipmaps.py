@@ -0,0 +1,56 @@
+"""
+Mip chain generation benchmark: NumPy chain vs naive per-level Pillow resizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_mipmaps [--width 8192] [--height 4096]
+"""
+import argparse
+import time
+from PIL import Image
+
+from benchmarks.bench_dds import synthetic_map
+from dds_encoder import iter_mip_chain
+
+
+def pillow_chain(image):
+    """Resize every level straight from the source, the way a naive exporter would."""
+    width, height = image.size
+    levels = [image]
+    while width > 1 or height > 1:
+        width, height = max(1, width // 2), max(1, height // 2)
+        levels.append(image.resize((width, height), Image.Resampling.BOX))
+    return levels
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=8192)
+    parser.add_argument("--height", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pixels = synthetic_map(args.width, args.height)
+    image = Image.fromarray(pixels, "RGBA")
+    print(f"{args.width}x{args.height} RGBA")
+
+    timings = {
+        "numpy box chain": best_of(args.repeat, lambda: list(iter_mip_chain(pixels, "box"))),
+        "numpy kaiser chain": best_of(args.repeat, lambda: list(iter_mip_chain(pixels, "kaiser"))),
+        "pillow per-level resize": best_of(args.repeat, pillow_chain, image),
+    }
+    baseline = timings["pillow per-level resize"]
+    for name, seconds in timings.items():
+        print(f"{name:>24}: {seconds * 1000:8.1f} ms ({baseline / seconds:.2f}x vs pillow)")
+
+
+if __name__ == "__main__":
+    main()
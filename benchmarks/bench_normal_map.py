@@ -0,0 +1,66 @@
+"""
+Allocation benchmark for the normal map preview contrast step.
+
+Compares the original float64 pipeline with the integer math in
+texture_previewer.process_normal_map using tracemalloc. Run from the
+repository root:
+    python -m benchmarks.bench_normal_map [--width 4096] [--height 2048]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+from texture_previewer import process_normal_map
+
+
+def legacy_process_normal_map(img):
+    """The float64 version this replaced, kept for comparison."""
+    img_array = np.array(img)
+    img_array = ((img_array / 255.0) * 0.5 + 0.5) * 255
+    img_array = img_array.astype(np.uint8)
+    return Image.fromarray(img_array)
+
+
+def traced(func, *args):
+    """Run func under tracemalloc and return (seconds, peak bytes, blocks left alive)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return elapsed, peak, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=4096)
+    parser.add_argument("--height", type=int, default=2048)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    img = Image.fromarray(pixels)
+    size = pixels.nbytes
+
+    cases = {
+        "float64 pipeline": (legacy_process_normal_map, img),
+        "integer math": (process_normal_map, np.asarray(img)),
+    }
+    print(f"{args.width}x{args.height} RGB, {size / 2**20:.0f} MB")
+    print(f"{'variant':>26} {'ms':>8} {'peak MB':>8} {'peak/image':>10} {'live blocks':>10}")
+    for name, (func, arg) in cases.items():
+        elapsed, peak, blocks = traced(func, arg)
+        print(f"{name:>26} {elapsed * 1000:8.1f} {peak / 2**20:8.1f} {peak / size:10.2f} {blocks:10d}")
+
+
+if __name__ == "__main__":
+    main()
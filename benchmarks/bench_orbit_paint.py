@@ -0,0 +1,125 @@
+"""
+Orbit view paint benchmark: per-frame cost of dragging in the top-down orbit widget.
+
+Simulates panning the orbit and dragging a resize handle, processing events
+after every mouse move like the real event loop does, and compares that with
+rendering the whole scene from scratch each frame. Runs offscreen; use
+--scale 2 for a high-DPI window. Run from the repository root:
+    python -m benchmarks.bench_orbit_paint [--sizes 800x600 2560x1440] [--scale 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def mouse_event(event_type, position, buttons):
+    from PyQt6.QtCore import QEvent, QPointF, Qt
+    from PyQt6.QtGui import QMouseEvent
+    button = Qt.MouseButton.LeftButton if event_type != QEvent.Type.MouseMove else Qt.MouseButton.NoButton
+    point = QPointF(*position)
+    return QMouseEvent(event_type, point, point, button, buttons, Qt.KeyboardModifier.NoModifier)
+
+
+def drag(app, widget, start, steps, step):
+    """Press at start, move by step for each frame and return per-frame times in ms."""
+    from PyQt6.QtCore import QEvent, Qt
+    left = Qt.MouseButton.LeftButton
+    app.sendEvent(widget, mouse_event(QEvent.Type.MouseButtonPress, start, left))
+    app.processEvents()
+    times = []
+    x, y = start
+    for i in range(steps):
+        # Go back and forth so the scene stays inside the window
+        direction = 1 if (i // 20) % 2 == 0 else -1
+        x += step[0] * direction
+        y += step[1] * direction
+        started = time.perf_counter()
+        app.sendEvent(widget, mouse_event(QEvent.Type.MouseMove, (x, y), left))
+        if widget.update_timer.isActive():
+            # Run the animation tick now instead of waiting 16 ms for the timer
+            widget.update_timer.stop()
+            widget.smooth_update()
+        app.processEvents()
+        times.append((time.perf_counter() - started) * 1000)
+    app.sendEvent(widget, mouse_event(QEvent.Type.MouseButtonRelease, (x, y), Qt.MouseButton.NoButton))
+    app.processEvents()
+    return times
+
+
+def full_render(widget, frames):
+    """The cost of drawing the whole scene into a window-sized buffer every frame."""
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImage, QPainter
+    ratio = widget.devicePixelRatioF()
+    image = QImage(int(widget.width() * ratio), int(widget.height() * ratio), QImage.Format.Format_ARGB32_Premultiplied)
+    image.setDevicePixelRatio(ratio)
+    times = []
+    for _ in range(frames):
+        started = time.perf_counter()
+        image.fill(Qt.GlobalColor.white)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        center_x, center_y, a, b, c = widget.scene_geometry()
+        painter.translate(center_x, center_y)
+        widget.draw_scene(painter, a, b, c)
+        painter.end()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def report(label, times):
+    p95 = sorted(times)[int(len(times) * 0.95) - 1]
+    verdict = "ok" if p95 <= FRAME_BUDGET_MS else "over budget"
+    print(f"{label:>28} {statistics.median(times):9.3f} {p95:9.3f}  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(800, 600), (1920, 1080), (3840, 2160)])
+    parser.add_argument("--scale", default="1", help="Qt scale factor, 2 simulates a high-DPI screen")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["QT_SCALE_FACTOR"] = args.scale
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from orbit_model import OrbitModel
+    from orbit_widgets import OrbitWidget
+
+    print(f"{'window':>28} {'median ms':>9} {'p95 ms':>9}  60 fps budget")
+    for width, height in args.sizes:
+        widget = OrbitWidget(OrbitModel())
+        widget.resize(width, height)
+        widget.model.update(eccentricity=0.3)
+        widget.show()
+        app.processEvents()
+        ratio = widget.devicePixelRatioF()
+        print(f"{width}x{height} @ {ratio:g}x")
+
+        report("full scene render", full_render(widget, args.frames))
+
+        center_x, center_y, a, b, c = widget.scene_geometry()
+        renders = widget.layer_renders
+        # Grab the orbit line just inside the ellipse, on the minor axis
+        pan = drag(app, widget, (center_x - c, center_y - 0.9 * b), args.frames, (3, 2))
+        report(f"pan drag ({widget.layer_renders - renders} renders)", pan)
+
+        center_x, center_y, a, b, c = widget.scene_geometry()
+        renders = widget.layer_renders
+        handle = drag(app, widget, (center_x + a - c, center_y + b), args.frames, (0, 2))
+        report(f"handle drag ({widget.layer_renders - renders} renders)", handle)
+        widget.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Preview decode benchmark: full-resolution decode vs the reduced decode path.
+
+Each measurement runs in a fresh interpreter so peak RSS is not polluted by
+earlier runs. Run from the repository root:
+    python -m benchmarks.bench_preview_decode [--sizes 4096 8192 16384]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+
+def synthetic_rgb(width, height):
+    """Deterministic RGB map built from broadcast gradients, cheap to generate at 16k."""
+    x = (np.arange(width, dtype=np.uint32) * 256 // width).astype(np.uint8)
+    y = (np.arange(height, dtype=np.uint32) * 256 // height).astype(np.uint8)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[:, :, 0] = x[None, :]
+    pixels[:, :, 1] = y[:, None]
+    np.add(x[None, :], y[:, None], out=pixels[:, :, 2])
+    return pixels
+
+
+def full_decode(path, preview_type):
+    """The old path: decode everything, convert, then scale down."""
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if preview_type == "height":
+            img = img.convert('L').convert('RGB')
+        img.thumbnail((768, 768))
+        return img
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def reset_peak_rss():
+    """Reset the kernel's high-water mark so the next peak only covers the measured call."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _status_kb("VmRSS")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_since(baseline):
+    """Peak resident memory in MB above the baseline taken by reset_peak_rss."""
+    try:
+        peak = _status_kb("VmHWM")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max(0, peak - baseline) / 1024
+
+
+def worker(path, method, preview_type):
+    from texture_previewer import load_preview_pixels
+    Image.MAX_IMAGE_PIXELS = None
+    func = load_preview_pixels if method == "reduced" else full_decode
+    baseline = reset_peak_rss()
+    start = time.perf_counter()
+    func(path, preview_type)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.4f} {peak_rss_since(baseline):.1f}")
+
+
+def measure(path, method, preview_type):
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_preview_decode", "--worker",
+                          path, method, preview_type], capture_output=True, text=True, check=True)
+    seconds, megabytes = out.stdout.split()
+    return float(seconds), float(megabytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4096, 8192, 16384])
+    parser.add_argument("--formats", nargs="+", default=["jpg", "png"])
+    parser.add_argument("--preview-type", default="color")
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    print(f"{'input':>16} {'full s':>8} {'full MB':>8} {'reduced s':>10} {'reduced MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width in args.sizes:
+            pixels = synthetic_rgb(width, width // 2)
+            for fmt in args.formats:
+                path = os.path.join(tmp, f"map_{width}.{fmt}")
+                Image.fromarray(pixels).save(path, **({"compress_level": 1} if fmt == "png" else {}))
+                full = measure(path, "full", args.preview_type)
+                reduced = measure(path, "reduced", args.preview_type)
+                label = f"{width}x{width // 2} {fmt}"
+                print(f"{label:>16} {full[0]:8.3f} {full[1]:8.1f} {reduced[0]:10.3f} {reduced[1]:11.1f}")
+                os.remove(path)
+            del pixels
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Project save benchmark: cost of saving a project as its textures grow.
+
+Writes synthetic texture files of each size, then times the first save,
+which hashes the textures and copies them into the texture store, a save
+after a field edit, which only stats them, and a save of a second project
+sharing the same textures, which copies nothing. Autosave runs these on a
+worker thread; only the edit save matters for how often it can run. Run from
+the repository root:
+    python -m benchmarks.bench_project [--sizes-mb 16 256 1024]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from planet_model import PlanetSpec
+from project import save_project, store_for
+
+
+def write_texture(path, size_mb):
+    chunk = os.urandom(1 << 20)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(chunk)
+
+
+def timed_ms(func):
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 256, 1024])
+    args = parser.parse_args()
+
+    print(f"{'texture MB':>10} {'first save ms':>14} {'edit save ms':>13} {'second project ms':>18} {'store MB':>9}")
+    for size_mb in args.sizes_mb:
+        folder = tempfile.mkdtemp(prefix="bench_project_")
+        try:
+            texture = os.path.join(folder, "color.png")
+            write_texture(texture, size_mb)
+            spec = PlanetSpec(name="Bench", color_map=texture)
+            project = os.path.join(folder, "bench.kpk")
+
+            first = timed_ms(lambda: save_project(project, spec, {}))
+            spec.radius = 600
+            edit = timed_ms(lambda: save_project(project, spec, {}))
+            second = timed_ms(lambda: save_project(os.path.join(folder, "other.kpk"), spec, {}))
+
+            store = store_for(project).root
+            stored = sum(os.path.getsize(os.path.join(root, name))
+                         for root, _, names in os.walk(store) for name in names)
+            print(f"{size_mb:>10} {first:14.1f} {edit:13.2f} {second:18.2f} {stored / (1 << 20):9.1f}")
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Startup benchmark: time from launch to the main window's first paint.
+
+Every run starts a fresh interpreter, since a warm one would already have the
+modules imported. Stages are measured from the moment the worker script starts
+running; "launch" also includes interpreter startup. Run from the repository root:
+    python -m benchmarks.bench_startup [--runs 10] [--max-ms 400]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STAGES = ("launch", "import", "construct", "first paint")
+
+
+def worker(launched):
+    started = time.perf_counter()
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    from planet_creator import PlanetCreator
+    imported = time.perf_counter()
+    window = PlanetCreator()
+    constructed = time.perf_counter()
+
+    painted = {}
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and not painted:
+                painted['at'] = time.perf_counter()
+                painted['wall'] = time.time()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    app.exec()
+
+    heavy = [name for name in ("numpy", "PIL") if name in sys.modules]
+    print(f"{painted['wall'] - launched:.4f} {imported - started:.4f} "
+          f"{constructed - imported:.4f} {painted['at'] - started:.4f} {','.join(heavy) or '-'}")
+
+
+def measure(platform):
+    env = dict(os.environ, QT_QPA_PLATFORM=platform)
+    launched = time.time()
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--worker", repr(launched)],
+                         capture_output=True, text=True, check=True, env=env)
+    *seconds, heavy = out.stdout.split()
+    return [float(s) for s in seconds], heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--platform", default=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+                        help="Qt platform plugin, offscreen by default so it runs headless")
+    parser.add_argument("--max-ms", type=float,
+                        help="Exit with status 1 if the median time to first paint exceeds this")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(float(args.worker))
+        return 0
+
+    samples = []
+    heavy = set()
+    for _ in range(args.runs):
+        seconds, loaded = measure(args.platform)
+        samples.append(seconds)
+        heavy.update(name for name in loaded.split(",") if name != "-")
+
+    print(f"{'stage':>12} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for i, stage in enumerate(STAGES):
+        values = [sample[i] * 1000 for sample in samples]
+        print(f"{stage:>12} {statistics.median(values):10.1f} {min(values):8.1f} {max(values):8.1f}")
+    print(f"Heavy modules loaded before first paint: {', '.join(sorted(heavy)) or 'none'}")
+
+    first_paint = statistics.median(sample[3] for sample in samples) * 1000
+    if args.max_ms is not None and first_paint > args.max_ms:
+        print(f"First paint took {first_paint:.1f} ms, over the {args.max_ms:.1f} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+System view benchmark: frame and pick times as the body count grows.
+
+Builds random systems of planets and moons around Kerbol and times a full
+repaint of the whole system, a repaint zoomed in on one planet and a hover
+pick. Times should stay roughly flat as the body count grows. Runs offscreen.
+Run from the repository root:
+    python -m benchmarks.bench_system_view [--bodies 100 1000 10000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def random_specs(count, seed=0):
+    """About one planet per ten bodies, log-uniform orbit sizes, the rest moons."""
+    from planet_model import PlanetSpec
+    rng = random.Random(seed)
+    planets = max(1, count // 10)
+    specs = [PlanetSpec(name=f"Planet{i}", parent_body="Kerbol", semi_major_axis=10 ** rng.uniform(6, 8),
+                        eccentricity=rng.uniform(0, 0.4), longitude_of_ascending_node=rng.uniform(0, 360))
+             for i in range(planets)]
+    specs += [PlanetSpec(name=f"Moon{i}", parent_body=f"Planet{rng.randrange(planets)}",
+                         semi_major_axis=10 ** rng.uniform(3, 5), eccentricity=rng.uniform(0, 0.3),
+                         longitude_of_ascending_node=rng.uniform(0, 360))
+              for i in range(count - planets)]
+    return specs
+
+
+def time_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bodies", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--size", default="1600x1000")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from system_view import SystemView, system_bodies
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    view = SystemView()
+    view.resize(width, height)
+    view.show()
+    app.processEvents()
+
+    def frame():
+        # A pan step: the view changes, so nothing cached for the last frame applies
+        view.view_center = view.view_center + 1e-3 / view.zoom
+        view.invalidate()
+        view.repaint()
+
+    print(f"{'bodies':>7} {'layout ms':>9} {'whole ms':>9} {'orbits':>7} {'zoomed ms':>10} {'orbits':>7} "
+          f"{'pick us':>8}  60 fps budget")
+    for count in args.bodies:
+        bodies = system_bodies(random_specs(count))
+        started = time.perf_counter()
+        view.set_bodies(bodies, fit=True)
+        layout = (time.perf_counter() - started) * 1000
+
+        whole = time_ms(frame, args.repeats)
+        whole_orbits = view.drawn_orbits
+
+        planet = view.system.index["Planet0"]
+        view.view_center = view.system.position[planet].copy()
+        view.zoom = min(width, height) / 2.2e5
+        zoomed = time_ms(frame, args.repeats)
+        zoomed_orbits = view.drawn_orbits
+
+        position = view.visible_bodies()[0][planet]
+        point = QPointF(position[0] + 2, position[1] + 2)
+        view.pick(point)
+        pick = time_ms(lambda: view.pick(point), args.repeats * 10) * 1000
+
+        verdict = "ok" if max(whole, zoomed) <= FRAME_BUDGET_MS else "over budget"
+        print(f"{count:>7} {layout:9.2f} {whole:9.2f} {whole_orbits:>7} {zoomed:10.2f} {zoomed_orbits:>7} "
+              f"{pick:8.1f}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Texture pipeline benchmark suite on synthetic planet maps.
+
+Generates deterministic color, height and normal maps at each size (2:1
+equirectangular, 1k through 16k wide) and times every stage of the texture
+path on them: DDS conversion, texture previews with a cold and a warm
+thumbnail cache, the normal map preview contrast step, the height map
+statistics, normal map and biome map generation and config generation. Each
+measurement runs in a fresh interpreter under the offscreen Qt platform, so
+its peak memory is its own. Results go to a JSON file that later runs can be
+compared against. Run from the repository root:
+    python -m benchmarks.bench_textures [--sizes 1024 4096] [--output results.json] [--compare old.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_preview_decode import peak_rss_since, reset_peak_rss
+
+MAP_TYPES = ("color", "height", "normal")
+RESULTS_FORMAT = 1
+
+
+def synthetic_height(width, height):
+    """Deterministic float32 elevations in 0-1: a few continents plus finer ridges, seamless in longitude."""
+    import numpy as np
+    longitude = np.linspace(0, 2 * np.pi, width, endpoint=False, dtype=np.float32)
+    latitude = np.linspace(-np.pi / 2, np.pi / 2, height, dtype=np.float32)
+    elevation = np.empty((height, width), dtype=np.float32)
+    elevation[:] = np.sin(3 * longitude)[None, :]
+    elevation *= np.cos(2 * latitude)[:, None]
+    for octave, weight in ((7, 0.35), (19, 0.15), (53, 0.06)):
+        elevation += weight * np.sin(octave * longitude + octave)[None, :] * np.cos(octave * latitude)[:, None]
+    elevation -= elevation.min()
+    elevation /= elevation.max()
+    return elevation
+
+
+def synthetic_maps(width, folder):
+    """
+    Write the color, height and normal maps for one size.
+
+    Returns:
+        dict: Map type to PNG path
+    """
+    import numpy as np
+    from PIL import Image
+
+    height = width // 2
+    elevation = synthetic_height(width, height)
+    paths = {tex_type: os.path.join(folder, f"{tex_type}_{width}.png") for tex_type in MAP_TYPES}
+
+    gray = (elevation * 255).astype(np.uint8)
+    Image.fromarray(gray).save(paths["height"], compress_level=1)
+
+    # Ocean blue below 0.45, green to brown to white above
+    color = np.empty((height, width, 3), dtype=np.uint8)
+    land = elevation >= 0.45
+    color[..., 0] = np.where(land, 60 + gray // 2, 20)
+    color[..., 1] = np.where(land, 120 + gray // 4, 60 + gray // 4)
+    color[..., 2] = np.where(land, 40 + gray // 3, 140 + gray // 3)
+    del land
+    Image.fromarray(color).save(paths["color"], compress_level=1)
+    del color
+
+    normal = np.empty((height, width, 3), dtype=np.uint8)
+    slope_x = np.roll(elevation, -1, axis=1) - np.roll(elevation, 1, axis=1)
+    normal[..., 0] = np.clip(128 + slope_x * 2000, 0, 255)
+    del slope_x
+    slope_y = np.gradient(elevation, axis=0)
+    normal[..., 1] = np.clip(128 + slope_y * 4000, 0, 255)
+    del slope_y
+    normal[..., 2] = 255
+    Image.fromarray(normal).save(paths["normal"], compress_level=1)
+    return paths
+
+
+def stage_convert_to_dds(path, scratch, tex_type):
+    from utility_functions import convert_to_dds
+    output = os.path.join(scratch, "out.dds")
+    return lambda: convert_to_dds(path, output)
+
+
+def stage_preview(path, scratch, tex_type):
+    """Time from update_preview() to the scaled pixmap being shown"""
+    from PyQt6.QtCore import QEventLoop
+    from PyQt6.QtWidgets import QApplication
+    from texture_previewer import DecodeCache, TexturePreviewWidget
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    widget = TexturePreviewWidget(tex_type, decode_cache=DecodeCache())
+    widget.resize(400, 400)
+    widget.current_path = path
+
+    def run():
+        widget.update_preview()
+        # The finished or failed signal clears the job
+        while widget.current_job is not None:
+            app.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents)
+        if widget.preview_label.pixmap().isNull():
+            raise RuntimeError(widget.preview_label.text())
+    return run
+
+
+def stage_normal_contrast(path, scratch, tex_type):
+    import numpy as np
+    from PIL import Image
+    from texture_previewer import process_normal_map
+    with Image.open(path) as img:
+        pixels = np.asarray(img.convert("RGB"))
+    return lambda: process_normal_map(pixels)
+
+
+def stage_height_stats(path, scratch, tex_type):
+    """The uncached statistics pass behind the VertexHeightMap deformity and offset"""
+    from height_stats import compute_height_stats
+    return lambda: compute_height_stats(path)
+
+
+def stage_generate_normals(path, scratch, tex_type):
+    """A normal map generated from the height map straight into a DDS file"""
+    from normal_map import write_normal_map_dds
+    output = os.path.join(scratch, "normals.dds")
+    return lambda: write_normal_map_dds(path, output, deformity=7700, radius=600000, strength=10)
+
+
+def stage_biome_map(path, scratch, tex_type):
+    """Eight biomes clustered from the color or height map and written as a biome map"""
+    from biome_map import generate_biome_map
+    output = os.path.join(scratch, "biomes.png")
+    return lambda: generate_biome_map(path, output, 8, source=tex_type)
+
+
+def stage_generate_config(path, scratch, tex_type):
+    from genconfig import generate_config
+    from planet_model import Biome, PlanetSpec
+    planet = PlanetSpec(name="Bench", radius=600, gravity=1.0, parent_body="Kerbol", semi_major_axis=13599840,
+                        atmosphere_height=70000, scale_height=5600, biomes=[Biome(f"Biome{i}") for i in range(32)],
+                        color_map=path, height_map=path, normal_map=path)
+    return lambda: generate_config(planet)
+
+
+# Stage name to (setup, map types it runs on). Setup takes (map path, scratch
+# folder, map type), does everything that is not measured and returns the
+# call that is. The warm preview finds the thumbnail the cold one left behind.
+STAGES = {
+    "convert_to_dds": (stage_convert_to_dds, MAP_TYPES),
+    "preview_cold": (stage_preview, MAP_TYPES),
+    "preview_warm": (stage_preview, MAP_TYPES),
+    "normal_contrast": (stage_normal_contrast, ("normal",)),
+    "height_stats": (stage_height_stats, ("height",)),
+    "generate_normals": (stage_generate_normals, ("height",)),
+    "biome_map": (stage_biome_map, ("color", "height")),
+    "generate_config": (stage_generate_config, ("color",)),
+}
+
+
+def worker(stage, path, tex_type, scratch):
+    """Run one stage once and print its time and peak memory as JSON"""
+    os.environ["XDG_CACHE_HOME"] = os.path.join(scratch, "cache")
+    run = STAGES[stage][0](path, scratch, tex_type)
+    baseline = reset_peak_rss()
+    started = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - started
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_rss_since(baseline)}))
+
+
+def measure(stage, path, tex_type, scratch):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_textures", "--worker", stage, path, tex_type,
+                          scratch], capture_output=True, text=True, env=env)
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    import numpy
+    import PIL
+    from PyQt6.QtCore import QT_VERSION_STR
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pillow": PIL.__version__,
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def compare(results, previous):
+    """Print each result's time against the same measurement in an earlier run"""
+    before = {(r["stage"], r["map"], r["width"]): r for r in previous["results"]}
+    print()
+    print(f"Against {previous['started']} ({previous['environment'].get('commit', '')})")
+    print(f"{'stage':>16} {'map':>7} {'width':>6} {'before s':>9} {'now s':>8} {'change':>7}")
+    for result in results:
+        old = before.get((result["stage"], result["map"], result["width"]))
+        if old is None or "seconds" not in old or "seconds" not in result:
+            continue
+        change = result["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        print(f"{result['stage']:>16} {result['map']:>7} {result['width']:>6} {old['seconds']:9.3f} "
+              f"{result['seconds']:8.3f} {change:+7.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 2048, 4096, 8192, 16384])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--output", help="JSON results file, default bench_textures_<time>.json")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--worker", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    started = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    output = args.output or f"bench_textures_{started.replace(':', '')}.json"
+    results = []
+    print(f"{'stage':>16} {'map':>7} {'width':>6} {'seconds':>8} {'MP/s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as scratch:
+        for width in args.sizes:
+            paths = synthetic_maps(width, scratch)
+            megapixels = width * (width // 2) / 1e6
+            for stage in args.stages:
+                for tex_type in STAGES[stage][1]:
+                    result = {"stage": stage, "map": tex_type, "width": width, "height": width // 2}
+                    result.update(measure(stage, paths[tex_type], tex_type, scratch))
+                    results.append(result)
+                    if "error" in result:
+                        print(f"{stage:>16} {tex_type:>7} {width:>6}  failed: {result['error']}")
+                        continue
+                    result["megapixels_per_second"] = megapixels / result["seconds"] if result["seconds"] else None
+                    throughput = f"{result['megapixels_per_second']:8.1f}" if stage != "generate_config" else f"{'-':>8}"
+                    print(f"{stage:>16} {tex_type:>7} {width:>6} {result['seconds']:8.3f} {throughput} "
+                          f"{result['peak_mb']:8.1f}")
+            for path in paths.values():
+                os.remove(path)
+
+    with open(output, "w") as f:
+        json.dump({"format": RESULTS_FORMAT, "started": started, "environment": environment(),
+                   "results": results}, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
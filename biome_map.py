@@ -0,0 +1,274 @@
+import math
+import os
+import struct
+import zlib
+import numpy as np
+from PIL import Image
+
+from dds_encoder import iter_image_strips, unlimited_image_pixels
+from height_stats import height_values
+from tracing import span
+
+# Maps a biome map can be generated from
+BIOME_SOURCES = ("color", "height")
+# Pixels the biome colours are fitted to, taken on an even grid over the map
+DEFAULT_SAMPLE_PIXELS = 65536
+# Mini-batch k-means steps and the samples drawn for each
+BATCH_SIZE = 1024
+BATCH_STEPS = 150
+# Bits per channel of the colour lookup table, 6 bits is 262144 cells
+LOOKUP_BITS = 6
+# Lookup table levels of 16-bit and float height maps
+HEIGHT_LEVELS = 4096
+# Working memory for one strip of a pass over the map
+DEFAULT_STRIP_BUDGET = 64 * 1024 * 1024
+# Bytes per pixel of a strip while it is assigned, the decoded strip, its
+# lookup keys and the RGB rows written out
+_STRIP_BYTES_PER_PIXEL = 16
+# zlib level of the biome map, its large flat areas compress well at any level
+PNG_COMPRESS_LEVEL = 1
+
+def strip_pixels(strip, source):
+    """
+    The pixels of one strip in the space they are clustered in.
+
+    Args:
+        strip (PIL.Image.Image): Rows of the source map
+        source (str): "color" or "height", see BIOME_SOURCES
+
+    Returns:
+        np.ndarray: uint8 RGB for colour maps, height_values() for height maps
+    """
+    if source == "color":
+        return np.asarray(strip if strip.mode == "RGB" else strip.convert("RGB"))
+    return height_values(strip)
+
+def pixel_features(pixels):
+    """float32 (n, channels) features of strip_pixels() output, in 0-255 for both sources"""
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    features = pixels.reshape(-1, channels).astype(np.float32)
+    if pixels.dtype != np.uint8:
+        features *= 255
+    return features
+
+def nearest_centres(points, centres):
+    """Index of the nearest centre of each (n, channels) point"""
+    # |p - c|² without the |p|² term, which is the same for every centre
+    distances = points @ (-2 * centres.T)
+    distances += (centres * centres).sum(axis=1)
+    return distances.argmin(axis=1)
+
+def initial_centres(samples, count, rng):
+    """
+    k-means++ seeding: each new centre is drawn with a chance proportional to
+    its squared distance from the nearest centre so far.
+
+    Stops early when every sample sits on a centre, so a map with fewer
+    distinct colours than count gets one centre per colour.
+    """
+    centres = [samples[rng.integers(len(samples))]]
+    distances = ((samples - centres[0]) ** 2).sum(axis=1, dtype=np.float64)
+    while len(centres) < count:
+        total = distances.sum()
+        if total <= 0:
+            break
+        centre = samples[rng.choice(len(samples), p=distances / total)]
+        centres.append(centre)
+        np.minimum(distances, ((samples - centre) ** 2).sum(axis=1, dtype=np.float64), out=distances)
+    return np.array(centres, dtype=np.float32)
+
+def minibatch_kmeans(samples, count, batch_size=BATCH_SIZE, steps=BATCH_STEPS, seed=0):
+    """
+    Cluster samples with mini-batch k-means.
+
+    Every step assigns a random batch to the nearest centres and moves each
+    centre to the running mean of all the samples it has taken so far.
+
+    Args:
+        samples (np.ndarray): float32 (n, channels) features
+        count (int): Clusters wanted
+        batch_size (int): Samples per step
+        steps (int): Batches to fit
+        seed (int): Seed of the random batches, the same seed gives the same clusters
+
+    Returns:
+        np.ndarray: float32 (clusters, channels) centres, at most count of them
+    """
+    rng = np.random.default_rng(seed)
+    centres = initial_centres(samples, count, rng)
+    taken = np.zeros(len(centres), dtype=np.float64)
+    for _ in range(steps):
+        batch = samples[rng.integers(0, len(samples), batch_size)]
+        labels = nearest_centres(batch, centres)
+        batch_counts = np.bincount(labels, minlength=len(centres))
+        sums = np.stack([np.bincount(labels, weights=batch[:, channel], minlength=len(centres))
+                         for channel in range(batch.shape[1])], axis=1)
+        taken += batch_counts
+        moved = batch_counts > 0
+        centres[moved] += ((sums[moved] - batch_counts[moved, None] * centres[moved])
+                           / taken[moved, None]).astype(np.float32)
+    return centres
+
+def lookup_keys(pixels):
+    """
+    Lookup table index of every pixel of a strip_pixels() result.
+
+    Colours drop to LOOKUP_BITS per channel, 8-bit heights are their own
+    index and wider heights are rounded to HEIGHT_LEVELS levels.
+    """
+    if pixels.ndim == 3:
+        shift = 8 - LOOKUP_BITS
+        keys = (pixels[..., 0] >> shift).astype(np.int32) << (2 * LOOKUP_BITS)
+        keys |= (pixels[..., 1] >> shift).astype(np.int32) << LOOKUP_BITS
+        keys |= pixels[..., 2] >> shift
+        return keys
+    if pixels.dtype == np.uint8:
+        return pixels
+    return (pixels * (HEIGHT_LEVELS - 1) + 0.5).astype(np.int32)
+
+def lookup_table(centres, pixels):
+    """
+    The nearest centre of every lookup table cell, so assigning a pixel is a
+    single table read instead of a distance to every centre.
+
+    Args:
+        centres (np.ndarray): minibatch_kmeans() result
+        pixels (np.ndarray): Any strip_pixels() result of the map, for its layout
+
+    Returns:
+        np.ndarray: uint8 centre index per lookup_keys() value
+    """
+    if pixels.ndim == 3:
+        cells = np.arange(1 << (3 * LOOKUP_BITS))
+        mask = (1 << LOOKUP_BITS) - 1
+        step = 1 << (8 - LOOKUP_BITS)
+        # Cells are looked up by their middle colour
+        points = np.stack([(cells >> (2 * LOOKUP_BITS)) & mask, (cells >> LOOKUP_BITS) & mask, cells & mask], axis=1)
+        points = points.astype(np.float32) * step + (step - 1) / 2
+    elif pixels.dtype == np.uint8:
+        points = np.arange(256, dtype=np.float32)[:, None]
+    else:
+        points = np.linspace(0, 255, HEIGHT_LEVELS, dtype=np.float32)[:, None]
+    return nearest_centres(points, centres).astype(np.uint8)
+
+def sample_features(path, source, sample_pixels, strip_rows):
+    """Features of the pixels on an even grid of about sample_pixels points over the map"""
+    with unlimited_image_pixels(), Image.open(path) as image:
+        width, height = image.size
+    step = max(1, int(math.sqrt(width * height / sample_pixels)))
+    samples = []
+    top = 0
+    for strip in iter_image_strips(path, strip_rows):
+        pixels = strip_pixels(strip, source)
+        samples.append(pixel_features(pixels[(-top) % step::step, ::step]))
+        top += len(pixels)
+    return np.concatenate(samples)
+
+def biome_colors(centres):
+    """
+    Distinct "#rrggbb" colours for the centres: their own colour for colour
+    maps, a gray of their height for height maps.
+
+    Kopernicus tells biomes apart by exact colour, so centres that round to the
+    same colour are nudged apart.
+    """
+    colors = []
+    for centre in np.clip(np.rint(centres), 0, 255).astype(int):
+        color = tuple(centre) if len(centre) == 3 else (centre[0],) * 3
+        while color in colors:
+            color = color[:2] + ((color[2] + 1) % 256,)
+        colors.append(color)
+    return colors
+
+def _write_png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+def write_png_rows(strips, width, height, output_path, level=PNG_COMPRESS_LEVEL):
+    """
+    Write an RGB PNG from strips of rows, compressing each as it arrives so
+    the whole image is never held in memory.
+
+    Args:
+        strips (iterable): uint8 (rows, width, 3) arrays, top to bottom
+        width (int): Image width in pixels
+        height (int): Image height in pixels, the sum of the strip rows
+        output_path (str): Destination .png path
+        level (int): zlib compression level
+    """
+    compressor = zlib.compressobj(level)
+    with open(output_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        # 8 bits per channel, truecolour, no interlacing
+        _write_png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        for rows in strips:
+            # Every row starts with its filter type, 0 for none
+            framed = np.zeros((len(rows), width * 3 + 1), dtype=np.uint8)
+            framed[:, 1:] = rows.reshape(len(rows), -1)
+            data = compressor.compress(framed)
+            if data:
+                _write_png_chunk(f, b"IDAT", data)
+        _write_png_chunk(f, b"IDAT", compressor.flush())
+        _write_png_chunk(f, b"IEND", b"")
+
+def generate_biome_map(source_path, output_path, count, source="color", sample_pixels=DEFAULT_SAMPLE_PIXELS,
+                       seed=0, memory_budget=DEFAULT_STRIP_BUDGET):
+    """
+    Split a colour or height map into biomes and write the biome map.
+
+    The biome colours are fitted to a sample of the map with mini-batch
+    k-means, then every pixel is assigned to the nearest one through a lookup
+    table, reading the map and writing the biome map in strips. Colour map
+    biomes keep their mean colour, height map biomes are height bands in gray.
+
+    Args:
+        source_path (str): Equirectangular colour or height map
+        output_path (str): Destination .png path, the same size as the source
+        count (int): Biomes wanted, 2-255. Fewer come out of maps with fewer
+                     distinct colours
+        source (str): "color" or "height", see BIOME_SOURCES
+        sample_pixels (int): Pixels the biome colours are fitted to
+        seed (int): Seed of the clustering, the same seed gives the same map
+        memory_budget (int): Approximate bytes to spend on one strip
+
+    Returns:
+        list: ("#rrggbb", share of the map in 0-1) of each biome, largest first
+              for colour maps and lowest first for height maps
+    """
+    if source not in BIOME_SOURCES:
+        raise ValueError(f"Biome maps are generated from one of {', '.join(BIOME_SOURCES)}, not {source!r}")
+    with span("generate biome map", source=os.path.basename(source_path), biomes=count):
+        with unlimited_image_pixels(), Image.open(source_path) as image:
+            width, height = image.size
+        strip_rows = max(1, memory_budget // (width * _STRIP_BYTES_PER_PIXEL))
+
+        with span("cluster biomes"):
+            samples = sample_features(source_path, source, sample_pixels, strip_rows)
+            centres = minibatch_kmeans(samples, min(count, 255), seed=seed)
+            sample_counts = np.bincount(nearest_centres(samples, centres), minlength=len(centres))
+            order = np.argsort(-sample_counts, kind="stable") if source == "color" else np.argsort(centres[:, 0])
+            # Centres that lost every sample to others would be empty biomes
+            centres = centres[order[sample_counts[order] > 0]]
+
+        colors = biome_colors(centres)
+        palette = np.array(colors, dtype=np.uint8)
+        pixel_counts = np.zeros(len(colors), dtype=np.int64)
+
+        def biome_rows():
+            table = None
+            for strip in iter_image_strips(source_path, strip_rows):
+                pixels = strip_pixels(strip, source)
+                if table is None:
+                    table = lookup_table(centres, pixels)
+                labels = table[lookup_keys(pixels)]
+                np.add(pixel_counts, np.bincount(labels.ravel(), minlength=len(colors)), out=pixel_counts)
+                # Written as RGB, not every loader Kopernicus goes through reads paletted PNGs
+                yield palette[labels]
+
+        with span("assign biomes"):
+            write_png_rows(biome_rows(), width, height, output_path)
+        shares = pixel_counts / (width * height)
+
+    return [(f"#{red:02x}{green:02x}{blue:02x}", float(share)) for (red, green, blue), share in zip(colors, shares)]
@@ -0,0 +1,153 @@
+import os
+import json
+from utility_functions import file_content_hash, write_text_atomic
+
+MANIFEST_NAME = "texture_manifest.json"
+
+def conversion_options(fmt="DXT5", mipmaps=False, mip_filter="box"):
+    """Everything besides the source file that affects a converted texture"""
+    from dds_encoder import ENCODER_VERSION
+    return {'format': fmt, 'mipmaps': mipmaps, 'mip_filter': mip_filter, 'encoder': ENCODER_VERSION}
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def file_record(source, destination):
+    """
+    Size, mtime and content hash of a texture's source and output, the part
+    of a manifest entry that reads the files.
+
+    Hashing large textures takes seconds, so the GUI has its conversion
+    workers call this right after exporting and hands the result to update().
+
+    Returns:
+        dict: source_size, source_mtime, source_hash, output_size, output_mtime and output_hash
+    """
+    source_size, source_mtime = _stat(source)
+    output_size, output_mtime = _stat(destination)
+    return {
+        'source_size': source_size,
+        'source_mtime': source_mtime,
+        'source_hash': file_content_hash(source),
+        'output_size': output_size,
+        'output_mtime': output_mtime,
+        'output_hash': file_content_hash(destination),
+    }
+
+class TextureManifest:
+    """
+    Record of the textures exported into a mod folder, kept in its Cache folder.
+
+    Each entry stores the source path, size, mtime and content hash, the
+    conversion options and the size, mtime and hash of the output. A texture
+    whose entry still matches does not need converting again. Size and mtime
+    are checked first so unchanged files are never hashed; a file that was
+    only touched is hashed once and then recognised as unchanged.
+    """
+    def __init__(self, cache_folder):
+        """
+        Load the manifest of a mod, or start an empty one.
+
+        Args:
+            cache_folder (str): The mod's Cache folder
+        """
+        self.path = os.path.join(cache_folder, MANIFEST_NAME)
+        self.entries = {}
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f).get('textures', {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    def _file_matches(self, path, entry, prefix):
+        """Compare a file against the size, mtime and hash stored under prefix in entry"""
+        current_size, current_mtime = _stat(path)
+        if current_size != entry[prefix + '_size']:
+            return False
+        if current_mtime == entry[prefix + '_mtime']:
+            return True
+        if file_content_hash(path) != entry[prefix + '_hash']:
+            return False
+        # Only touched, remember the new mtime so it is not hashed again
+        entry[prefix + '_mtime'] = current_mtime
+        return True
+
+    def is_current(self, tex_type, source, destination, options):
+        """
+        Check whether a previous build already produced this texture.
+
+        Args:
+            tex_type (str): "color", "height" or "normal"
+            source (str): Source texture path
+            destination (str): Exported .dds path
+            options (dict): Result of conversion_options()
+
+        Returns:
+            bool: True if the conversion can be skipped
+        """
+        entry = self.entries.get(tex_type)
+        if entry is None or entry['source'] != os.path.abspath(source) or entry['options'] != options:
+            return False
+        try:
+            return self._file_matches(destination, entry, 'output') and self._file_matches(source, entry, 'source')
+        except (OSError, KeyError):
+            return False
+
+    def record(self, tex_type, source, destination, options, files=None):
+        """
+        Remember a finished conversion.
+
+        Args:
+            files (dict, optional): file_record() of the conversion, read from
+                                    the files when not given
+        """
+        files = files or file_record(source, destination)
+        self.entries[tex_type] = {
+            'source': os.path.abspath(source),
+            'source_size': files['source_size'],
+            'source_mtime': files['source_mtime'],
+            'source_hash': files['source_hash'],
+            'options': options,
+            'output': os.path.basename(destination),
+            'output_size': files['output_size'],
+            'output_mtime': files['output_mtime'],
+            'output_hash': files['output_hash'],
+        }
+
+    def pending_jobs(self, jobs, options):
+        """
+        Filter texture jobs down to the ones that need converting.
+
+        Args:
+            jobs (dict): Maps texture type to a (source path, destination path) tuple
+            options (dict): Maps texture type to its conversion_options()
+
+        Returns:
+            dict: The subset of jobs that are out of date
+        """
+        return {tex_type: job for tex_type, job in jobs.items()
+                if not self.is_current(tex_type, job[0], job[1], options[tex_type])}
+
+    def update(self, jobs, results, options, files=None):
+        """
+        Record the successful conversions of a build and forget textures that
+        are no longer part of the mod or failed to convert.
+
+        Args:
+            jobs (dict): Every texture job of the build
+            results (dict): Maps texture type to the error of its conversion, or None
+            options (dict): Maps texture type to its conversion_options()
+            files (dict, optional): Maps texture type to the file_record() its
+                                    worker took, the rest are read here
+        """
+        for tex_type in list(self.entries):
+            if tex_type not in jobs or results.get(tex_type, None) is not None:
+                del self.entries[tex_type]
+        for tex_type, error in results.items():
+            if error is None and tex_type in jobs:
+                source, destination = jobs[tex_type]
+                self.record(tex_type, source, destination, options[tex_type], (files or {}).get(tex_type))
+
+    def save(self):
+        write_text_atomic(self.path, json.dumps({'textures': self.entries}, indent=2))
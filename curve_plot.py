@@ -0,0 +1,158 @@
+from PyQt6.QtWidgets import QHBoxLayout, QLabel, QVBoxLayout, QWidget
+from PyQt6.QtGui import QColor, QPainter, QPen
+from PyQt6.QtCore import Qt, QRectF, QTimer
+
+from orbit_widgets import array_polygon
+
+# Typing pauses shorter than this do not redraw the preview
+DEBOUNCE_MS = 150
+# Samples per curve for the checks, the plot only draws a few per pixel
+CHECK_SAMPLES = 100_000
+POINTS_PER_PIXEL = 2
+PLOT_MARGIN = 6
+
+class CurvePlot(QWidget):
+    """Plot of one sampled curve against altitude, altitude along the x axis"""
+    def __init__(self, title, unit, color, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(200, 120)
+        self.title = title
+        self.unit = unit
+        self.color = QColor(color)
+        self.altitude = None
+        self.values = None
+
+    def set_samples(self, altitude, values):
+        """
+        Args:
+            altitude (np.ndarray): Sorted altitudes in m, or None to clear the plot
+            values (np.ndarray): Curve values at those altitudes
+        """
+        self.altitude = altitude
+        self.values = values
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        frame = QRectF(self.rect()).adjusted(PLOT_MARGIN, PLOT_MARGIN, -PLOT_MARGIN, -PLOT_MARGIN)
+        painter.setPen(QPen(self.palette().mid().color(), 1))
+        painter.drawRect(frame)
+        painter.setPen(QPen(self.palette().windowText().color()))
+        text_area = frame.adjusted(4, 2, -4, -2)
+        if self.altitude is None or len(self.altitude) < 2:
+            painter.drawText(frame, Qt.AlignmentFlag.AlignCenter, f"{self.title}: no keys")
+            return
+
+        import numpy as np
+        low, high = float(self.values.min()), float(self.values.max())
+        span = high - low if high > low else max(abs(high), 1.0)
+        if high == low:
+            low -= span / 2
+        top = float(self.altitude[-1])
+
+        # Decimate to what the width can show, the checks already saw every sample
+        count = min(len(self.altitude), max(2, int(frame.width()) * POINTS_PER_PIXEL))
+        rows = np.linspace(0, len(self.altitude) - 1, count).astype(np.int64)
+        x = frame.left() + (self.altitude[rows] / max(top, 1e-12)) * frame.width()
+        y = frame.bottom() - (self.values[rows] - low) / span * frame.height()
+        if low < 0 < low + span:
+            zero = frame.bottom() + low / span * frame.height()
+            painter.setPen(QPen(Qt.GlobalColor.red, 1, Qt.PenStyle.DashLine))
+            painter.drawLine(int(frame.left()), round(zero), int(frame.right()), round(zero))
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPolyline(array_polygon(x, y))
+
+        painter.setPen(QPen(self.palette().windowText().color()))
+        painter.drawText(text_area, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft,
+                         f"{self.title} ({self.unit}), {low:.4g} to {low + span:.4g}")
+        painter.drawText(text_area, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignRight, f"{top:.0f} m")
+
+class AtmosphereCurvePreview(QWidget):
+    """
+    Plots of the typed pressure and temperature curves, with warnings.
+
+    set_curves() can be called on every keystroke. The curves are parsed,
+    sampled and checked once typing pauses for DEBOUNCE_MS, and only while
+    the preview is visible.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        plots_layout = QHBoxLayout()
+        layout.addLayout(plots_layout)
+        self.pressure_plot = CurvePlot("Pressure", "kPa", "#1f77b4")
+        self.temperature_plot = CurvePlot("Temperature", "K", "#d62728")
+        plots_layout.addWidget(self.pressure_plot)
+        plots_layout.addWidget(self.temperature_plot)
+        self.warnings = QLabel()
+        self.warnings.setWordWrap(True)
+        self.warnings.setStyleSheet("color: #b00000")
+        layout.addWidget(self.warnings)
+
+        self.pressure_text = ""
+        self.temperature_text = ""
+        self.atmosphere_height = 0
+        self._pending = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.refreshes = 0
+
+    def set_curves(self, pressure_text, temperature_text, atmosphere_height):
+        """
+        Args:
+            pressure_text (str): pressureCurve keys as typed
+            temperature_text (str): temperatureCurve keys as typed
+            atmosphere_height (float): Top of the atmosphere in m
+        """
+        self.pressure_text = pressure_text
+        self.temperature_text = temperature_text
+        self.atmosphere_height = atmosphere_height
+        self._pending = True
+        self.timer.start()
+
+    def showEvent(self, event):
+        if self._pending:
+            self.timer.start()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        self._pending = False
+        self.refreshes += 1
+        if not (self.pressure_text.strip() or self.temperature_text.strip()):
+            # Nothing typed yet, keep NumPy out of it
+            self.pressure_plot.set_samples(None, None)
+            self.temperature_plot.set_samples(None, None)
+            self.warnings.setText("")
+            return
+
+        from atmosphere import check_curves
+        from float_curve import evaluate_curve, parse_keys
+        import numpy as np
+
+        messages = []
+        curves = {}
+        for name, text in (("Pressure", self.pressure_text), ("Temperature", self.temperature_text)):
+            try:
+                keys = parse_keys(text)
+            except ValueError as e:
+                messages.append(f"{name} curve: {e}")
+                continue
+            if len(keys):
+                curves[name] = keys
+
+        # Without a height, show the range the keys cover
+        top = self.atmosphere_height or max((keys[-1, 0] for keys in curves.values()), default=0)
+        altitude = np.linspace(0, max(top, 1), CHECK_SAMPLES)
+        pressure = evaluate_curve(curves["Pressure"], altitude) if "Pressure" in curves else None
+        temperature = evaluate_curve(curves["Temperature"], altitude) if "Temperature" in curves else None
+        messages += check_curves(altitude, pressure, temperature)
+
+        self.pressure_plot.set_samples(None if pressure is None else altitude, pressure)
+        self.temperature_plot.set_samples(None if temperature is None else altitude, temperature)
+        self.warnings.setText("\n".join(messages))
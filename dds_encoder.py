@@ -0,0 +1,665 @@
+import os
+import struct
+import warnings
+import zlib
+from contextlib import contextmanager
+import numpy as np
+from PIL import Image
+
+from tracing import span
+
+# DDS header flags
+DDSD_CAPS = 0x1
+DDSD_HEIGHT = 0x2
+DDSD_WIDTH = 0x4
+DDSD_PIXELFORMAT = 0x1000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSD_LINEARSIZE = 0x80000
+DDPF_FOURCC = 0x4
+DDSCAPS_COMPLEX = 0x8
+DDSCAPS_TEXTURE = 0x1000
+DDSCAPS_MIPMAP = 0x400000
+
+# Bumped whenever the encoded output changes, so cached builds are redone
+ENCODER_VERSION = 1
+
+# Bytes per 4x4 block for each supported format
+BLOCK_SIZES = {"DXT1": 8, "DXT5": 16}
+
+# Number of 4x4 blocks encoded per batch, keeps temporaries around a few hundred MB
+BLOCKS_PER_BATCH = 1 << 16
+
+# Default peak working set for streaming conversion
+DEFAULT_STREAM_BUDGET = 256 * 1024 * 1024
+
+# Rough working set per source pixel while a strip is being encoded: the
+# decoded strip, its RGBA copy and the encoder's float temporaries
+_STREAM_BYTES_PER_PIXEL = 96
+
+# Sources above this many pixels are converted in strips automatically
+STREAMING_PIXEL_THRESHOLD = 8192 * 8192
+
+# Compressed PNG data read from the file at a time while decoding it in strips
+_PNG_READ_SIZE = 1 << 20
+
+# Maps a quantized position along the endpoint line to the block index that
+# the decoder uses for that palette entry
+_BC1_INDEX_LUT = np.array([0, 2, 3, 1], dtype=np.uint32)
+_BC3_INDEX_LUT = np.array([0, 2, 3, 4, 5, 6, 7, 1], dtype=np.uint64)
+_BC1_SHIFTS = (2 * np.arange(16, dtype=np.uint32))
+_BC3_SHIFTS = (3 * np.arange(16, dtype=np.uint64))
+_BC1_DTYPE = np.dtype([("c0", "<u2"), ("c1", "<u2"), ("indices", "<u4")])
+
+
+def dds_header(width, height, fmt="DXT5", mip_count=1):
+    """
+    Build the 128 byte DDS header for a block compressed texture.
+
+    Args:
+        width (int): Width of the top level in pixels
+        height (int): Height of the top level in pixels
+        fmt (str): "DXT1" or "DXT5"
+        mip_count (int): Number of mip levels stored after the header
+
+    Returns:
+        bytes: Magic number followed by the DDS_HEADER structure
+    """
+    block_size = BLOCK_SIZES[fmt]
+    linear_size = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_size
+
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    caps = DDSCAPS_TEXTURE
+    if mip_count > 1:
+        flags |= DDSD_MIPMAPCOUNT
+        caps |= DDSCAPS_COMPLEX | DDSCAPS_MIPMAP
+
+    pixel_format = struct.pack("<II4s5I", 32, DDPF_FOURCC, fmt.encode("ascii"), 0, 0, 0, 0, 0)
+    header = struct.pack("<7I44x", 124, flags, height, width, linear_size, 0, mip_count)
+    header += pixel_format
+    header += struct.pack("<5I", caps, 0, 0, 0, 0)
+    return b"DDS " + header
+
+
+def image_to_blocks(pixels):
+    """
+    Split an image array into 4x4 blocks, padding the edges by replication.
+
+    Args:
+        pixels (np.ndarray): uint8 array of shape (height, width, channels)
+
+    Returns:
+        np.ndarray: uint8 array of shape (block_count, 16, channels) in row-major block order
+    """
+    height, width, channels = pixels.shape
+    pad_y = (-height) % 4
+    pad_x = (-width) % 4
+    if pad_y or pad_x:
+        pixels = np.pad(pixels, ((0, pad_y), (0, pad_x), (0, 0)), mode="edge")
+    rows, cols = pixels.shape[0] // 4, pixels.shape[1] // 4
+    blocks = pixels.reshape(rows, 4, cols, 4, channels).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(rows * cols, 16, channels)
+
+
+def _to_565(colors):
+    """Quantize float RGB endpoints to packed RGB565 values."""
+    r = np.rint(colors[:, 0] * (31 / 255)).astype(np.uint16)
+    g = np.rint(colors[:, 1] * (63 / 255)).astype(np.uint16)
+    b = np.rint(colors[:, 2] * (31 / 255)).astype(np.uint16)
+    return (r << 11) | (g << 5) | b
+
+
+def _from_565(packed):
+    """Expand packed RGB565 values back to float RGB the way decoders do."""
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1).astype(np.float32)
+
+
+def encode_bc1_blocks(blocks):
+    """
+    Encode a batch of 4x4 blocks as BC1 (DXT1) colour blocks.
+
+    Endpoints come from the inset bounding box of each block, flipped along
+    the red and blue axes when they are anti-correlated with green. Every
+    block is written in four colour mode.
+
+    Args:
+        blocks (np.ndarray): uint8 array of shape (count, 16, 3 or 4)
+
+    Returns:
+        np.ndarray: uint8 array of shape (count, 8)
+    """
+    rgb = blocks[:, :, :3].astype(np.float32)
+    lo = rgb.min(axis=1)
+    hi = rgb.max(axis=1)
+    inset = (hi - lo) / 16
+    lo += inset
+    hi -= inset
+
+    # Pick the bounding box diagonal that follows the colour distribution
+    centered = rgb - rgb.mean(axis=1, keepdims=True)
+    for channel in (0, 2):
+        flip = (centered[:, :, channel] * centered[:, :, 1]).sum(axis=1) < 0
+        lo[flip, channel], hi[flip, channel] = hi[flip, channel], lo[flip, channel].copy()
+
+    c0 = _to_565(hi)
+    c1 = _to_565(lo)
+    swap = c0 < c1
+    c0[swap], c1[swap] = c1[swap], c0[swap].copy()
+
+    # Project every pixel onto the quantized endpoint line
+    e0 = _from_565(c0)
+    e1 = _from_565(c1)
+    axis = e1 - e0
+    length_sq = (axis * axis).sum(axis=1)
+    length_sq[length_sq == 0] = 1
+    t = np.einsum("nkc,nc->nk", rgb - e0[:, None, :], axis) / length_sq[:, None]
+    steps = np.clip(np.rint(t * 3), 0, 3).astype(np.intp)
+    indices = _BC1_INDEX_LUT[steps]
+    indices[c0 == c1] = 0
+
+    out = np.empty(len(blocks), dtype=_BC1_DTYPE)
+    out["c0"] = c0
+    out["c1"] = c1
+    out["indices"] = np.bitwise_or.reduce(indices << _BC1_SHIFTS, axis=1)
+    return out.view(np.uint8).reshape(len(blocks), 8)
+
+
+def encode_bc3_alpha_blocks(alpha):
+    """
+    Encode a batch of 4x4 alpha blocks as BC3 (DXT5) interpolated alpha.
+
+    Args:
+        alpha (np.ndarray): uint8 array of shape (count, 16)
+
+    Returns:
+        np.ndarray: uint8 array of shape (count, 8)
+    """
+    a0 = alpha.max(axis=1)
+    a1 = alpha.min(axis=1)
+    span = (a0.astype(np.float32) - a1)
+    flat = span == 0
+    span[flat] = 1
+
+    t = (a0[:, None].astype(np.float32) - alpha) / span[:, None]
+    steps = np.clip(np.rint(t * 7), 0, 7).astype(np.intp)
+    indices = _BC3_INDEX_LUT[steps]
+    indices[flat] = 0
+    bits = np.bitwise_or.reduce(indices << _BC3_SHIFTS, axis=1).astype("<u8")
+
+    out = np.empty((len(alpha), 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:] = bits.view(np.uint8).reshape(len(alpha), 8)[:, :6]
+    return out
+
+
+def encode_blocks(blocks, fmt="DXT5"):
+    """
+    Encode a batch of 4x4 RGBA blocks.
+
+    Args:
+        blocks (np.ndarray): uint8 array of shape (count, 16, 4)
+        fmt (str): "DXT1" or "DXT5"
+
+    Returns:
+        np.ndarray: uint8 array of shape (count, block size)
+    """
+    color = encode_bc1_blocks(blocks)
+    if fmt == "DXT1":
+        return color
+    if fmt != "DXT5":
+        raise ValueError(f"Unsupported DDS format: {fmt}")
+    return np.concatenate([encode_bc3_alpha_blocks(blocks[:, :, 3]), color], axis=1)
+
+
+def encode_image(pixels, fmt="DXT5"):
+    """
+    Encode an RGBA image into a block compressed payload.
+
+    Block rows are encoded in batches so the float temporaries stay bounded
+    regardless of the image size.
+
+    Args:
+        pixels (np.ndarray): uint8 array of shape (height, width, 4)
+        fmt (str): "DXT1" or "DXT5"
+
+    Returns:
+        bytes: The encoded blocks in row-major order
+    """
+    height, width = pixels.shape[:2]
+    block_cols = max(1, (width + 3) // 4)
+    rows_per_batch = max(1, BLOCKS_PER_BATCH // block_cols)
+    parts = []
+    for top in range(0, height, rows_per_batch * 4):
+        strip = pixels[top:top + rows_per_batch * 4]
+        parts.append(encode_blocks(image_to_blocks(strip), fmt).tobytes())
+    return b"".join(parts)
+
+
+def mip_level_count(width, height):
+    """Number of levels in a full mip chain down to 1x1."""
+    return max(width, height).bit_length()
+
+
+def _kaiser_kernel(taps=8, beta=4.0):
+    """Kaiser windowed sinc for a 2:1 decimation, normalized to unit gain."""
+    x = np.arange(taps, dtype=np.float64) - (taps - 1) / 2
+    kernel = np.sinc(x / 2) * np.kaiser(taps, beta)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+_KAISER_KERNEL = _kaiser_kernel()
+
+
+def _downsample_box(level):
+    """
+    Average 2x2 neighbourhoods with integer math. Sizes halve with rounding down
+    as DDS expects, so the last row/column of an odd size is dropped.
+    """
+    acc = level.astype(np.uint16)
+    if acc.shape[0] > 1:
+        rows = acc.shape[0] // 2 * 2
+        acc = acc[0:rows:2] + acc[1:rows:2]
+    else:
+        acc = acc * 2
+    if acc.shape[1] > 1:
+        cols = acc.shape[1] // 2 * 2
+        acc = acc[:, 0:cols:2] + acc[:, 1:cols:2]
+    else:
+        acc = acc * 2
+    return ((acc + 2) >> 2).astype(np.uint8)
+
+
+def _decimate_axis(level, axis, wrap):
+    """Filter with the Kaiser kernel along one axis and keep every second sample."""
+    size = level.shape[axis]
+    if size == 1:
+        return level
+    half = len(_KAISER_KERNEL) // 2
+    mode = "wrap" if wrap else "edge"
+    pad = [(0, 0)] * level.ndim
+    pad[axis] = (half - 1, half - 1)
+    padded = np.pad(level, pad, mode=mode)
+    out_size = size // 2
+    out = np.zeros(level.shape[:axis] + (out_size,) + level.shape[axis + 1:], dtype=np.float32)
+    for tap, weight in enumerate(_KAISER_KERNEL):
+        index = [slice(None)] * level.ndim
+        index[axis] = slice(tap, tap + 2 * out_size, 2)
+        out += weight * padded[tuple(index)]
+    return out
+
+
+def _downsample_kaiser(level):
+    """
+    Kaiser filtered 2:1 downsample. Longitude (x) wraps around since planet maps
+    are equirectangular, latitude (y) clamps at the poles.
+    """
+    level = _decimate_axis(level.astype(np.float32), 1, wrap=True)
+    level = _decimate_axis(level, 0, wrap=False)
+    return np.clip(np.rint(level), 0, 255).astype(np.uint8)
+
+
+MIP_FILTERS = {"box": _downsample_box, "kaiser": _downsample_kaiser}
+
+
+def iter_mip_chain(pixels, mip_filter="box"):
+    """
+    Yield every level of the mip chain, starting with the source itself.
+
+    Each level is filtered from the one above it rather than from the source.
+
+    Args:
+        pixels (np.ndarray): uint8 array of shape (height, width, channels)
+        mip_filter (str): "box" or "kaiser"
+
+    Yields:
+        np.ndarray: uint8 level arrays down to 1x1
+    """
+    downsample = MIP_FILTERS[mip_filter]
+    level = pixels
+    yield level
+    while level.shape[0] > 1 or level.shape[1] > 1:
+        level = downsample(level)
+        yield level
+
+
+def write_dds(image, output_path, fmt="DXT5", mipmaps=False, mip_filter="box"):
+    """
+    Encode a Pillow image and write it as a DDS file.
+
+    Args:
+        image (PIL.Image.Image): Decoded source image
+        output_path (str): Destination .dds path
+        fmt (str): "DXT1" or "DXT5"
+        mipmaps (bool): Store a full mip chain after the top level
+        mip_filter (str): "box" or "kaiser" downsampling for the mip chain
+    """
+    with span("decode", width=image.width, height=image.height):
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        pixels = np.asarray(image)
+    mip_count = mip_level_count(image.width, image.height) if mipmaps else 1
+    with open(output_path, "wb") as f:
+        f.write(dds_header(image.width, image.height, fmt, mip_count))
+        for level in iter_mip_chain(pixels, mip_filter):
+            with span("encode mip level", width=level.shape[1], height=level.shape[0]):
+                f.write(encode_image(level, fmt))
+            if not mipmaps:
+                break
+
+
+@contextmanager
+def unlimited_image_pixels():
+    """Lift Pillow's decompression bomb limit, 32k planet maps are far past it."""
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def _raw_row_layout(image):
+    """
+    Describe where each source row lives in the file, if it can be read directly.
+
+    Returns:
+        tuple: (offset, rawmode, stride, orientation), or None when the pixels are
+               compressed or split into tiles and have to be decoded in one go
+    """
+    if len(image.tile) != 1:
+        return None
+    codec, extents, offset, args = image.tile[0][:4]
+    if codec != "raw" or tuple(extents) != (0, 0, image.width, image.height):
+        return None
+    if isinstance(args, str):
+        args = (args,)
+    rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+    if stride <= 0:
+        try:
+            stride = len(Image.new(image.mode, (image.width, 1)).tobytes("raw", rawmode))
+        except (ValueError, KeyError, OSError):
+            return None
+    return offset, rawmode, stride, orientation
+
+
+def _png_row_layout(image):
+    """
+    Describe the rows of a PNG that can be decoded a strip at a time.
+
+    Returns:
+        tuple: (offset of the first IDAT data, rawmode, bytes per row), or None
+               for interlaced PNGs and layouts the decoded image loses bits of
+    """
+    if image.format != "PNG" or len(image.tile) != 1 or image.info.get("interlace"):
+        return None
+    codec, extents, offset, args = image.tile[0][:4]
+    if codec != "zip" or tuple(extents) != (0, 0, image.width, image.height):
+        return None
+    rawmode = args if isinstance(args, str) else args[0]
+    row = Image.new(image.mode, (image.width, 1))
+    try:
+        stride = len(row.tobytes("raw", rawmode))
+    except (ValueError, KeyError, OSError):
+        return None
+    # Each strip starts from the last row of the one before, packed back from
+    # the decoded image, so that has to hold every bit of the file's rows
+    if stride > len(row.tobytes()):
+        return None
+    return offset, rawmode, stride
+
+
+def can_read_in_strips(image):
+    """Whether iter_image_strips() reads an opened image without decoding it whole"""
+    return _raw_row_layout(image) is not None or _png_row_layout(image) is not None
+
+
+def _png_data(f, offset):
+    """Yield the compressed image data of a PNG, from the IDAT chunk starting at offset"""
+    f.seek(offset - 8)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack(">I4s", header)
+        if kind != b"IDAT":
+            return
+        while length:
+            data = f.read(min(length, _PNG_READ_SIZE))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+        # CRC
+        f.read(4)
+
+
+def _inflate(decompressor, data, size):
+    """Exactly size bytes out of a zlib stream fed from the data iterator"""
+    output = bytearray()
+    while len(output) < size:
+        pending = decompressor.unconsumed_tail or next(data, b"")
+        if not pending:
+            raise OSError("image file is truncated")
+        output += decompressor.decompress(pending, size - len(output))
+    return output
+
+
+def _iter_png_strips(image, path, strip_rows, layout):
+    """
+    Decode the rows of a PNG a strip at a time.
+
+    The image data is inflated one strip of filtered rows at a time. Rows are
+    filtered against the row above them, so each strip goes to Pillow's PNG
+    decoder behind the last row of the strip before, stored unfiltered.
+    """
+    offset, rawmode, stride = layout
+    width, height = image.size
+    decompressor = zlib.decompressobj()
+    previous = b""
+    with open(path, 'rb') as f:
+        data = _png_data(f, offset)
+        for top in range(0, height, strip_rows):
+            rows = min(strip_rows, height - top)
+            filtered = _inflate(decompressor, data, rows * (stride + 1))
+            if previous:
+                # Filter type 0 leaves the row as it is
+                filtered[:0] = b"\x00" + previous
+            decoded = Image.frombytes(image.mode, (width, len(filtered) // (stride + 1)),
+                                      zlib.compress(filtered, 0), "zip", rawmode)
+            strip = decoded.crop((0, decoded.height - rows, width, decoded.height)) if previous else decoded
+            previous = strip.crop((0, rows - 1, width, rows)).tobytes("raw", rawmode)
+            yield strip
+
+
+def _match_palette(strip, image):
+    if image.mode == "P":
+        strip.putpalette(image.getpalette())
+    if "transparency" in image.info:
+        strip.info["transparency"] = image.info["transparency"]
+    return strip
+
+
+def iter_image_strips(path, strip_rows):
+    """
+    Yield horizontal strips of an image file from top to bottom.
+
+    Uncompressed layouts (BMP, TGA, PPM, raw TIFF) are read strip by strip
+    straight from the file and PNGs are inflated and decoded a strip at a time.
+    Other compressed formats such as JPEG and interlaced PNG cannot be entered
+    mid-stream, so they are decoded once and cropped into strips, see
+    can_read_in_strips().
+
+    Args:
+        path (str): Source image path
+        strip_rows (int): Rows per strip
+
+    Yields:
+        PIL.Image.Image: The next strip, full width
+    """
+    with unlimited_image_pixels(), Image.open(path) as image:
+        width, height = image.size
+        png_layout = _png_row_layout(image)
+        if png_layout is not None:
+            for strip in _iter_png_strips(image, path, strip_rows, png_layout):
+                yield _match_palette(strip, image)
+            return
+        layout = _raw_row_layout(image)
+        if layout is None:
+            image.load()
+            for top in range(0, height, strip_rows):
+                yield image.crop((0, top, width, min(height, top + strip_rows)))
+            return
+
+        offset, rawmode, stride, orientation = layout
+        # The rows are unpacked from the bytes read here, plugins such as TIFF
+        # decode their whole image whatever tile they are given
+        with open(path, 'rb') as f:
+            for top in range(0, height, strip_rows):
+                rows = min(strip_rows, height - top)
+                first_row = top if orientation > 0 else height - top - rows
+                f.seek(offset + first_row * stride)
+                data = f.read(rows * stride)
+                if len(data) < rows * stride:
+                    raise OSError(f"{path} is truncated")
+                strip = Image.frombuffer(image.mode, (width, rows), data, "raw", rawmode, stride, orientation)
+                yield _match_palette(strip, image)
+
+
+def _mip_dimensions(width, height, count):
+    dims = []
+    for _ in range(count):
+        dims.append((width, height))
+        width, height = max(1, width // 2), max(1, height // 2)
+    return dims
+
+
+class _StreamingMipWriter:
+    """
+    Encode rows into a memory-mapped DDS payload as they arrive.
+
+    Every level keeps at most three leftover rows waiting for a full block row
+    and one row waiting for its 2x2 partner, so the chain is built on the fly
+    without holding any level in memory.
+    """
+
+    def __init__(self, payload, dims, fmt):
+        self.payload = payload
+        self.dims = dims
+        self.fmt = fmt
+        self.block_size = BLOCK_SIZES[fmt]
+        self.cursors = []
+        position = 0
+        for width, height in dims:
+            self.cursors.append(position)
+            position += max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * self.block_size
+        self.encode_pending = [None] * len(dims)
+        self.downsample_pending = [None] * len(dims)
+
+    def _encode(self, level, rows):
+        data = np.frombuffer(encode_image(rows, self.fmt), dtype=np.uint8)
+        start = self.cursors[level]
+        self.payload[start:start + len(data)] = data
+        self.cursors[level] += len(data)
+
+    def feed(self, level, rows):
+        if level >= len(self.dims):
+            return
+        pending = self.encode_pending[level]
+        batch = rows if pending is None else np.concatenate([pending, rows])
+        ready = len(batch) // 4 * 4
+        if ready:
+            self._encode(level, batch[:ready])
+        self.encode_pending[level] = batch[ready:] if ready < len(batch) else None
+
+        if level + 1 == len(self.dims):
+            return
+        if self.dims[level][1] == 1:
+            # A single row level halves horizontally only
+            self.feed(level + 1, _downsample_box(rows))
+            return
+        pending = self.downsample_pending[level]
+        batch = rows if pending is None else np.concatenate([pending, rows])
+        pairs = len(batch) // 2 * 2
+        if pairs:
+            self.feed(level + 1, _downsample_box(batch[:pairs]))
+        self.downsample_pending[level] = batch[pairs:] if pairs < len(batch) else None
+
+    def finish(self):
+        # Partial block rows at the bottom of each level are padded by the encoder,
+        # an odd row left for downsampling is dropped as in _downsample_box
+        for level, pending in enumerate(self.encode_pending):
+            if pending is not None:
+                self._encode(level, pending)
+
+
+def write_dds_rows(strips, width, height, output_path, fmt="DXT5", mipmaps=False):
+    """
+    Write DDS data produced strip by strip through a memory-mapped output.
+
+    Only the strip being encoded and a few rows per mip level are held in
+    memory. Mip levels use the box filter.
+
+    Args:
+        strips (iterable): uint8 RGBA arrays of whole rows, top to bottom,
+                           height rows in total
+        width (int): Image width
+        height (int): Image height
+        output_path (str): Destination .dds path
+        fmt (str): "DXT1" or "DXT5"
+        mipmaps (bool): Store a full mip chain after the top level
+    """
+    mip_count = mip_level_count(width, height) if mipmaps else 1
+    dims = _mip_dimensions(width, height, mip_count)
+    header = dds_header(width, height, fmt, mip_count)
+    payload_size = sum(max(1, (w + 3) // 4) * max(1, (h + 3) // 4) for w, h in dims) * BLOCK_SIZES[fmt]
+
+    output = np.memmap(output_path, dtype=np.uint8, mode="w+", shape=(len(header) + payload_size,))
+    try:
+        output[:len(header)] = np.frombuffer(header, dtype=np.uint8)
+        writer = _StreamingMipWriter(output[len(header):], dims, fmt)
+        for rows in strips:
+            with span("encode strip", rows=len(rows)):
+                writer.feed(0, rows)
+                output.flush()
+        writer.finish()
+        output.flush()
+    finally:
+        del output
+
+
+def stream_strip_rows(width, memory_budget=DEFAULT_STREAM_BUDGET):
+    """Rows per strip that keep streaming an image of this width within memory_budget"""
+    return max(4, memory_budget // (width * _STREAM_BYTES_PER_PIXEL) // 4 * 4)
+
+
+def write_dds_streaming(source_path, output_path, fmt="DXT5", mipmaps=False,
+                        memory_budget=DEFAULT_STREAM_BUDGET):
+    """
+    Convert an image file to DDS strip by strip through a memory-mapped output.
+
+    Peak memory is governed by memory_budget rather than the image size for
+    sources can_read_in_strips() accepts: uncompressed layouts and
+    non-interlaced PNG. Anything else is decoded whole first, with a warning.
+    Mip levels use the box filter.
+
+    Args:
+        source_path (str): Source image path
+        output_path (str): Destination .dds path
+        fmt (str): "DXT1" or "DXT5"
+        mipmaps (bool): Store a full mip chain after the top level
+        memory_budget (int): Approximate bytes to spend on the working set
+    """
+    with unlimited_image_pixels(), Image.open(source_path) as image:
+        width, height = image.size
+        if not can_read_in_strips(image):
+            warnings.warn(f"{os.path.basename(source_path)} cannot be read in strips and is decoded whole, "
+                          f"memory use is not bounded by memory_budget", RuntimeWarning, stacklevel=2)
+
+    def rgba_strips():
+        for strip in iter_image_strips(source_path, stream_strip_rows(width, memory_budget)):
+            yield np.asarray(strip if strip.mode == "RGBA" else strip.convert("RGBA"))
+
+    write_dds_rows(rgba_strips(), width, height, output_path, fmt, mipmaps)
@@ -0,0 +1,105 @@
+import numpy as np
+
+def evaluate_curve(keys, x):
+    """
+    Evaluate a KSP FloatCurve at many points at once.
+
+    Between two keys the curve is the cubic Hermite spline through their
+    values, using the out tangent of the first key and the in tangent of the
+    second, as Unity's AnimationCurve does. Outside the keys it holds the
+    first or last value.
+
+    Args:
+        keys (array-like): (count, 4) rows of time, value, in tangent and out
+                           tangent, sorted by time
+        x (array-like): Times to evaluate at
+
+    Returns:
+        np.ndarray: Curve values, float64, shaped like x
+    """
+    keys = np.asarray(keys, dtype=np.float64).reshape(-1, 4)
+    x = np.asarray(x, dtype=np.float64)
+    if len(keys) == 0:
+        return np.zeros_like(x)
+    if len(keys) == 1:
+        return np.full_like(x, keys[0, 1])
+
+    # Each segment as a cubic in the distance u from its first key, so
+    # evaluating costs one lookup and a Horner step per sample
+    times, values = keys[:, 0], keys[:, 1]
+    width = np.diff(times)
+    out_tangent, in_tangent = keys[:-1, 3], keys[1:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.diff(values) / width
+        square = (3 * slope - 2 * out_tangent - in_tangent) / width
+        cube = (out_tangent + in_tangent - 2 * slope) / width**2
+    empty = width <= 0
+    coefficients = np.stack([np.where(empty, values[1:], values[:-1]), np.where(empty, 0, out_tangent),
+                             np.where(empty, 0, square), np.where(empty, 0, cube)])
+
+    segment = np.searchsorted(times, x, side='right')
+    segment -= 1
+    np.clip(segment, 0, len(keys) - 2, out=segment)
+    u = x - times[segment]
+    np.clip(u, 0, np.maximum(width, 0)[segment], out=u)
+    c0, c1, c2, c3 = coefficients[:, segment]
+    result = c3 * u
+    result += c2
+    result *= u
+    result += c1
+    result *= u
+    result += c0
+    return result
+
+def parse_keys(text):
+    """
+    Read the keys of a FloatCurve node body.
+
+    Each line is "key = time value inTangent outTangent". The "key =" prefix
+    may be left out, missing tangents are 0, and blank lines, braces and //
+    comments are skipped. Keys are sorted by time, as KSP does when it loads
+    a curve.
+
+    Args:
+        text (str): Curve text as typed in the Atmosphere tab
+
+    Returns:
+        np.ndarray: (count, 4) keys of time, value, in tangent and out tangent
+
+    Raises:
+        ValueError: A line is not a key, naming its line number
+    """
+    keys = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('//', 1)[0].strip()
+        if not line or line in '{}':
+            continue
+        name, separator, values = line.partition('=')
+        if separator:
+            if name.strip() != 'key':
+                raise ValueError(f"Line {number}: expected a key, got {name.strip()!r}")
+            line = values
+        fields = line.replace(',', ' ').split()
+        if not 2 <= len(fields) <= 4:
+            raise ValueError(f"Line {number}: a key needs 2 to 4 numbers, got {len(fields)}")
+        try:
+            keys.append([float(value) for value in fields] + [0.0] * (4 - len(fields)))
+        except ValueError:
+            raise ValueError(f"Line {number}: {line.strip()!r} is not a list of numbers") from None
+
+    keys = np.array(keys, dtype=np.float64).reshape(-1, 4)
+    return keys[np.argsort(keys[:, 0], kind='stable')]
+
+def format_keys(keys):
+    """
+    Format keys as the body of a FloatCurve node.
+
+    Args:
+        keys (array-like): (count, 4) rows of time, value, in tangent and out tangent
+
+    Returns:
+        str: One "key = time value inTangent outTangent" line per key
+    """
+    # Adding 0.0 turns -0.0 into 0.0
+    return "\n".join("key = " + " ".join(f"{value + 0.0:.7g}" for value in key)
+                     for key in np.asarray(keys, dtype=np.float64).reshape(-1, 4).tolist())
@@ -1,127 +1,196 @@
 import os
-import math
-from PyQt6.QtGui import QColor
+from planet_model import parse_hex_color
+from tracing import span, traced
 
-def get_color_from_button(button):
-    style = button.styleSheet()
-    if "background-color" in style:
-        color_str = style.split("background-color: ")[1].split(";")[0]
-        return QColor(color_str)
-    return QColor(0, 0, 0)  # Default to black if no color is set
+# VertexHeightMap settings used without an elevation range
+DEFAULT_DEFORMITY = 6500
+DEFAULT_OFFSET = 0
 
-def generate_config(self):
-    config = f"""@Kopernicus:FOR[YourMod]
+def texture_base_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def atmosphere_curve_texts(planet):
+    """
+    Pressure and temperature curve keys for the config.
+
+    Curves left empty are generated from the planet's atmosphere model when
+    it has a scale height and the model is valid for it, and are kept as typed
+    otherwise.
+
+    Returns:
+        tuple: (pressureCurve keys, temperatureCurve keys) as text
+    """
+    pressure_curve, temperature_curve = planet.pressure_curve, planet.temperature_curve
+    if planet.scale_height > 0 and not (pressure_curve.strip() and temperature_curve.strip()):
+        from atmosphere import atmosphere_curves
+        from float_curve import format_keys
+        try:
+            with span("atmosphere curves"):
+                pressure_keys, temperature_keys = atmosphere_curves(planet.static_pressure, planet.atmosphere_temp,
+                                                                    planet.atmosphere_height, planet.scale_height,
+                                                                    planet.lapse_rate)
+        except ValueError:
+            return pressure_curve, temperature_curve
+        if not pressure_curve.strip():
+            pressure_curve = format_keys(pressure_keys)
+        if not temperature_curve.strip():
+            temperature_curve = format_keys(temperature_keys)
+    return pressure_curve, temperature_curve
+
+def vertex_height_map_settings(planet):
+    """
+    Deformity and offset that stretch the height map over the planet's
+    elevation range.
+
+    The defaults are kept when no range is set or the height map cannot be
+    read. The map's statistics are cached, see height_stats.py.
+
+    Returns:
+        tuple: (deformity, offset) in m
+    """
+    if not planet.height_map or planet.max_elevation <= planet.min_elevation:
+        return DEFAULT_DEFORMITY, DEFAULT_OFFSET
+    from height_stats import deformity_and_offset, height_stats
+    try:
+        stats = height_stats(planet.height_map)
+    except (OSError, ValueError):
+        return DEFAULT_DEFORMITY, DEFAULT_OFFSET
+    deformity, offset = deformity_and_offset(stats, planet.min_elevation, planet.max_elevation)
+    # No -0 in the config
+    return deformity + 0.0, offset + 0.0
+
+@traced("generate_config")
+def generate_config(planet, texture_names=None):
+    """
+    Build the Kopernicus config for the planet in memory.
+
+    Args:
+        planet (PlanetSpec): The planet to describe
+        texture_names (dict, optional): Maps "color", "height", "normal" and "biome"
+            to the base name of the exported texture. Missing entries fall back to
+            the base name of the selected source file.
+    """
+    texture_names = dict(texture_names or {})
+    for tex_type, path in (("color", planet.color_map), ("height", planet.height_map), ("normal", planet.normal_map),
+                           ("biome", planet.biome_map)):
+        texture_names.setdefault(tex_type, texture_base_name(path))
+    # The biome map is exported as PNG, see PNG_TEXTURES in planet_model.py
+    biome_map = f"\n                biomeMap = {texture_names['biome']}.png" if planet.biome_map else ""
+
+    config = [f"""@Kopernicus:FOR[YourMod]
     {{
         Body
         {{
-            name = {self.planet_name.text()}
-            cacheFile = YourMod/{self.planet_name.text()}.bin
+            name = {planet.name}
+            cacheFile = YourMod/{planet.name}.bin
             Template
             {{
                 name = Laythe
             }}
             Properties
             {{
-                radius = {self.radius.value() * 1000}
-                geeASL = {self.gravity.value()}
-                timewarpAltitudeLimits = {' '.join(str(alt) for alt, _ in self.time_warp_levels)}
+                radius = {planet.radius * 1000}
+                geeASL = {planet.gravity}
+                timewarpAltitudeLimits = {' '.join(str(alt) for alt, _ in planet.time_warp_levels)}{biome_map}
             }}
             Orbit
             {{
-                referenceBody = {self.parent_body.text()}
-                semiMajorAxis = {self.semi_major_axis.value() * 1000}
-                eccentricity = {self.eccentricity.value()}
-                inclination = {self.inclination.value()}
-                longitudeOfAscendingNode = {math.degrees(math.atan2(self.orbit_widget.center_offset.y(), self.orbit_widget.center_offset.x()))}
-                argumentOfPeriapsis = {math.degrees(math.atan2(self.orbit_widget.center_offset.y(), self.orbit_widget.center_offset.x()))}
+                referenceBody = {planet.parent_body}
+                semiMajorAxis = {planet.semi_major_axis * 1000}
+                eccentricity = {planet.eccentricity}
+                inclination = {planet.inclination}
+                longitudeOfAscendingNode = {planet.longitude_of_ascending_node}
+                argumentOfPeriapsis = {planet.argument_of_periapsis}
             }}
-    """
-    if self.has_atmosphere.currentText() == "Yes":
-        ambient_color = get_color_from_button(self.atmo_ambient_color)
-        light_color = get_color_from_button(self.atmo_light_color)
+    """]
+    if planet.has_atmosphere:
+        ambient_color = [channel / 255 for channel in parse_hex_color(planet.ambient_color)]
+        light_color = [channel / 255 for channel in parse_hex_color(planet.light_color)]
+        pressure_curve, temperature_curve = atmosphere_curve_texts(planet)
 
-        config += f"""        Atmosphere
+        config.append(f"""        Atmosphere
         {{
             enabled = true
             oxygen = false
-            maxAltitude = {self.atmosphere_height.value()}
-            staticPressureASL = {self.static_pressure.value()}
-            temperatureSeaLevel = {self.atmosphere_temp.value()}
-            ambientColor = {ambient_color.redF():.6f},{ambient_color.greenF():.6f},{ambient_color.blueF():.6f},1
-            lightColor = {light_color.redF():.6f},{light_color.greenF():.6f},{light_color.blueF():.6f},0.2
+            maxAltitude = {planet.atmosphere_height}
+            staticPressureASL = {planet.static_pressure}
+            temperatureSeaLevel = {planet.atmosphere_temp}
+            ambientColor = {ambient_color[0]:.6f},{ambient_color[1]:.6f},{ambient_color[2]:.6f},1
+            lightColor = {light_color[0]:.6f},{light_color[1]:.6f},{light_color[2]:.6f},0.2
     
             pressureCurve
             {{
-{self.atmo_pressure_curve.toPlainText()}
+{pressure_curve}
             }}
     
             temperatureCurve
             {{
-{self.atmo_temp_curve.toPlainText()}
+{temperature_curve}
             }}
         }}
-"""
+""")
     else:
-        config += """        Atmosphere
+        config.append("""        Atmosphere
         {
             enabled = false
         }
-"""
+""")
 
-    config += """        Biomes
+    config.append("""        Biomes
         {
-"""
-    for biome_name, biome_color in self.biomes:
-        color = get_color_from_button(biome_color)
-        config += f"""            Biome
+""")
+    for biome in planet.biomes:
+        red, green, blue = parse_hex_color(biome.color)
+        config.append(f"""            Biome
             {{
-                name = {biome_name.text()}
+                name = {biome.name}
                 value = 1.0
-                color = #{color.red():02x}{color.green():02x}{color.blue():02x}
+                color = #{red:02x}{green:02x}{blue:02x}
             }}
-"""
-    config += """        }
+""")
+    deformity, offset = vertex_height_map_settings(planet)
+    config.append(f"""        }}
         ScaledVersion
-        {
+        {{
             type = Atmospheric
             fadeStart = 50000
             fadeEnd = 60000
             Material
-            {
-                texture = """ + os.path.splitext(os.path.basename(self.color_map.text()))[0] + """.dds
-                normals = """ + os.path.splitext(os.path.basename(self.normal_map.text()))[0] + """.dds
-            }
-        }
+            {{
+                texture = {texture_names["color"]}.dds
+                normals = {texture_names["normal"]}.dds
+            }}
+        }}
         PQS
-        {
+        {{
             Mods
-            {
+            {{
                 VertexHeightMap
-                {
-                    map = """ + os.path.splitext(os.path.basename(self.height_map.text()))[0] + """.dds
-                    offset = 0
-                    deformity = 6500
+                {{
+                    map = {texture_names["height"]}.dds
+                    offset = {offset:.7g}
+                    deformity = {deformity:.7g}
                     scaleDeformityByRadius = false
                     order = 20
                     enabled = true
-                }
+                }}
                 VertexColorMap
-                {
-                    map = """ + os.path.splitext(os.path.basename(self.color_map.text()))[0] + """.dds
+                {{
+                    map = {texture_names["color"]}.dds
                     order = 21
                     enabled = true
-                }
-            }
-        }
-    }
-}
-"""
-    if self.enable_rescale.isChecked():
-        rescale_factor = self.rescale_factor.value()
-        config += f"""
+                }}
+            }}
+        }}
+    }}
+}}
+""")
+    if planet.enable_rescale:
+        rescale_factor = planet.rescale_factor
+        config.append(f"""
     @Kopernicus:AFTER[YourMod]
     {{
-        @Body[{self.planet_name.text()}]
+        @Body[{planet.name}]
         {{
             @Properties
             {{
@@ -133,5 +202,5 @@ def generate_config(self):
             }}
         }}
     }}
-"""
-    return config
+""")
+    return "".join(config)
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import numpy as np
+from PIL import Image
+
+from dds_encoder import iter_image_strips, unlimited_image_pixels
+from thumbnail_cache import default_cache_dir
+from tracing import span
+from utility_functions import write_text_atomic
+
+# Bins of the value histogram over the 0-1 height range, one per 8-bit level
+HISTOGRAM_BINS = 256
+# Working memory for one strip of the statistics pass
+DEFAULT_STATS_BUDGET = 64 * 1024 * 1024
+# Bytes per pixel of a strip while it is measured, the decoded strip plus a float copy
+_STATS_BYTES_PER_PIXEL = 16
+# Bump when the statistics change, cached entries of other versions are recomputed
+STATS_VERSION = 1
+STATS_CACHE_NAME = "height_stats.json"
+
+# Modes holding 16 bits per sample, normalised by 65535
+_WIDE_MODES = {"I", "I;16", "I;16L", "I;16B", "I;16N"}
+
+def height_values(strip):
+    """
+    The heights of one strip of a height map as Kopernicus reads them.
+
+    Args:
+        strip (PIL.Image.Image): Rows of the height map
+
+    Returns:
+        np.ndarray: uint8 levels for 8-bit maps, float32 in 0-1 otherwise
+    """
+    if strip.mode in _WIDE_MODES:
+        return np.asarray(strip).astype(np.float32) / 65535
+    if strip.mode == "F":
+        return np.clip(np.asarray(strip, dtype=np.float32), 0, 1)
+    # Colour maps are read from their first channel, grayscale ones often come as RGB
+    if strip.mode in ("LA", "RGB", "RGBA"):
+        strip = strip.getchannel(0)
+    elif strip.mode != "L":
+        strip = strip.convert("L")
+    return np.asarray(strip)
+
+def compute_height_stats(path, memory_budget=DEFAULT_STATS_BUDGET):
+    """
+    Measure a height map in one pass over horizontal strips.
+
+    Uncompressed formats and PNG are read strip by strip, other compressed
+    ones are decoded once and measured a strip at a time, see
+    iter_image_strips().
+
+    Args:
+        path (str): Height map file
+        memory_budget (int): Approximate bytes to spend on one strip
+
+    Returns:
+        dict: width, height, min, max and mean of the heights in 0-1, and a
+              histogram of HISTOGRAM_BINS pixel counts over 0-1
+    """
+    with unlimited_image_pixels(), Image.open(path) as image:
+        width = image.width
+    strip_rows = max(1, memory_budget // (width * _STATS_BYTES_PER_PIXEL))
+
+    histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    low, high, total = 1.0, 0.0, 0.0
+    height = 0
+    for strip in iter_image_strips(path, strip_rows):
+        values = height_values(strip)
+        height += values.shape[0]
+        # 8-bit levels are their own histogram bins
+        if values.dtype == np.uint8:
+            scale = 255
+            histogram += np.bincount(values.ravel(), minlength=HISTOGRAM_BINS)
+        else:
+            scale = 1
+            bins = np.minimum((values * HISTOGRAM_BINS).astype(np.int32), HISTOGRAM_BINS - 1)
+            histogram += np.bincount(bins.ravel(), minlength=HISTOGRAM_BINS)
+        low = min(low, float(values.min()) / scale)
+        high = max(high, float(values.max()) / scale)
+        total += float(values.sum(dtype=np.float64)) / scale
+
+    return {
+        'width': width,
+        'height': height,
+        'min': low,
+        'max': high,
+        'mean': total / (width * height),
+        'histogram': histogram.tolist(),
+    }
+
+class HeightStatsCache:
+    """
+    Statistics of every height map measured so far, kept on disk.
+
+    Entries are keyed by the absolute path and remembered with the file's
+    size and mtime, like the hashes of a TextureStore, so a height map is
+    only measured again after it changes.
+    """
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): Cache file, defaults to one in the user cache
+        """
+        self.path = path or os.path.join(os.path.dirname(default_cache_dir()), STATS_CACHE_NAME)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(document, dict) or document.get('version') != STATS_VERSION:
+            return {}
+        return document.get('entries', {})
+
+    def get(self, path):
+        """
+        Returns:
+            dict: The cached statistics of path, or None if it changed or was never measured
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._read()
+            entry = self._entries.get(path)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        return None
+
+    def put(self, path, stats, stat):
+        """
+        Remember and save the statistics of a file.
+
+        Args:
+            path (str): Height map file
+            stats (dict): compute_height_stats() result
+            stat (os.stat_result): The file's stat from before it was measured
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            # Builds in other processes may have added entries since this one read the file
+            self._entries = self._read()
+            self._entries[path] = [stat.st_size, stat.st_mtime_ns, stats]
+            text = json.dumps({'version': STATS_VERSION, 'entries': self._entries})
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_text_atomic(self.path, text)
+        except OSError:
+            # Only costs a second measurement
+            pass
+
+_default_cache = None
+
+def get_default_cache():
+    """Shared cache of the height map statistics"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HeightStatsCache()
+    return _default_cache
+
+def height_stats(path, cache=None):
+    """
+    Statistics of a height map, measured at most once per version of the file.
+
+    Args:
+        path (str): Height map file
+        cache (HeightStatsCache, optional): Defaults to the shared cache
+
+    Returns:
+        dict: See compute_height_stats()
+    """
+    cache = cache or get_default_cache()
+    stats = cache.get(path)
+    if stats is None:
+        stat = os.stat(path)
+        with span("height stats", source=os.path.basename(path)):
+            stats = compute_height_stats(path)
+        cache.put(path, stats, stat)
+    return stats
+
+def deformity_and_offset(stats, min_elevation, max_elevation):
+    """
+    VertexHeightMap settings that put a height map's lowest pixel at
+    min_elevation and its highest at max_elevation.
+
+    Kopernicus raises each vertex by offset + deformity * height, with the
+    height read from the map in 0-1.
+
+    Args:
+        stats (dict): compute_height_stats() result
+        min_elevation (float): Real elevation of the lowest pixel in m
+        max_elevation (float): Real elevation of the highest pixel in m
+
+    Returns:
+        tuple: (deformity, offset) in m
+    """
+    spread = stats['max'] - stats['min']
+    deformity = (max_elevation - min_elevation) / spread if spread > 0 else 0.0
+    return deformity, min_elevation - stats['min'] * deformity
+
+def fraction_below(stats, value):
+    """
+    Share of the pixels below a height, read from the histogram.
+
+    Args:
+        stats (dict): compute_height_stats() result
+        value (float): Height in 0-1
+
+    Returns:
+        float: 0-1, to the resolution of a histogram bin
+    """
+    histogram = stats['histogram']
+    count = sum(histogram)
+    if not count:
+        return 0.0
+    below = sum(histogram[:max(0, min(HISTOGRAM_BINS, round(value * HISTOGRAM_BINS)))])
+    return below / count
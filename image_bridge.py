@@ -0,0 +1,67 @@
+from PyQt6.QtGui import QImage
+import numpy as np
+
+# QImage formats for uint8 arrays by channel count
+QIMAGE_FORMATS = {
+    1: QImage.Format.Format_Grayscale8,
+    3: QImage.Format.Format_RGB888,
+    4: QImage.Format.Format_RGBA8888,
+}
+
+# Pillow modes that map directly onto one of the formats above
+BRIDGE_MODES = {"L", "RGB", "RGBA"}
+
+class ImageBuffer:
+    """
+    A QImage that views a NumPy array's pixels without copying them.
+
+    The QImage only borrows the memory, so hold on to the ImageBuffer rather
+    than the bare QImage for as long as the image is in use. Passing the
+    ImageBuffer through signals keeps the array alive on the receiving side.
+    """
+    __slots__ = ("array", "qimage")
+
+    def __init__(self, array):
+        """
+        Wrap an image array.
+
+        Args:
+            array (np.ndarray): uint8 array of shape (height, width) or
+                                (height, width, 3 or 4); copied only if it is
+                                not already C-contiguous
+        """
+        if array.dtype != np.uint8:
+            raise TypeError(f"Expected a uint8 array, got {array.dtype}")
+        array = np.ascontiguousarray(array)
+        channels = 1 if array.ndim == 2 else array.shape[2]
+        if channels not in QIMAGE_FORMATS:
+            raise ValueError(f"Unsupported channel count: {channels}")
+
+        height, width = array.shape[:2]
+        self.array = array
+        self.qimage = QImage(array.data, width, height, array.strides[0], QIMAGE_FORMATS[channels])
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+def pil_to_array(img):
+    """
+    Get the pixels of a Pillow image as a uint8 array in a bridgeable layout.
+
+    Pillow keeps pixels in per-row storage, so this makes the one unavoidable
+    copy. The result is read-only.
+
+    Args:
+        img (PIL.Image): Source image
+
+    Returns:
+        np.ndarray: (height, width) for "L", (height, width, channels) otherwise
+    """
+    if img.mode not in BRIDGE_MODES:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return np.asarray(img)
+
+def pil_to_buffer(img):
+    """Wrap a Pillow image as an ImageBuffer with a single copy"""
+    return ImageBuffer(pil_to_array(img))
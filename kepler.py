@@ -0,0 +1,93 @@
+import math
+import numpy as np
+
+# Kerbin calendar used by KSP's time display
+KERBIN_DAY = 6 * 3600
+KERBIN_YEAR = 426 * KERBIN_DAY
+
+def solve_kepler(mean_anomaly, eccentricity, tolerance=1e-12, max_iterations=30):
+    """
+    Solve Kepler's equation M = E - e sin E for a whole array of mean anomalies.
+
+    Newton iterations run on the full array at once, starting from Danby's
+    guess E = M + 0.85 e sign(sin M), which converges for every e below 1.
+
+    Args:
+        mean_anomaly (array-like): Mean anomalies in radians
+        eccentricity (float): Orbital eccentricity, 0 <= e < 1
+        tolerance (float): Largest allowed Newton step in radians
+        max_iterations (int): Upper bound on Newton iterations
+
+    Returns:
+        np.ndarray: Eccentric anomalies in radians, float64
+    """
+    if not 0 <= eccentricity < 1:
+        raise ValueError(f"Only elliptical orbits are supported, got e = {eccentricity}")
+    mean_anomaly = np.remainder(np.asarray(mean_anomaly, dtype=np.float64), 2 * math.pi)
+    anomaly = mean_anomaly + 0.85 * eccentricity * np.sign(np.sin(mean_anomaly))
+    if eccentricity == 0:
+        return anomaly
+
+    # Work in place, large sample arrays would otherwise allocate several
+    # temporaries per iteration
+    step = np.empty_like(anomaly)
+    scratch = np.empty_like(anomaly)
+    for _ in range(max_iterations):
+        # step = (E - e sin E - M) / (1 - e cos E)
+        np.sin(anomaly, out=step)
+        step *= -eccentricity
+        step += anomaly
+        step -= mean_anomaly
+        np.cos(anomaly, out=scratch)
+        scratch *= -eccentricity
+        scratch += 1
+        step /= scratch
+        anomaly -= step
+        if np.abs(step, out=scratch).max() < tolerance:
+            break
+    return anomaly
+
+def focal_positions(eccentricity, count):
+    """
+    Positions at equal time steps over one orbit, starting at periapsis.
+
+    Args:
+        eccentricity (float): Orbital eccentricity, 0 <= e < 1
+        count (int): Number of samples
+
+    Returns:
+        tuple: (x, y) arrays for a semi-major axis of 1, with the parent body
+               at the origin and periapsis on the +x axis
+    """
+    mean_anomaly = np.linspace(0, 2 * math.pi, count, endpoint=False)
+    anomaly = solve_kepler(mean_anomaly, eccentricity)
+    x = np.cos(anomaly)
+    x -= eccentricity
+    y = np.sin(anomaly)
+    y *= math.sqrt(1 - eccentricity**2)
+    return x, y
+
+def orbital_period(semi_major_axis, gravitational_parameter):
+    """
+    Args:
+        semi_major_axis (float): Semi-major axis in m
+        gravitational_parameter (float): GM of the parent body in m³/s²
+
+    Returns:
+        float: Period in seconds
+    """
+    return 2 * math.pi * math.sqrt(semi_major_axis**3 / gravitational_parameter)
+
+def format_duration(seconds):
+    """Format a duration with Kerbin years and days, e.g. "2y 103d 4h 12m" """
+    if not math.isfinite(seconds):
+        return "-"
+    seconds = int(round(seconds))
+    parts = []
+    for unit, size in (("y", KERBIN_YEAR), ("d", KERBIN_DAY), ("h", 3600), ("m", 60)):
+        if seconds >= size or parts:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    parts.append(f"{seconds}s")
+    # The three largest units are plenty for a readout
+    return " ".join(parts[:3])
@@ -2,9 +2,14 @@ import sys
 from PyQt6.QtWidgets import QApplication
 from planet_creator import PlanetCreator
 import os
+import tracing
 
 if __name__ == "__main__":
+    # KPK_TRACE=trace.json records a Chrome trace of the session, written on exit
+    tracing.start_from_environment()
     app = QApplication(sys.argv)
     window = PlanetCreator()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    status = app.exec()
+    tracing.finish()
+    sys.exit(status)
\ No newline at end of file
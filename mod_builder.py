@@ -0,0 +1,187 @@
+import os
+import time
+from contextlib import contextmanager
+from build_manifest import TextureManifest, conversion_options, file_record
+from genconfig import generate_config, vertex_height_map_settings
+from planet_model import TEXTURE_SUFFIXES, texture_extension
+from tracing import span
+from utility_functions import convert_to_dds, convert_to_png, write_text_atomic
+
+def create_mod_folder_structure(config_name, save_path):
+    mod_name = f"{config_name}Pack"
+    mod_folder = os.path.join(save_path, mod_name)
+
+    folders = {
+        'config': os.path.join(mod_folder, 'GameData', mod_name, 'Config'),
+        'textures': os.path.join(mod_folder, 'GameData', mod_name, 'Textures'),
+        'cache': os.path.join(mod_folder, 'GameData', mod_name, 'Cache')
+    }
+
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
+
+    return mod_folder, folders
+
+def texture_jobs(planet, textures_folder):
+    """
+    Work out where each of the planet's textures is exported to.
+
+    Args:
+        planet (PlanetSpec): The planet being built
+        textures_folder (str): The mod's Textures folder
+
+    Returns:
+        dict: Maps texture type to a (source path, destination path) tuple, the
+              destination is a .dds file or a .png one for a biome map
+    """
+    jobs = {}
+    for tex_type, texture_path in planet.texture_paths().items():
+        # Generate standardized texture name
+        base_name = f"{planet.name}_{TEXTURE_SUFFIXES[tex_type]}"
+        jobs[tex_type] = (texture_path, os.path.join(textures_folder, base_name + texture_extension(tex_type)))
+    return jobs
+
+def texture_options(planet, jobs):
+    """
+    Everything besides the source that shapes each exported texture, for the
+    build manifest and export_texture().
+
+    A generated normal map also depends on the terrain relief and the planet
+    radius, so changing those regenerates it and nothing else. A biome map is
+    exported as it is, in PNG.
+
+    Returns:
+        dict: Maps texture type to its conversion_options()
+    """
+    options = {tex_type: conversion_options(mipmaps=planet.generate_mipmaps) for tex_type in jobs}
+    if 'biome' in options:
+        options['biome'] = {'format': 'PNG'}
+    if planet.generate_normal_map and 'normal' in options:
+        from normal_map import NORMAL_MAP_VERSION
+        deformity, _ = vertex_height_map_settings(planet)
+        options['normal']['generated'] = {'deformity': deformity, 'radius': planet.radius * 1000,
+                                          'strength': planet.normal_strength}
+        options['normal']['generator'] = NORMAL_MAP_VERSION
+    return options
+
+def export_texture(source, destination, options):
+    """
+    Export one texture job, in the calling process.
+
+    The texture is written next to the destination and swapped in once it is
+    complete, so a failed or interrupted export never leaves a partial file
+    under the destination name.
+
+    Args:
+        source (str): Source texture, the height map for a generated normal map
+        destination (str): Exported .dds or .png path
+        options (dict): The job's entry from texture_options()
+    """
+    temp_path = destination + '.tmp'
+    try:
+        if options['format'] == 'PNG':
+            convert_to_png(source, temp_path)
+        elif options.get('generated') is None:
+            convert_to_dds(source, temp_path, options['format'], options['mipmaps'], options['mip_filter'])
+        else:
+            from normal_map import write_normal_map_dds
+            write_normal_map_dds(source, temp_path, fmt=options['format'], mipmaps=options['mipmaps'],
+                                 **options['generated'])
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def export_texture_record(source, destination, options):
+    """
+    export_texture(), then the build manifest's file_record() of the result,
+    so a worker process does the hashing too.
+
+    Returns:
+        dict: See file_record()
+    """
+    export_texture(source, destination, options)
+    return file_record(source, destination)
+
+def exported_texture_names(jobs, results):
+    """
+    Base names of the exported textures for generate_config: every job that
+    converted successfully or was skipped as up to date.
+    """
+    return {tex_type: os.path.splitext(os.path.basename(destination))[0]
+            for tex_type, (_, destination) in jobs.items() if results.get(tex_type) is None}
+
+def readme_content(planet):
+    return f"""# {planet.name}Pack
+    Created with KSP Planet Creator
+
+    ## Installation
+    1. Copy the GameData folder to your Kerbal Space Program installation
+    2. Ensure Kopernicus is installed
+
+    ## Planet Details
+    - Name: {planet.name}
+    - Parent Body: {planet.parent_body}
+    - Radius: {planet.radius} km
+    - Surface Gravity: {planet.gravity}g
+    """
+
+@contextmanager
+def timed_stage(timings, name):
+    """Time a build stage into timings[name] and record it as a trace span"""
+    started = time.perf_counter()
+    with span(name):
+        yield
+    timings[name] = time.perf_counter() - started
+
+def build_mod(planet, save_path):
+    """
+    Build a complete mod folder for one planet without any GUI.
+
+    Textures are converted one after another in the calling process, so run
+    one planet per worker to use several cores. Textures recorded as up to date
+    in the mod's build manifest are not converted again.
+
+    Args:
+        planet (PlanetSpec): The planet to build
+        save_path (str): Directory the <name>Pack folder is created in
+
+    Returns:
+        tuple: (mod folder, dict of stage name to seconds, dict of texture type
+               to error message for failed conversions)
+    """
+    timings = {}
+    with timed_stage(timings, 'folders'):
+        mod_folder, folders = create_mod_folder_structure(planet.name, save_path)
+
+    # Textures whose sources and options are unchanged since the last build are kept
+    with timed_stage(timings, 'manifest check'):
+        jobs = texture_jobs(planet, folders['textures'])
+        manifest = TextureManifest(folders['cache'])
+        options = texture_options(planet, jobs)
+        pending = manifest.pending_jobs(jobs, options)
+
+    results = {}
+    for tex_type, (source, destination) in pending.items():
+        with timed_stage(timings, f'{tex_type} texture'):
+            try:
+                export_texture(source, destination, options[tex_type])
+                results[tex_type] = None
+            except Exception as e:
+                results[tex_type] = e
+
+    with timed_stage(timings, 'manifest update'):
+        manifest.update(jobs, results, options)
+        manifest.save()
+
+    with timed_stage(timings, 'config'):
+        config_file = os.path.join(folders['config'], f"{planet.name}.cfg")
+        write_text_atomic(config_file, generate_config(planet, exported_texture_names(jobs, results)))
+
+    with timed_stage(timings, 'readme'):
+        with open(os.path.join(mod_folder, 'README.md'), 'w') as f:
+            f.write(readme_content(planet))
+
+    errors = {tex_type: str(error) for tex_type, error in results.items() if error is not None}
+    return mod_folder, timings, errors
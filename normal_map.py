@@ -0,0 +1,181 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+from dds_encoder import iter_image_strips, unlimited_image_pixels, write_dds_rows
+from height_stats import height_values
+from tracing import span
+
+# Bump when generated normals change, so builds generate them again
+NORMAL_MAP_VERSION = 1
+# East-west slopes are stretched by 1 / cos(latitude) to undo the equirectangular
+# squeeze. Past about 83 degrees the stretch is capped, the pole rows are mostly
+# resampling noise that would otherwise turn into spikes.
+MAX_LATITUDE_SCALE = 8.0
+# Working memory for one band of rows, several bands run at once
+DEFAULT_BAND_BUDGET = 32 * 1024 * 1024
+# Bytes per pixel of a band while its normals are computed, float32 temporaries included
+_BAND_BYTES_PER_PIXEL = 64
+
+def slope_scales(width, height, deformity, radius, strength=1.0):
+    """
+    Factors that turn height differences between neighbouring pixels into slopes.
+
+    Args:
+        width (int): Map width in pixels
+        height (int): Map height in pixels
+        deformity (float): Terrain height in m of a map value of 1, see
+                           vertex_height_map_settings() in genconfig.py
+        radius (float): Planet radius in m
+        strength (float): Exaggeration of the slopes, 1 for the real terrain
+
+    Returns:
+        tuple: (east-west factor at the equator, north-south factor)
+    """
+    scale_x = deformity * width / (2 * math.pi * radius)
+    scale_y = deformity * height / (math.pi * radius)
+    return scale_x * strength, scale_y * strength
+
+def latitude_scales(first_row, rows, height):
+    """1 / cos(latitude) of rows of an equirectangular map, capped at MAX_LATITUDE_SCALE"""
+    latitude = (np.arange(first_row, first_row + rows, dtype=np.float32) + 0.5) * np.float32(np.pi / height)
+    return np.minimum(1 / np.maximum(np.sin(latitude), 1e-6), MAX_LATITUDE_SCALE)
+
+def normal_band(heights, first_row, map_height, scale_x, scale_y):
+    """
+    Tangent-space normals of a band of rows from their Sobel gradients.
+
+    Args:
+        heights (np.ndarray): float32 heights in 0-1 of the band plus one
+                              row above and one below it
+        first_row (int): Row of the map that heights[1] is
+        map_height (int): Rows in the whole map, for the latitude
+        scale_x (float): East-west factor from slope_scales()
+        scale_y (float): North-south factor from slope_scales()
+
+    Returns:
+        np.ndarray: uint8 RGBA, x east, y north and z up mapped from -1-1 to 0-255
+    """
+    # Columns wrap around the longitude seam
+    left = np.roll(heights, 1, axis=1)
+    right = np.roll(heights, -1, axis=1)
+    across = right - left
+    east = across[:-2] + 2 * across[1:-1] + across[2:]
+    del across
+    left += right
+    left += 2 * heights
+    del right
+    south = left[2:] - left[:-2]
+    del left
+
+    # The Sobel kernels weigh 8 pixel steps
+    east *= np.float32(scale_x / 8) * latitude_scales(first_row, len(east), map_height)[:, None]
+    south *= np.float32(scale_y / 8)
+    # The surface normal is (-dh/deast, -dh/dnorth, 1) and rows run south
+    inverse = east * east
+    inverse += south * south
+    inverse += 1
+    np.sqrt(inverse, out=inverse)
+    np.reciprocal(inverse, out=inverse)
+
+    normals = np.empty(east.shape + (4,), dtype=np.uint8)
+    for channel, component in enumerate((-east, south)):
+        component *= inverse
+        normals[..., channel] = component * 127.5 + 128
+    normals[..., 2] = inverse * 127.5 + 128
+    normals[..., 3] = 255
+    return normals
+
+def pole_row(row):
+    """The row beyond a pole: the same latitude on the other side of the planet"""
+    return np.roll(row, len(row) // 2)
+
+def normal_map_pixels(heights, deformity, radius, strength=1.0):
+    """
+    Normals of a whole height map held in memory, such as a preview thumbnail.
+
+    Args:
+        heights (np.ndarray): float32 heights in 0-1, (height, width)
+        deformity (float): Terrain height in m of a map value of 1
+        radius (float): Planet radius in m
+        strength (float): Exaggeration of the slopes
+
+    Returns:
+        np.ndarray: uint8 RGBA normals, see normal_band()
+    """
+    height, width = heights.shape
+    padded = np.vstack([pole_row(heights[0])[None], heights, pole_row(heights[-1])[None]])
+    return normal_band(padded, 0, height, *slope_scales(width, height, deformity, radius, strength))
+
+def iter_normal_bands(height_path, deformity, radius, strength=1.0, workers=None,
+                      memory_budget=DEFAULT_BAND_BUDGET):
+    """
+    Generate the normals of a height map file band by band, top to bottom.
+
+    The map is read in strips and every band is computed on a thread pool, so
+    large maps use every core while only a few bands are held at a time.
+
+    Args:
+        height_path (str): Equirectangular height map
+        deformity (float): Terrain height in m of a map value of 1
+        radius (float): Planet radius in m
+        strength (float): Exaggeration of the slopes
+        workers (int, optional): Threads, defaults to the CPU count
+        memory_budget (int): Approximate bytes to spend on one band
+
+    Yields:
+        np.ndarray: uint8 RGBA normals of the next band, see normal_band()
+    """
+    with unlimited_image_pixels(), Image.open(height_path) as image:
+        width, height = image.size
+    scale_x, scale_y = slope_scales(width, height, deformity, radius, strength)
+    band_rows = max(4, memory_budget // (width * _BAND_BYTES_PER_PIXEL))
+    workers = workers or os.cpu_count() or 1
+
+    def strips():
+        for strip in iter_image_strips(height_path, band_rows):
+            values = height_values(strip)
+            yield values.astype(np.float32) / 255 if values.dtype == np.uint8 else values
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = deque()
+        source = strips()
+        band = next(source)
+        above = pole_row(band[0])
+        first_row = 0
+        while band is not None:
+            following = next(source, None)
+            below = pole_row(band[-1]) if following is None else following[0]
+            padded = np.vstack([above[None], band, below[None]])
+            running.append(pool.submit(normal_band, padded, first_row, height, scale_x, scale_y))
+            first_row += len(band)
+            above = band[-1]
+            band = following
+            # A band is handed on as soon as it is done, in order, with the pool kept busy
+            while len(running) > workers:
+                yield running.popleft().result()
+        while running:
+            yield running.popleft().result()
+
+def write_normal_map_dds(height_path, output_path, deformity, radius, strength=1.0, fmt="DXT5",
+                         mipmaps=False):
+    """
+    Generate a normal map from a height map straight into a DDS file.
+
+    Args:
+        height_path (str): Equirectangular height map
+        output_path (str): Destination .dds path
+        deformity (float): Terrain height in m of a map value of 1
+        radius (float): Planet radius in m
+        strength (float): Exaggeration of the slopes
+        fmt (str): "DXT1" or "DXT5"
+        mipmaps (bool): Store a full mip chain after the top level
+    """
+    with span("generate normal map", source=os.path.basename(height_path)):
+        with unlimited_image_pixels(), Image.open(height_path) as image:
+            width, height = image.size
+        write_dds_rows(iter_normal_bands(height_path, deformity, radius, strength), width, height,
+                       output_path, fmt, mipmaps)
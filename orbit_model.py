@@ -0,0 +1,82 @@
+from PyQt6.QtCore import QObject, QPointF, QTimer, pyqtSignal
+from planet_model import STOCK_GRAVITATIONAL_PARAMETERS
+
+class OrbitModel(QObject):
+    """
+    The orbit shared by the orbit views and the orbit spin boxes.
+
+    Views and fields write through update() and never talk to each other.
+    Changes made during one pass of the event loop are collected and announced
+    by a single changed signal at the end of it. A drag tick that touches
+    several fields therefore costs each view one repaint.
+    """
+    FIELDS = ("semi_major_axis", "eccentricity", "inclination", "parent_body_name",
+              "planet_name", "center_offset", "gravitational_parameter")
+
+    # Ranges of the orbit spin boxes. update() keeps the orbit inside them, so the
+    # views never show an orbit other than the one the fields and the config hold.
+    SEMI_MAJOR_AXIS_RANGE = (1, 100000000)
+    ECCENTRICITY_RANGE = (0, 0.99)
+
+    # Set of the field names that changed since the last notification
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.semi_major_axis = 100
+        self.eccentricity = 0
+        self.inclination = 0
+        self.parent_body_name = "Parent"
+        self.planet_name = "Planet"
+        # GM of the parent body in m³/s², Kerbol's until one is entered
+        self.gravitational_parameter = STOCK_GRAVITATIONAL_PARAMETERS["Kerbol"]
+        # Pan of the top-down view in pixels
+        self.center_offset = QPointF(0, 0)
+
+        self._pending = set()
+        self.notifications = 0
+        self._notify_timer = QTimer(self)
+        self._notify_timer.setSingleShot(True)
+        self._notify_timer.setInterval(0)
+        self._notify_timer.timeout.connect(self.flush)
+
+    def update(self, **values):
+        """
+        Change one or more fields. Values equal to the current ones are ignored.
+
+        Args:
+            **values: New values keyed by field name, see constrained()
+        """
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise AttributeError(f"OrbitModel has no field {name!r}")
+            value = self.constrained(name, value)
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self._pending.add(name)
+        if self._pending and not self._notify_timer.isActive():
+            self._notify_timer.start()
+
+    @classmethod
+    def constrained(cls, name, value):
+        """
+        A field value as the model stores it: the semi-major axis and the
+        eccentricity clamped into their ranges, the inclination wrapped into 0-360.
+        """
+        if name == "semi_major_axis":
+            return min(max(value, cls.SEMI_MAJOR_AXIS_RANGE[0]), cls.SEMI_MAJOR_AXIS_RANGE[1])
+        if name == "eccentricity":
+            return min(max(value, cls.ECCENTRICITY_RANGE[0]), cls.ECCENTRICITY_RANGE[1])
+        if name == "inclination":
+            # The side view's drag handle gives -90 to 90 degrees
+            return value % 360
+        return value
+
+    def flush(self):
+        """Emit the pending changes now rather than when the event loop gets to them"""
+        self._notify_timer.stop()
+        if not self._pending:
+            return
+        fields, self._pending = self._pending, set()
+        self.notifications += 1
+        self.changed.emit(fields)
@@ -1,47 +1,155 @@
-from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QPen
-from PyQt6.QtCore import Qt, QPointF, QRectF, QSizeF, QTimer
+from PyQt6.QtWidgets import QLabel, QWidget
+from PyQt6.QtGui import QFontMetricsF, QPainter, QPen, QPixmap, QPolygonF, QTransform
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRectF, QSizeF, QTimer
 import math
 
+# Room around the scene's geometry for the widest pen plus antialiasing
+PEN_MARGIN = 8
+
+# Planet positions drawn per orbit, at equal time steps from periapsis
+TIME_TICKS = 36
+
+# Apsis labels go below the marker, clear of the planet's label above it
+APSIS_LABEL_OFFSET = QPointF(5, 15)
+
+def array_polygon(x, y):
+    """Build a QPolygonF from coordinate arrays by writing straight into its point storage"""
+    import numpy as np
+    polygon = QPolygonF()
+    if len(x) == 0:
+        return polygon
+    polygon.resize(len(x))
+    storage = polygon.data()
+    storage.setsize(len(x) * 2 * 8)
+    points = np.frombuffer(storage, dtype=np.float64).reshape(-1, 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
+
+def draw_time_ticks(painter, x, y):
+    painter.setPen(QPen(Qt.GlobalColor.darkGray, 4))
+    painter.drawPoints(array_polygon(x, y))
+
+def draw_apsides(painter, periapsis, apoapsis):
+    painter.setPen(QPen(Qt.GlobalColor.darkCyan, 6))
+    for point, label in ((periapsis, "Pe"), (apoapsis, "Ap")):
+        painter.drawPoint(point)
+        painter.drawText(point + APSIS_LABEL_OFFSET, label)
+
+def readout_text(model):
+    """Orbital period and apsis distances from the parent's center"""
+    from kepler import format_duration, orbital_period
+    period = orbital_period(model.semi_major_axis * 1000, model.gravitational_parameter)
+    return (f"Period: {format_duration(period)}\n"
+            f"Pe: {model.semi_major_axis * (1 - model.eccentricity):,.0f} km   "
+            f"Ap: {model.semi_major_axis * (1 + model.eccentricity):,.0f} km")
+
+class OrbitReadout(QLabel):
+    """
+    Period readout in the top-left corner of an orbit view.
+
+    It is a child widget so text changes repaint only the label and do not
+    widen the view's own dirty rectangle.
+    """
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        # Opaque, so a text change does not repaint the view underneath
+        self.setAutoFillBackground(True)
+        self.move(8, 6)
+
+    def refresh(self):
+        if self.view.isVisible():
+            self.setText(readout_text(self.view.model))
+            self.adjustSize()
+
 class OrbitWidget(QWidget):
-    def __init__(self, update_callback, parent=None):
+    def __init__(self, model, parent=None):
         super().__init__(parent)
         self.setMinimumSize(300, 300)
-        self.semi_major_axis = 100
-        self.eccentricity = 0
-        self.inclination = 0
+        self.model = model
+        self.model.changed.connect(self.on_model_changed)
         self.drag_point = None
-        self.update_callback = update_callback
-        self.parent_body_name = "Parent"
-        self.planet_name = "Planet"
-        self.center_offset = QPointF(0, 0)
         self.is_moving_orbit = False
-        self.target_semi_major_axis = self.semi_major_axis
-        self.target_eccentricity = self.eccentricity
+        self.target_semi_major_axis = self.model.semi_major_axis
+        self.target_eccentricity = self.model.eccentricity
+
+        # Pre-rendered orbit scene, rebuilt only when its appearance changes
+        self._layer = None
+        self._layer_key = None
+        self._layer_bounds = None
+        self._painted_key = None
+        self._painted_rect = None
+        self._last_paint_changed = False
+        self.layer_renders = 0
+        self.paint_count = 0
+        self.readout = OrbitReadout(self)
 
         self.update_timer = QTimer()
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self.smooth_update)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        center_x = self.width() // 2 + self.center_offset.x()
-        center_y = self.height() // 2 + self.center_offset.y()
-        scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
-
-        a = self.semi_major_axis * scale
-        b = a * math.sqrt(1 - self.eccentricity**2)
-        c = self.eccentricity * a
-
-        painter.save()
-        painter.translate(center_x, center_y)
-        painter.rotate(-self.inclination)
+    def scene_geometry(self):
+        """Orbit center in widget coordinates and the ellipse's a, b and c in pixels"""
+        center_x = self.width() // 2 + self.model.center_offset.x()
+        center_y = self.height() // 2 + self.model.center_offset.y()
+        scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
+
+        a = self.model.semi_major_axis * scale
+        b = a * math.sqrt(1 - self.model.eccentricity**2)
+        c = self.model.eccentricity * a
+        return center_x, center_y, a, b, c
+
+    def scene_placement(self):
+        """
+        Where the cached scene goes without rendering it.
+
+        The layer is drawn at a whole-pixel origin with the fractional part of
+        the center baked in, so panning by whole pixels reuses it unchanged.
+
+        Returns:
+            tuple: (layer key, layer bounds relative to the origin, origin QPoint)
+        """
+        center_x, center_y, a, b, c = self.scene_geometry()
+        origin = QPoint(math.floor(center_x), math.floor(center_y))
+        fraction = (center_x - origin.x(), center_y - origin.y())
+        key = (a, b, c, self.model.inclination, self.model.parent_body_name, self.model.planet_name,
+               fraction, self.devicePixelRatioF())
+        if key != self._layer_key:
+            bounds = self.scene_bounds(a, b, c).translated(*fraction).toAlignedRect()
+        else:
+            bounds = self._layer_bounds
+        return key, bounds, origin
+
+    def scene_bounds(self, a, b, c):
+        """Rectangle around everything draw_scene paints, relative to the orbit center"""
+        metrics = QFontMetricsF(self.font())
+        planet_x = (a - c) * math.cos(math.radians(self.model.inclination))
+        planet_y = (a - c) * math.sin(math.radians(self.model.inclination))
+        rect = QRectF(-a - c, -b, 2 * a, 2 * b)
+        rect = rect.united(metrics.boundingRect(self.model.parent_body_name).translated(5, -5))
+        rect = rect.united(metrics.boundingRect(self.model.planet_name).translated(planet_x + 5, planet_y - 5))
+        rect = rect.united(QRectF(planet_x, planet_y, 0, 0))
+        for x, label in ((a - c, "Pe"), (-a - c, "Ap")):
+            rect = rect.united(metrics.boundingRect(label).translated(QPointF(x, 0) + APSIS_LABEL_OFFSET))
+        # Pens are up to 8 px wide and antialiasing bleeds another pixel
+        rect = rect.adjusted(-PEN_MARGIN, -PEN_MARGIN, PEN_MARGIN, PEN_MARGIN)
+        return QTransform().rotate(-self.model.inclination).mapRect(rect)
+
+    def draw_scene(self, painter, a, b, c):
+        """Paint the orbit with the painter's origin at the orbit center"""
+        painter.rotate(-self.model.inclination)
 
         # Draw orbit
         painter.drawEllipse(QPointF(-c, 0), a, b)
 
+        # Imported on first paint so NumPy stays out of startup
+        from kepler import focal_positions
+        x, y = focal_positions(self.model.eccentricity, TIME_TICKS)
+        draw_time_ticks(painter, x * a, y * a)
+        draw_apsides(painter, QPointF(a - c, 0), QPointF(-a - c, 0))
+
         # Draw drag points
         painter.setPen(QPen(Qt.GlobalColor.red, 6))
         points = [
@@ -56,24 +164,93 @@ class OrbitWidget(QWidget):
         # Draw parent body
         painter.setPen(QPen(Qt.GlobalColor.blue, 8))
         painter.drawPoint(QPointF(0, 0))
-        painter.drawText(QPointF(5, -5), self.parent_body_name)
+        painter.drawText(QPointF(5, -5), self.model.parent_body_name)
 
         # Draw planet
-        planet_x = (a - c) * math.cos(math.radians(self.inclination))
-        planet_y = (a - c) * math.sin(math.radians(self.inclination))
+        planet_x = (a - c) * math.cos(math.radians(self.model.inclination))
+        planet_y = (a - c) * math.sin(math.radians(self.model.inclination))
         painter.setPen(QPen(Qt.GlobalColor.green, 8))
         painter.drawPoint(QPointF(planet_x, planet_y))
-        painter.drawText(QPointF(planet_x + 5, planet_y - 5), self.planet_name)
+        painter.drawText(QPointF(planet_x + 5, planet_y - 5), self.model.planet_name)
 
-        painter.restore()
+    def render_layer(self, key, bounds):
+        """Render the scene into the cached pixmap at the widget's device pixel ratio"""
+        center_x, center_y, a, b, c = self.scene_geometry()
+        fraction, ratio = key[6], key[7]
+        layer = QPixmap(max(1, math.ceil(bounds.width() * ratio)), max(1, math.ceil(bounds.height() * ratio)))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.font())
+        painter.translate(fraction[0] - bounds.x(), fraction[1] - bounds.y())
+        self.draw_scene(painter, a, b, c)
+        painter.end()
+
+        self._layer = layer
+        self._layer_key = key
+        self._layer_bounds = bounds
+        self.layer_renders += 1
+
+    def scene_rect(self):
+        """Widget area covered by the scene at the current parameters"""
+        _, bounds, origin = self.scene_placement()
+        return bounds.translated(origin)
+
+    def on_model_changed(self, fields):
+        self.readout.refresh()
+        self.refresh()
+
+    def showEvent(self, event):
+        self.readout.refresh()
+
+    def refresh(self):
+        """
+        Schedule a repaint of only the area the scene covered before and covers now.
+
+        The dirty area is kept a single rectangle, the raster engine clips to
+        one rectangle far faster than to a multi-rectangle region.
+        """
+        dirty = self.scene_rect()
+        if self._painted_rect is not None:
+            dirty = dirty.united(self._painted_rect)
+        self.update(dirty)
+
+    def paintEvent(self, event):
+        self.paint_count += 1
+        key, bounds, origin = self.scene_placement()
+        changed = key != self._painted_key
+        painter = QPainter(self)
+        if key != self._layer_key and changed and self._last_paint_changed:
+            # The scene changes every frame while a handle is dragged, caching it
+            # would only add a render and a blit per frame
+            center_x, center_y, a, b, c = self.scene_geometry()
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.translate(center_x, center_y)
+            self.draw_scene(painter, a, b, c)
+        else:
+            if key != self._layer_key:
+                self.render_layer(key, bounds)
+            # The layer is pre-rendered at the device pixel ratio, so this is a plain blit
+            painter.drawPixmap(bounds.topLeft() + origin, self._layer)
+        painter.end()
+
+        self._painted_key = key
+        self._painted_rect = bounds.translated(origin)
+        self._last_paint_changed = changed
 
     def mousePressEvent(self, event):
-        center_x = self.width() // 2 + self.center_offset.x()
-        center_y = self.height() // 2 + self.center_offset.y()
-        scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
-        a = self.semi_major_axis * scale
-        b = a * math.sqrt(1 - self.eccentricity**2)
-        c = self.eccentricity * a
+        center_x = self.width() // 2 + self.model.center_offset.x()
+        center_y = self.height() // 2 + self.model.center_offset.y()
+        scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
+        a = self.model.semi_major_axis * scale
+        b = a * math.sqrt(1 - self.model.eccentricity**2)
+        c = self.model.eccentricity * a
+
+        # Values may have come from the spin boxes since the last drag
+        self.target_semi_major_axis = self.model.semi_major_axis
+        self.target_eccentricity = self.model.eccentricity
 
         points = [
             ("SE", QPointF(center_x + a - c, center_y + b)),
@@ -100,18 +277,20 @@ class OrbitWidget(QWidget):
 
     def mouseMoveEvent(self, event):
         if self.drag_point:
-            center_x = self.width() // 2 + self.center_offset.x()
-            center_y = self.height() // 2 + self.center_offset.y()
-            scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
+            center_x = self.width() // 2 + self.model.center_offset.x()
+            center_y = self.height() // 2 + self.model.center_offset.y()
+            scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
 
             if scale > 0:
                 x = (event.position().x() - center_x) / scale
                 y = (event.position().y() - center_y) / scale
 
+                # The model clamps to the same range, a target below it would never be reached
+                min_semi_major_axis = self.model.SEMI_MAJOR_AXIS_RANGE[0]
                 if self.drag_point in ["SE", "NE"]:
-                    self.target_semi_major_axis = max(0.01, abs(x) / (1 + self.eccentricity))
+                    self.target_semi_major_axis = max(min_semi_major_axis, abs(x) / (1 + self.model.eccentricity))
                 elif self.drag_point in ["SW", "NW"]:
-                    self.target_semi_major_axis = max(0.01, abs(x) / (1 - self.eccentricity))
+                    self.target_semi_major_axis = max(min_semi_major_axis, abs(x) / (1 - self.model.eccentricity))
 
                 if self.target_semi_major_axis != 0:
                     self.target_eccentricity = max(0, min(0.99, 1 - (y / self.target_semi_major_axis)**2))
@@ -120,11 +299,8 @@ class OrbitWidget(QWidget):
                 self.update_timer.start(16)  # 16 ms delay for smoother updates
         elif self.is_moving_orbit:
             delta = event.position() - self.last_pos
-            self.center_offset += delta
             self.last_pos = event.position()
-            self.update()
-            if not self.update_timer.isActive():
-                self.update_timer.start(16)
+            self.model.update(center_offset=self.model.center_offset + delta)
 
     def mouseReleaseEvent(self, event):
         self.drag_point = None
@@ -132,30 +308,39 @@ class OrbitWidget(QWidget):
 
     def smooth_update(self):
         # Smooth transition to target values
-        self.semi_major_axis += (self.target_semi_major_axis - self.semi_major_axis) * 0.2
-        self.eccentricity += (self.target_eccentricity - self.eccentricity) * 0.2
-
-        self.update()
-        if self.update_callback:
-            self.update_callback()
+        self.model.update(
+            semi_major_axis=self.model.semi_major_axis + (self.target_semi_major_axis - self.model.semi_major_axis) * 0.2,
+            eccentricity=self.model.eccentricity + (self.target_eccentricity - self.model.eccentricity) * 0.2,
+        )
 
         # Continue updating if we haven't reached the target
-        if abs(self.semi_major_axis - self.target_semi_major_axis) > 0.01 or abs(self.eccentricity - self.target_eccentricity) > 0.001:
+        if abs(self.model.semi_major_axis - self.target_semi_major_axis) > 0.01 or abs(self.model.eccentricity - self.target_eccentricity) > 0.001:
             self.update_timer.start(16)
 
 class VerticalOrbitWidget(QWidget):
-    def __init__(self, update_callback, parent=None):
+    # The side view does not show the top-down pan
+    DRAWN_FIELDS = {"semi_major_axis", "eccentricity", "inclination", "parent_body_name", "planet_name",
+                    "gravitational_parameter"}
+
+    def __init__(self, model, parent=None):
         super().__init__(parent)
         self.setMinimumSize(300, 300)
-        self.semi_major_axis = 100
-        self.eccentricity = 0
-        self.inclination = 0
+        self.model = model
+        self.model.changed.connect(self.on_model_changed)
         self.drag_point = None
-        self.update_callback = update_callback
-        self.parent_body_name = "Parent"
-        self.planet_name = "Planet"
+        self.paint_count = 0
+        self.readout = OrbitReadout(self)
+
+    def on_model_changed(self, fields):
+        self.readout.refresh()
+        if fields & self.DRAWN_FIELDS:
+            self.update()
+
+    def showEvent(self, event):
+        self.readout.refresh()
 
     def paintEvent(self, event):
+        self.paint_count += 1
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
@@ -166,19 +351,26 @@ class VerticalOrbitWidget(QWidget):
         # Draw orbit
         center_x = self.width() // 2
         center_y = self.height() // 2
-        scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
+        scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
 
-        a = self.semi_major_axis * scale
-        b = a * math.sqrt(1 - self.eccentricity**2)
+        a = self.model.semi_major_axis * scale
+        b = a * math.sqrt(1 - self.model.eccentricity**2)
 
         painter.save()
         painter.translate(center_x, center_y)
 
         # Draw ellipse
-        painter.drawEllipse(QPointF(0, 0), a, b * math.cos(math.radians(self.inclination)))
+        painter.drawEllipse(QPointF(0, 0), a, b * math.cos(math.radians(self.model.inclination)))
+
+        # Time ticks on the drawn ellipse, which is centered rather than focused on the parent
+        from kepler import focal_positions
+        x, y = focal_positions(self.model.eccentricity, TIME_TICKS)
+        x += self.model.eccentricity
+        draw_time_ticks(painter, x * a, y * a * math.cos(math.radians(self.model.inclination)))
+        draw_apsides(painter, QPointF(a, 0), QPointF(-a, 0))
 
         # Draw inclination line
-        inclination_radians = math.radians(self.inclination)
+        inclination_radians = math.radians(self.model.inclination)
         inclination_slope = math.tan(inclination_radians)
         painter.setPen(QPen(Qt.GlobalColor.red, 2))
         painter.drawLine(QPointF(-a, 0), QPointF(a, inclination_slope * a))
@@ -191,25 +383,25 @@ class VerticalOrbitWidget(QWidget):
         # Draw parent body
         painter.setPen(QPen(Qt.GlobalColor.blue, 8))
         painter.drawPoint(QPointF(0, 0))
-        painter.drawText(QPointF(5, -5), self.parent_body_name)
+        painter.drawText(QPointF(5, -5), self.model.parent_body_name)
 
         # Draw planet
         planet_x = a
         planet_y = inclination_slope * a
         painter.setPen(QPen(Qt.GlobalColor.green, 8))
         painter.drawPoint(QPointF(planet_x, planet_y))
-        painter.drawText(QPointF(planet_x + 5, planet_y - 5), self.planet_name)
+        painter.drawText(QPointF(planet_x + 5, planet_y - 5), self.model.planet_name)
 
         painter.restore()
 
     def mousePressEvent(self, event):
         center_x = self.width() // 2
         center_y = self.height() // 2
-        scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
-        a = self.semi_major_axis * scale
-        b = a * math.sqrt(1 - self.eccentricity**2)
+        scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
+        a = self.model.semi_major_axis * scale
+        b = a * math.sqrt(1 - self.model.eccentricity**2)
 
-        inclination_radians = math.radians(self.inclination)
+        inclination_radians = math.radians(self.model.inclination)
         inclination_slope = math.tan(inclination_radians)
         incl_point = QPointF(center_x + a, center_y + inclination_slope * a)
         
@@ -221,15 +413,12 @@ class VerticalOrbitWidget(QWidget):
     def mouseMoveEvent(self, event):
         if self.drag_point == "incl":
             center_y = self.height() // 2
-            scale = min(self.width(), self.height()) / (2.2 * self.semi_major_axis)
-            a = self.semi_major_axis * scale
-            b = a * math.sqrt(1 - self.eccentricity**2)
+            scale = min(self.width(), self.height()) / (2.2 * self.model.semi_major_axis)
+            a = self.model.semi_major_axis * scale
+            b = a * math.sqrt(1 - self.model.eccentricity**2)
 
             y = (center_y - event.position().y()) / b
-            self.inclination = math.degrees(math.asin(max(-1, min(1, y))))
-
-            self.update()
-            self.update_callback()
+            self.model.update(inclination=math.degrees(math.asin(max(-1, min(1, y)))))
 
     def mouseReleaseEvent(self, event):
         self.drag_point = None
\ No newline at end of file
@@ -1,16 +1,38 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QTabWidget, QScrollArea, 
                              QFormLayout, QComboBox, QSpinBox, QDoubleSpinBox, QColorDialog,
-                             QTextEdit, QGridLayout, QCheckBox, QMessageBox)
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCore import Qt
+                             QTextEdit, QGridLayout, QCheckBox, QMessageBox, QProgressDialog,
+                             QApplication)
+from PyQt6.QtGui import QFont, QColor, QDoubleValidator, QKeySequence
+from PyQt6.QtCore import Qt, QPointF, QThreadPool
+from autosave import ProjectAutosaver
+from orbit_model import OrbitModel
 from orbit_widgets import OrbitWidget, VerticalOrbitWidget
-from utility_functions import convert_to_dds
-from genconfig import generate_config
-from texture_previewer import TexturePreviewContainer
-from PIL import Image
+from curve_plot import AtmosphereCurvePreview
+import tracing
+from utility_functions import write_text_atomic
+from genconfig import DEFAULT_DEFORMITY, generate_config, vertex_height_map_settings
+from planet_model import PlanetSpec, Biome, STOCK_GRAVITATIONAL_PARAMETERS, texture_extension
+from build_manifest import TextureManifest
+from project import PROJECT_SUFFIX, TEXTURE_FIELDS, load_project
+from mod_builder import (create_mod_folder_structure, texture_jobs, texture_options, export_texture,
+                         export_texture_record, exported_texture_names, readme_content)
 
 import os
+import math
+import time
+
+def get_color_from_button(button):
+    style = button.styleSheet()
+    if "background-color" in style:
+        color_str = style.split("background-color: ")[1].split(";")[0]
+        return QColor(color_str)
+    return QColor(0, 0, 0)  # Default to black if no color is set
+
+def wait_until_done(futures):
+    # concurrent.futures.wait() never returns for futures an executor shutdown cancelled
+    while not all(future.done() for future in futures):
+        time.sleep(0.05)
 
 class PlanetCreator(QMainWindow):
     def __init__(self):
@@ -134,6 +156,29 @@ class PlanetCreator(QMainWindow):
         self.static_pressure.setSuffix(" kPa")
         atmo_layout.addRow("Static Pressure at Sea Level:", self.static_pressure)
 
+        self.scale_height = QDoubleSpinBox()
+        self.scale_height.setRange(1, 1000000)
+        self.scale_height.setValue(5600)  # Close to Kerbin's
+        self.scale_height.setSuffix(" m")
+        atmo_layout.addRow("Scale Height:", self.scale_height)
+
+        self.lapse_rate = QDoubleSpinBox()
+        self.lapse_rate.setRange(0, 100)
+        self.lapse_rate.setSingleStep(0.5)
+        self.lapse_rate.setSuffix(" K/km")
+        atmo_layout.addRow("Lapse Rate:", self.lapse_rate)
+
+        # Empty curves are generated from these when the config is written
+        self.generate_curves_button = QPushButton("Generate Curves")
+        self.generate_curves_button.clicked.connect(self.generate_atmosphere_curves)
+        atmo_layout.addRow("", self.generate_curves_button)
+
+        self.curve_preview = AtmosphereCurvePreview()
+        atmo_layout.addRow("Curve Preview:", self.curve_preview)
+        self.atmo_pressure_curve.textChanged.connect(self.update_curve_preview)
+        self.atmo_temp_curve.textChanged.connect(self.update_curve_preview)
+        self.atmosphere_height.valueChanged.connect(self.update_curve_preview)
+
         self.has_atmosphere = QComboBox()
         self.has_atmosphere.addItems(["Yes", "No"])
         self.has_atmosphere.currentTextChanged.connect(self.toggle_atmosphere)
@@ -142,7 +187,8 @@ class PlanetCreator(QMainWindow):
         # List of widgets to disable when there's no atmosphere
         self.atmo_widgets = [self.atmosphere_height, self.atmosphere_temp, self.static_pressure,
                              self.atmo_ambient_color, self.atmo_light_color, self.atmo_pressure_curve,
-                             self.atmo_temp_curve]
+                             self.atmo_temp_curve, self.scale_height, self.lapse_rate,
+                             self.generate_curves_button]
 
         # Orbit Tab
         orbit_tab = QWidget()
@@ -160,7 +206,11 @@ class PlanetCreator(QMainWindow):
         top_down_tab.setLayout(top_down_layout)
         orbit_view_tabs.addTab(top_down_tab, "Top-down View")
 
-        self.orbit_widget = OrbitWidget(self.update_orbit_fields)
+        # Both views and the spin boxes below edit this model, which batches their repaints
+        self.orbit_model = OrbitModel(self)
+        self.orbit_model.changed.connect(self.update_orbit_fields)
+
+        self.orbit_widget = OrbitWidget(self.orbit_model)
         top_down_layout.addWidget(self.orbit_widget)
 
         # Side view tab
@@ -169,7 +219,7 @@ class PlanetCreator(QMainWindow):
         side_view_tab.setLayout(side_view_layout)
         orbit_view_tabs.addTab(side_view_tab, "Side View")
 
-        self.vertical_orbit_widget = VerticalOrbitWidget(self.update_orbit_fields)
+        self.vertical_orbit_widget = VerticalOrbitWidget(self.orbit_model)
         side_view_layout.addWidget(self.vertical_orbit_widget)
 
         # Orbit parameters (keep this part as it was)
@@ -182,25 +232,35 @@ class PlanetCreator(QMainWindow):
         self.parent_body = QLineEdit()
         orbit_params_layout.addRow("Parent Body:", self.parent_body)
 
+        # Only used for the period and time ticks in the orbit views, stock parents fill it in
+        self.parent_gravitational_parameter = QLineEdit(f"{self.orbit_model.gravitational_parameter:.8g}")
+        gm_validator = QDoubleValidator(self.parent_gravitational_parameter)
+        gm_validator.setBottom(0)
+        gm_validator.setNotation(QDoubleValidator.Notation.ScientificNotation)
+        self.parent_gravitational_parameter.setValidator(gm_validator)
+        self.parent_gravitational_parameter.textChanged.connect(self.update_gravitational_parameter)
+        orbit_params_layout.addRow("Parent GM (m³/s²):", self.parent_gravitational_parameter)
+        self.parent_body.textChanged.connect(self.fill_stock_gravitational_parameter)
+
         self.semi_major_axis = QDoubleSpinBox()
-        self.semi_major_axis.setRange(1, 100000000)
+        self.semi_major_axis.setRange(*OrbitModel.SEMI_MAJOR_AXIS_RANGE)
         self.semi_major_axis.setSuffix(" km")
-        self.semi_major_axis.valueChanged.connect(self.update_orbit_widget)
+        self.semi_major_axis.valueChanged.connect(lambda value: self.orbit_model.update(semi_major_axis=value))
         orbit_params_layout.addRow("Semi-major Axis:", self.semi_major_axis)
 
         self.eccentricity = QDoubleSpinBox()
-        self.eccentricity.setRange(0, 0.99)
+        self.eccentricity.setRange(*OrbitModel.ECCENTRICITY_RANGE)
         self.eccentricity.setSingleStep(0.01)
-        self.eccentricity.valueChanged.connect(self.update_orbit_widget)
+        self.eccentricity.valueChanged.connect(lambda value: self.orbit_model.update(eccentricity=value))
         orbit_params_layout.addRow("Eccentricity:", self.eccentricity)
 
         self.inclination = QDoubleSpinBox()
         self.inclination.setRange(0, 360)
         self.inclination.setSuffix("°")
-        self.inclination.valueChanged.connect(self.update_orbit_widget)
+        self.inclination.valueChanged.connect(lambda value: self.orbit_model.update(inclination=value))
         orbit_params_layout.addRow("Inclination:", self.inclination)
-        self.planet_name.textChanged.connect(self.update_orbit_widget)
-        self.parent_body.textChanged.connect(self.update_orbit_widget)
+        self.planet_name.textChanged.connect(lambda text: self.orbit_model.update(planet_name=text))
+        self.parent_body.textChanged.connect(lambda text: self.orbit_model.update(parent_body_name=text))
 
         # Biomes Tab
         biomes_tab = QWidget()
@@ -209,15 +269,87 @@ class PlanetCreator(QMainWindow):
         self.tab_widget.addTab(biomes_tab, "Biomes")
 
         self.biomes = []
+        self.biomes_layout = biomes_layout
+
+        # Or split the color or height map into biomes and a biome map, see biome_map.py
+        generate_biomes_layout = QHBoxLayout()
+        self.biome_source = QComboBox()
+        self.biome_source.addItems(["Color map", "Height map"])
+        self.biome_count = QSpinBox()
+        self.biome_count.setRange(2, 32)
+        self.biome_count.setValue(8)
+        self.generate_biomes_button = QPushButton("Generate Biome Map...")
+        self.generate_biomes_button.clicked.connect(self.generate_biome_map)
+        generate_biomes_layout.addWidget(QLabel("From:"))
+        generate_biomes_layout.addWidget(self.biome_source)
+        generate_biomes_layout.addWidget(QLabel("Biomes:"))
+        generate_biomes_layout.addWidget(self.biome_count)
+        generate_biomes_layout.addWidget(self.generate_biomes_button)
+        biomes_layout.addLayout(generate_biomes_layout)
+
         self.add_biome_button = QPushButton("Add Biome")
         self.add_biome_button.clicked.connect(self.add_biome)
         biomes_layout.addWidget(self.add_biome_button)
 
-        # Textures Tab
-        textures_tab = QWidget()
+        # Textures Tab, built the first time it is shown since its previews pull in NumPy and Pillow.
+        # Until then the texture fields live here.
+        self.texture_values = {key: "" for key in TEXTURE_FIELDS.values()}
+        self.texture_values.update(generate_mipmaps=False, min_elevation=0.0, max_elevation=0.0,
+                                   generate_normal_map=False, normal_strength=1.0)
+        self.lazy_tabs = {}
+        self.add_lazy_tab("Textures", self.build_textures_tab)
+
+        # System Tab, the planet among the bodies of a loaded system file
+        self.system_specs = []
+        self.add_lazy_tab("System", self.build_system_tab)
+        self.tab_widget.currentChanged.connect(self.build_lazy_tab)
+        self.tab_widget.currentChanged.connect(self.refresh_system_view)
+
+        generate_button = QPushButton("Create Mod Folder")
+        generate_button.clicked.connect(self.save_complete_mod)
+        main_layout.addWidget(generate_button)
+
+        # Projects, saved in the background as the form changes once one is open
+        self.autosaver = ProjectAutosaver(self.project_snapshot, self)
+        self.autosaver.failed.connect(lambda message: self.statusBar().showMessage(message))
+        self.autosaver.saved.connect(lambda path: self.statusBar().showMessage(f"Saved {path}", 3000))
+        self.watch_for_changes(self)
+        self.orbit_model.changed.connect(self.autosaver.schedule)
+
+        file_menu = self.menuBar().addMenu("&File")
+        file_menu.addAction("&Open Project...", QKeySequence.StandardKey.Open, self.open_project)
+        file_menu.addAction("&Save Project", QKeySequence.StandardKey.Save, self.save_project)
+        file_menu.addAction("Save Project &As...", QKeySequence.StandardKey.SaveAs, self.save_project_as)
+        self.update_window_title()
+
+    def add_lazy_tab(self, title, builder):
+        """
+        Add a tab whose contents are only created when it is first shown.
+
+        Args:
+            title (str): Tab label
+            builder (callable): Called with the empty tab page to fill it in
+        """
+        page = QWidget()
+        index = self.tab_widget.addTab(page, title)
+        self.lazy_tabs[index] = (page, builder)
+
+    def build_lazy_tab(self, index):
+        entry = self.lazy_tabs.pop(index, None)
+        if entry is not None:
+            page, builder = entry
+            builder(page)
+
+    def ensure_tabs_built(self):
+        """Build every lazy tab, for code that reads their widgets"""
+        for index in list(self.lazy_tabs):
+            self.build_lazy_tab(index)
+
+    def build_textures_tab(self, textures_tab):
+        from texture_previewer import HeightStatsLabel, TexturePreviewContainer
+
         textures_layout = QVBoxLayout()
         textures_tab.setLayout(textures_layout)
-        self.tab_widget.addTab(textures_tab, "Textures")
 
         # Create a form layout for the file selections
         file_selection_layout = QFormLayout()
@@ -241,6 +373,23 @@ class PlanetCreator(QMainWindow):
         height_map_layout.addWidget(self.height_map_button)
         file_selection_layout.addRow("Height Map:", height_map_layout)
 
+        # Real elevations of the height map's lowest and highest pixel, for the terrain deformity
+        self.min_elevation = QDoubleSpinBox()
+        self.max_elevation = QDoubleSpinBox()
+        elevation_layout = QHBoxLayout()
+        for spin_box in (self.min_elevation, self.max_elevation):
+            spin_box.setRange(-100000, 100000)
+            spin_box.setDecimals(0)
+            spin_box.setSuffix(" m")
+            spin_box.valueChanged.connect(self.update_height_stats)
+        elevation_layout.addWidget(self.min_elevation)
+        elevation_layout.addWidget(QLabel("to"))
+        elevation_layout.addWidget(self.max_elevation)
+        file_selection_layout.addRow("Elevation Range:", elevation_layout)
+        self.height_stats_label = HeightStatsLabel()
+        file_selection_layout.addRow("", self.height_stats_label)
+        self.height_map.textChanged.connect(self.update_height_stats)
+
         # Normal Map
         self.normal_map = QLineEdit()
         self.normal_map_button = QPushButton("Browse")
@@ -250,12 +399,174 @@ class PlanetCreator(QMainWindow):
         normal_map_layout.addWidget(self.normal_map_button)
         file_selection_layout.addRow("Normal Map:", normal_map_layout)
 
-        generate_button = QPushButton("Create Mod Folder")
-        generate_button.clicked.connect(self.save_complete_mod)
-        main_layout.addWidget(generate_button)
+        # Or one generated from the height map, exaggerated by the strength
+        self.generate_normal_map = QCheckBox("Generate from height map")
+        self.normal_strength = QDoubleSpinBox()
+        self.normal_strength.setRange(0.01, 1000)
+        self.normal_strength.setSingleStep(0.5)
+        self.normal_strength.setValue(1.0)
+        self.normal_strength.setSuffix("x")
+        generate_normal_layout = QHBoxLayout()
+        generate_normal_layout.addWidget(self.generate_normal_map)
+        generate_normal_layout.addWidget(QLabel("Strength:"))
+        generate_normal_layout.addWidget(self.normal_strength)
+        file_selection_layout.addRow("", generate_normal_layout)
+        self.generate_normal_map.toggled.connect(self.update_normal_preview)
+        self.normal_strength.valueChanged.connect(self.update_normal_preview)
+        self.radius.valueChanged.connect(self.update_normal_preview)
+        self.height_map.textChanged.connect(self.update_normal_preview)
+        self.height_stats_label.measured.connect(self.update_normal_preview)
+
+        # Biome Map, exported as PNG so its colours stay exact
+        self.biome_map = QLineEdit()
+        self.biome_map_button = QPushButton("Browse")
+        self.biome_map_button.clicked.connect(lambda: self.browse_file(self.biome_map))
+        biome_map_layout = QHBoxLayout()
+        biome_map_layout.addWidget(self.biome_map)
+        biome_map_layout.addWidget(self.biome_map_button)
+        file_selection_layout.addRow("Biome Map:", biome_map_layout)
+
+        self.generate_mipmaps = QCheckBox("Generate Mipmaps")
+        file_selection_layout.addRow("Mipmaps:", self.generate_mipmaps)
 
         self.texture_previews = TexturePreviewContainer()
         textures_layout.addWidget(self.texture_previews)
+        self.set_texture_fields(self.texture_values)
+        self.watch_for_changes(textures_tab)
+
+    def texture_fields(self):
+        """Texture paths, the mipmap option and the elevation range, without building the Textures tab"""
+        if not hasattr(self, 'color_map'):
+            return dict(self.texture_values)
+        values = {key: getattr(self, key).text() for key in TEXTURE_FIELDS.values()}
+        values['generate_mipmaps'] = self.generate_mipmaps.isChecked()
+        values['min_elevation'] = self.min_elevation.value()
+        values['max_elevation'] = self.max_elevation.value()
+        values['generate_normal_map'] = self.generate_normal_map.isChecked()
+        values['normal_strength'] = self.normal_strength.value()
+        return values
+
+    def set_texture_fields(self, values):
+        """
+        Args:
+            values (dict): color_map, height_map, normal_map, biome_map,
+                           generate_mipmaps, min_elevation, max_elevation,
+                           generate_normal_map and normal_strength
+        """
+        self.texture_values = dict(values)
+        if not hasattr(self, 'color_map'):
+            return
+        for key in TEXTURE_FIELDS.values():
+            getattr(self, key).setText(values[key])
+        self.generate_mipmaps.setChecked(values['generate_mipmaps'])
+        self.min_elevation.setValue(values['min_elevation'])
+        self.max_elevation.setValue(values['max_elevation'])
+        self.generate_normal_map.setChecked(values['generate_normal_map'])
+        self.normal_strength.setValue(values['normal_strength'])
+        self.texture_previews.update_textures(values['color_map'] or None, values['height_map'] or None,
+                                              values['normal_map'] or None)
+        self.update_normal_preview()
+
+    def update_height_stats(self, *args):
+        self.height_stats_label.set_height_map(self.height_map.text(), self.min_elevation.value(),
+                                               self.max_elevation.value())
+
+    def update_normal_preview(self, *args):
+        """Preview the normal map file, or the normals generated from the height map"""
+        generate = self.generate_normal_map.isChecked()
+        self.normal_map.setEnabled(not generate)
+        self.normal_map_button.setEnabled(not generate)
+        preview = self.texture_previews.normal_preview
+        if not generate:
+            preview.set_normal_settings(None)
+            preview.set_texture(self.normal_map.text() or None)
+            return
+        # Until the height map is measured, the relief is the default one
+        deformity = DEFAULT_DEFORMITY
+        if self.height_stats_label.stats is not None:
+            deformity, _ = vertex_height_map_settings(self.to_planet_spec())
+        preview.set_normal_settings({'deformity': deformity, 'radius': self.radius.value() * 1000,
+                                     'strength': self.normal_strength.value()})
+        preview.set_texture(self.height_map.text() or None)
+
+    def build_system_tab(self, system_tab):
+        from system_view import SystemView
+
+        system_layout = QVBoxLayout()
+        system_tab.setLayout(system_layout)
+
+        buttons_layout = QHBoxLayout()
+        load_system_button = QPushButton("Load System...")
+        load_system_button.clicked.connect(self.load_system)
+        buttons_layout.addWidget(load_system_button)
+        fit_button = QPushButton("Fit")
+        buttons_layout.addWidget(fit_button)
+        buttons_layout.addStretch()
+        system_layout.addLayout(buttons_layout)
+
+        self.system_view = SystemView()
+        self.system_view.bodyChanged.connect(self.system_body_changed)
+        fit_button.clicked.connect(self.system_view.fit_view)
+        system_layout.addWidget(self.system_view)
+
+    def load_system(self):
+        from batch_build import load_specs
+
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load System", "", "System Files (*.json *.toml)")
+        if file_name:
+            try:
+                self.system_specs = load_specs(file_name)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Load Failed", f"Could not load {file_name}:\n{e}")
+                return
+            self.refresh_system_view(fit=True)
+
+    def refresh_system_view(self, index=None, fit=False):
+        """Show the loaded system with this planet's current orbit in the System tab"""
+        if not hasattr(self, 'system_view') or self.tab_widget.currentWidget() is not self.system_view.parent():
+            return
+        from system_view import system_bodies
+
+        # The planet is taken from the orbit model, reading the whole form would build the Textures tab
+        model = self.orbit_model
+        node_angle = math.degrees(math.atan2(model.center_offset.y(), model.center_offset.x()))
+        planet = PlanetSpec(name=model.planet_name or "Planet", parent_body=model.parent_body_name,
+                            semi_major_axis=model.semi_major_axis, eccentricity=model.eccentricity,
+                            longitude_of_ascending_node=node_angle, argument_of_periapsis=node_angle)
+        specs = [spec for spec in self.system_specs if spec.name != planet.name] + [planet]
+        bodies = system_bodies(specs)
+        # The planet's direction follows the top-down view's pan, dragging it here only changes its distance
+        for body in bodies:
+            body.angle_locked = body.name == planet.name
+        self.system_view.set_bodies(bodies, fit=fit or len(self.system_view.system) == 0)
+
+    def system_body_changed(self, body):
+        # The planet's angle is locked in the view, see refresh_system_view()
+        if body.name == (self.orbit_model.planet_name or "Planet"):
+            self.orbit_model.update(semi_major_axis=body.semi_major_axis)
+            return
+        for spec in self.system_specs:
+            if spec.name == body.name:
+                spec.semi_major_axis = body.semi_major_axis
+                spec.argument_of_periapsis = body.angle - spec.longitude_of_ascending_node
+
+    def generate_atmosphere_curves(self):
+        from atmosphere import atmosphere_curves
+        from float_curve import format_keys
+
+        try:
+            pressure_keys, temperature_keys = atmosphere_curves(
+                self.static_pressure.value(), self.atmosphere_temp.value(), self.atmosphere_height.value(),
+                self.scale_height.value(), self.lapse_rate.value())
+        except ValueError as e:
+            QMessageBox.warning(self, "Cannot Generate Curves", str(e))
+            return
+        self.atmo_pressure_curve.setPlainText(format_keys(pressure_keys))
+        self.atmo_temp_curve.setPlainText(format_keys(temperature_keys))
+
+    def update_curve_preview(self):
+        self.curve_preview.set_curves(self.atmo_pressure_curve.toPlainText(), self.atmo_temp_curve.toPlainText(),
+                                      self.atmosphere_height.value())
 
     def toggle_atmosphere(self, value):
         has_atmo = (value == "Yes")
@@ -263,24 +574,72 @@ class PlanetCreator(QMainWindow):
             widget.setEnabled(has_atmo)
 
     def add_biome(self):
+        self.add_biome_row()
+
+    def add_biome_row(self, name="", color=None):
         biome_widget = QWidget()
         biome_layout = QHBoxLayout()
         biome_widget.setLayout(biome_layout)
 
-        biome_name = QLineEdit()
+        biome_name = QLineEdit(name)
         biome_layout.addWidget(biome_name)
 
         biome_color = QPushButton("Select Color")
         biome_color.clicked.connect(lambda: self.select_color(biome_color))
+        if color is not None:
+            biome_color.setStyleSheet(f"background-color: {color}")
         biome_layout.addWidget(biome_color)
 
         self.biomes.append((biome_name, biome_color))
-        self.tab_widget.widget(4).layout().insertWidget(self.tab_widget.widget(4).layout().count() - 1, biome_widget)
+        self.biomes_layout.insertWidget(self.biomes_layout.count() - 1, biome_widget)
+        self.watch_for_changes(biome_widget)
+        self.autosaver.schedule()
+
+    def clear_biomes(self):
+        for name, _ in self.biomes:
+            name.parentWidget().deleteLater()
+        self.biomes = []
+
+    def generate_biome_map(self):
+        """Generate a biome map from the color or height map in the background, then list its biomes"""
+        source = "color" if self.biome_source.currentIndex() == 0 else "height"
+        source_path = self.texture_fields()[f"{source}_map"]
+        if not source_path or not os.path.isfile(source_path):
+            QMessageBox.warning(self, "Missing Information", f"Please select a {source} map to generate the biomes from.")
+            return
+        output_path, _ = QFileDialog.getSaveFileName(self, "Save Biome Map",
+                                                     os.path.splitext(source_path)[0] + "_biomes.png",
+                                                     "PNG Files (*.png)")
+        if not output_path:
+            return
+
+        from texture_previewer import BiomeMapJob
+        job = BiomeMapJob(source_path, output_path, self.biome_count.value(), source)
+        job.signals.finished.connect(self.biome_map_generated)
+        job.signals.failed.connect(self.biome_map_failed)
+        self.generate_biomes_button.setEnabled(False)
+        self.statusBar().showMessage("Generating biome map...")
+        QThreadPool.globalInstance().start(job)
+
+    def biome_map_generated(self, path, biomes):
+        """Replace the biomes with the generated ones and select their map"""
+        self.generate_biomes_button.setEnabled(True)
+        self.clear_biomes()
+        for number, (color, _) in enumerate(biomes, 1):
+            self.add_biome_row(f"Biome {number}", color)
+        self.set_texture_fields(dict(self.texture_fields(), biome_map=path))
+        self.statusBar().showMessage(f"Generated {len(biomes)} biomes into {path}", 5000)
+
+    def biome_map_failed(self, message):
+        self.generate_biomes_button.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Biome Map", f"Could not generate the biome map: {message}")
 
     def select_color(self, button):
         color = QColorDialog.getColor()
         if color.isValid():
             button.setStyleSheet(f"background-color: {color.name()}")
+            self.autosaver.schedule()
 
     def browse_file(self, line_edit):
         file_name, _ = QFileDialog.getOpenFileName(self, "Select Image File", "", 
@@ -301,6 +660,7 @@ class PlanetCreator(QMainWindow):
         self.time_warp_levels.append((altitude, multiplier))
         self.time_warp_levels.sort(key=lambda x: x[0])
         self.update_time_warp_display()
+        self.autosaver.schedule()
 
     def update_time_warp_display(self):
         display_text = "Time Warp Levels:\n"
@@ -308,33 +668,34 @@ class PlanetCreator(QMainWindow):
             display_text += f"Altitude: {altitude} m, Multiplier: {multiplier}x\n"
         self.time_warp_display.setText(display_text)
 
-    def update_orbit_widget(self):
-        self.orbit_widget.semi_major_axis = self.semi_major_axis.value()
-        self.orbit_widget.eccentricity = self.eccentricity.value()
-        self.orbit_widget.inclination = self.inclination.value()
-        self.orbit_widget.parent_body_name = self.parent_body.text()
-        self.orbit_widget.planet_name = self.planet_name.text()
-    
-        self.vertical_orbit_widget.semi_major_axis = self.semi_major_axis.value()
-        self.vertical_orbit_widget.eccentricity = self.eccentricity.value()
-        self.vertical_orbit_widget.inclination = self.inclination.value()
-        self.vertical_orbit_widget.parent_body_name = self.parent_body.text()
-        self.vertical_orbit_widget.planet_name = self.planet_name.text()
-    
-        self.orbit_widget.update()
-        self.vertical_orbit_widget.update()
-
-    def update_orbit_fields(self):
-        self.semi_major_axis.setValue(self.orbit_widget.semi_major_axis)
-        self.eccentricity.setValue(self.orbit_widget.eccentricity)
-        self.inclination.setValue(self.orbit_widget.inclination)
+    def update_gravitational_parameter(self, text):
+        try:
+            value = float(text)
+        except ValueError:
+            return
+        if value > 0:
+            self.orbit_model.update(gravitational_parameter=value)
+
+    def fill_stock_gravitational_parameter(self, name):
+        value = STOCK_GRAVITATIONAL_PARAMETERS.get(name.strip())
+        if value is not None:
+            self.parent_gravitational_parameter.setText(f"{value:.8g}")
+
+    def update_orbit_fields(self, fields):
+        # Mirror changes made in the orbit views without feeding them back into the model
+        for name in ('semi_major_axis', 'eccentricity', 'inclination'):
+            if name in fields:
+                spin_box = getattr(self, name)
+                spin_box.blockSignals(True)
+                spin_box.setValue(getattr(self.orbit_model, name))
+                spin_box.blockSignals(False)
     
         # Update the spin boxes with the center offset
-        scale_factor = min(self.orbit_widget.width(), self.orbit_widget.height()) / (2.2 * self.orbit_widget.semi_major_axis)
+        scale_factor = min(self.orbit_widget.width(), self.orbit_widget.height()) / (2.2 * self.orbit_model.semi_major_axis)
     
         if scale_factor > 0:
-            center_x_km = self.orbit_widget.center_offset.x() / scale_factor
-            center_y_km = self.orbit_widget.center_offset.y() / scale_factor
+            center_x_km = self.orbit_model.center_offset.x() / scale_factor
+            center_y_km = self.orbit_model.center_offset.y() / scale_factor
         else:
             center_x_km = 0
             center_y_km = 0
@@ -345,49 +706,255 @@ class PlanetCreator(QMainWindow):
         if hasattr(self, 'center_y_offset'):
             self.center_y_offset.setValue(center_y_km)
 
-    def generate_config(self):
-        return generate_config(self)
+    def to_planet_spec(self):
+        """Snapshot of every field as a PlanetSpec, for code that must not touch widgets"""
+        textures = self.texture_fields()
+        node_angle = math.degrees(math.atan2(self.orbit_model.center_offset.y(), self.orbit_model.center_offset.x()))
+        return PlanetSpec(
+            name=self.planet_name.text(),
+            radius=self.radius.value(),
+            gravity=self.gravity.value(),
+            enable_rescale=self.enable_rescale.isChecked(),
+            rescale_factor=self.rescale_factor.value(),
+            time_warp_levels=list(self.time_warp_levels),
+            parent_body=self.parent_body.text(),
+            semi_major_axis=self.semi_major_axis.value(),
+            eccentricity=self.eccentricity.value(),
+            inclination=self.inclination.value(),
+            longitude_of_ascending_node=node_angle,
+            argument_of_periapsis=node_angle,
+            has_atmosphere=self.has_atmosphere.currentText() == "Yes",
+            atmosphere_height=self.atmosphere_height.value(),
+            atmosphere_temp=self.atmosphere_temp.value(),
+            static_pressure=self.static_pressure.value(),
+            ambient_color=get_color_from_button(self.atmo_ambient_color).name(),
+            light_color=get_color_from_button(self.atmo_light_color).name(),
+            pressure_curve=self.atmo_pressure_curve.toPlainText(),
+            temperature_curve=self.atmo_temp_curve.toPlainText(),
+            scale_height=self.scale_height.value(),
+            lapse_rate=self.lapse_rate.value(),
+            biomes=[Biome(name.text(), get_color_from_button(color).name()) for name, color in self.biomes],
+            color_map=textures['color_map'],
+            height_map=textures['height_map'],
+            normal_map=textures['normal_map'],
+            biome_map=textures['biome_map'],
+            generate_mipmaps=textures['generate_mipmaps'],
+            min_elevation=textures['min_elevation'],
+            max_elevation=textures['max_elevation'],
+            generate_normal_map=textures['generate_normal_map'],
+            normal_strength=textures['normal_strength'],
+        )
+
+    def project_snapshot(self):
+        """The planet and the editor state that is not part of it, for saving a project"""
+        offset = self.orbit_model.center_offset
+        ui_state = {
+            'center_offset': [offset.x(), offset.y()],
+            'parent_gravitational_parameter': self.parent_gravitational_parameter.text(),
+        }
+        return self.to_planet_spec(), ui_state
+
+    def apply_project(self, spec, ui_state):
+        """Fill every field from a loaded project"""
+        self.planet_name.setText(spec.name)
+        self.radius.setValue(spec.radius)
+        self.gravity.setValue(spec.gravity)
+        self.enable_rescale.setChecked(spec.enable_rescale)
+        self.rescale_factor.setValue(spec.rescale_factor)
+        self.time_warp_levels = [tuple(level) for level in spec.time_warp_levels]
+        self.update_time_warp_display()
+
+        self.has_atmosphere.setCurrentText("Yes" if spec.has_atmosphere else "No")
+        self.atmosphere_height.setValue(spec.atmosphere_height)
+        self.atmosphere_temp.setValue(spec.atmosphere_temp)
+        self.static_pressure.setValue(spec.static_pressure)
+        self.atmo_ambient_color.setStyleSheet(f"background-color: {spec.ambient_color}")
+        self.atmo_light_color.setStyleSheet(f"background-color: {spec.light_color}")
+        self.atmo_pressure_curve.setPlainText(spec.pressure_curve)
+        self.atmo_temp_curve.setPlainText(spec.temperature_curve)
+        self.scale_height.setValue(spec.scale_height)
+        self.lapse_rate.setValue(spec.lapse_rate)
+
+        # The parent body fills in a stock GM, so the saved one goes in after it
+        self.parent_body.setText(spec.parent_body)
+        self.parent_gravitational_parameter.setText(ui_state.get('parent_gravitational_parameter',
+                                                                 self.parent_gravitational_parameter.text()))
+        self.semi_major_axis.setValue(spec.semi_major_axis)
+        self.eccentricity.setValue(spec.eccentricity)
+        self.inclination.setValue(spec.inclination)
+        self.orbit_model.update(center_offset=QPointF(*ui_state.get('center_offset', (0, 0))))
+
+        self.clear_biomes()
+        for biome in spec.biomes:
+            self.add_biome_row(biome.name, biome.color)
+        self.set_texture_fields({'color_map': spec.color_map, 'height_map': spec.height_map,
+                                 'normal_map': spec.normal_map, 'biome_map': spec.biome_map,
+                                 'generate_mipmaps': spec.generate_mipmaps,
+                                 'min_elevation': spec.min_elevation, 'max_elevation': spec.max_elevation,
+                                 'generate_normal_map': spec.generate_normal_map,
+                                 'normal_strength': spec.normal_strength})
+
+    def watch_for_changes(self, root):
+        """Schedule an autosave whenever an input under root is edited"""
+        for widget in root.findChildren(QLineEdit):
+            widget.textChanged.connect(self.autosaver.schedule)
+        for widget in root.findChildren(QTextEdit):
+            if not widget.isReadOnly():
+                widget.textChanged.connect(self.autosaver.schedule)
+        for widget in root.findChildren(QSpinBox) + root.findChildren(QDoubleSpinBox):
+            widget.valueChanged.connect(self.autosaver.schedule)
+        for widget in root.findChildren(QComboBox):
+            widget.currentIndexChanged.connect(self.autosaver.schedule)
+        for widget in root.findChildren(QCheckBox):
+            widget.toggled.connect(self.autosaver.schedule)
+
+    def update_window_title(self):
+        path = self.autosaver.path
+        self.setWindowTitle(f"{os.path.basename(path)} - KSP Planet Creator" if path else "KSP Planet Creator")
+
+    def open_project(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Open Project", "", f"Planet Projects (*{PROJECT_SUFFIX})")
+        if not file_name:
+            return
+        try:
+            spec, ui_state = load_project(file_name)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Open Failed", f"Could not open {file_name}:\n{e}")
+            return
+        self.autosaver.set_path(None)
+        self.apply_project(spec, ui_state)
+        self.autosaver.set_path(file_name, self.autosaver.key(*self.project_snapshot()))
+        self.update_window_title()
+
+    def save_project(self):
+        if self.autosaver.path is None:
+            self.save_project_as()
+        else:
+            self.autosaver.save_if_changed()
+
+    def save_project_as(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Project", "", f"Planet Projects (*{PROJECT_SUFFIX})")
+        if not file_name:
+            return
+        if not file_name.endswith(PROJECT_SUFFIX):
+            file_name += PROJECT_SUFFIX
+        # Saved like an autosave, so copying large textures into the store does not block the window
+        self.autosaver.set_path(file_name)
+        self.autosaver.save_if_changed()
+        self.update_window_title()
+
+    def closeEvent(self, event):
+        self.autosaver.flush()
+        super().closeEvent(event)
+
+    def generate_config(self, texture_names=None):
+        return generate_config(self.to_planet_spec(), texture_names)
 
     def save_config(self):
-        config = generate_config(self)
         file_name, _ = QFileDialog.getSaveFileName(self, "Save Kopernicus Config", "", "Config Files (*.cfg)")
         if file_name:
-            with open(file_name, 'w') as f:
-                f.write(config)
-        
             # Copy and convert texture files to the same directory as the config file
             config_dir = os.path.dirname(file_name)
-            for texture_field in [self.color_map, self.height_map, self.normal_map]:
-                texture_path = texture_field.text()
-                if texture_path:
-                    texture_filename = os.path.basename(texture_path)
-                    base_name, _ = os.path.splitext(texture_filename)
-                    destination = os.path.join(config_dir, base_name + '.dds')
-                    try:
-                        convert_to_dds(texture_path, destination)
-                        # Update the config file with the new DDS filename
-                        with open(file_name, 'r') as f:
-                            config_content = f.read()
-                        config_content = config_content.replace(texture_filename, base_name + '.dds')
-                        with open(file_name, 'w') as f:
-                            f.write(config_content)
-                    except Exception as e:
-                        print(f"Error converting {texture_path} to DDS: {e}")
+            planet = self.to_planet_spec()
+            self.run_in_background("Measuring height map...", vertex_height_map_settings, planet)
+            jobs = {}
+            for tex_type, texture_path in planet.texture_paths().items():
+                base_name, _ = os.path.splitext(os.path.basename(texture_path))
+                if tex_type == 'normal' and planet.generate_normal_map:
+                    base_name += '_normal'
+                jobs[tex_type] = (texture_path, os.path.join(config_dir, base_name + texture_extension(tex_type)))
+
+            results = self.convert_textures(jobs, texture_options(planet, jobs)) if jobs else {}
+            if results is None:
+                return
+            for tex_type, error in results.items():
+                if error is not None:
+                    print(f"Error converting {jobs[tex_type][0]} to DDS: {error}")
+
+            write_text_atomic(file_name, generate_config(planet, exported_texture_names(jobs, results)))
+
+    def convert_textures(self, jobs, options, files=None):
+        """
+        Convert textures to DDS in a process pool while showing a cancellable progress dialog.
+
+        Args:
+            jobs (dict): Maps texture type to a (source path, destination path) tuple
+            options (dict): Maps texture type to its options, see texture_options()
+            files (dict, optional): Filled with the build manifest's file_record()
+                                    of each conversion, hashed by its worker
+
+        Returns:
+            dict: Maps texture type to the exception raised by its conversion, or None
+                  on success. Returns None if the user cancelled.
+        """
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        progress = QProgressDialog("Converting textures...", "Cancel", 0, len(jobs), self)
+        progress.setWindowTitle("Creating Mod Folder")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        executor = ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1))
+        trace = tracing.enabled()
+        export = export_texture if files is None else export_texture_record
+        futures = {executor.submit(tracing.call_traced, trace, f"{tex_type} texture", export,
+                                   source, destination, options[tex_type]): tex_type
+                   for tex_type, (source, destination) in jobs.items()}
+        pending = set(futures)
+        results = {}
+        try:
+            while pending and not progress.wasCanceled():
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tex_type = futures[future]
+                    error = future.exception()
+                    tracing.merge(future.result()[1] if error is None else getattr(error, 'trace_events', None))
+                    if error is None and files is not None:
+                        files[tex_type] = future.result()[0]
+                    results[tex_type] = error
+                    progress.setLabelText(f"Converted {tex_type} map ({len(results)}/{len(jobs)})")
+                progress.setValue(len(results))
+                QApplication.processEvents()
+        finally:
+            # Queued conversions are dropped. Running ones cannot be stopped, so they are
+            # waited for rather than left to replace the output of a later build.
+            executor.shutdown(wait=False, cancel_futures=True)
+            progress.close()
+            if pending:
+                self.run_in_background("Cancelling texture conversion...", wait_until_done, pending)
+
+        if pending:
+            return None
+        return results
+
+    def run_in_background(self, label, func, *args):
+        """
+        Run func on a worker thread, keeping the window responsive behind a busy
+        progress dialog if it takes more than a moment.
+
+        Returns:
+            func's result, its exceptions are raised here
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(func, *args)
+            if not wait([future], timeout=0.2).done:
+                progress = QProgressDialog(label, None, 0, 0, self)
+                progress.setWindowTitle("Creating Mod Folder")
+                progress.setWindowModality(Qt.WindowModality.WindowModal)
+                progress.setMinimumDuration(0)
+                progress.setValue(0)
+                try:
+                    while not wait([future], timeout=0.05).done:
+                        QApplication.processEvents()
+                finally:
+                    progress.close()
+        return future.result()
 
     def create_mod_folder_structure(self, config_name, save_path):
-        mod_name = f"{config_name}Pack"
-        mod_folder = os.path.join(save_path, mod_name)
-    
-        folders = {
-            'config': os.path.join(mod_folder, 'GameData', mod_name, 'Config'),
-            'textures': os.path.join(mod_folder, 'GameData', mod_name, 'Textures'),
-            'cache': os.path.join(mod_folder, 'GameData', mod_name, 'Cache')
-        }
-    
-        for folder in folders.values():
-            os.makedirs(folder, exist_ok=True)
-        
-        return mod_folder, folders
+        return create_mod_folder_structure(config_name, save_path)
 
     def save_complete_mod(self):
         if not self.planet_name.text():
@@ -400,58 +967,44 @@ class PlanetCreator(QMainWindow):
             return
 
         # Create mod folder structure
-        mod_folder, folders = self.create_mod_folder_structure(self.planet_name.text(), save_path)
-    
-        # Save config file
-        config = self.generate_config()
-        config_file = os.path.join(folders['config'], f"{self.planet_name.text()}.cfg")
-        with open(config_file, 'w') as f:
-            f.write(config)
+        with tracing.span("folders"):
+            mod_folder, folders = self.create_mod_folder_structure(self.planet_name.text(), save_path)
     
         # Process and save textures
-        texture_fields = {
-            'color': (self.color_map, 'colormap'),
-            'height': (self.height_map, 'heightmap'),
-            'normal': (self.normal_map, 'normalmap')
-        }
-    
-        for tex_type, (field, suffix) in texture_fields.items():
-            texture_path = field.text()
-            if texture_path:
-                # Generate standardized texture name
-                base_name = f"{self.planet_name.text()}_{suffix}"
-                dds_path = os.path.join(folders['textures'], f"{base_name}.dds")
-            
-                try:
-                    self.convert_to_dds(texture_path, dds_path)
-                    # Update config file with correct texture path
-                    with open(config_file, 'r') as f:
-                        config_content = f.read()
-                    old_name = os.path.splitext(os.path.basename(texture_path))[0]
-                    config_content = config_content.replace(old_name, base_name)
-                    with open(config_file, 'w') as f:
-                        f.write(config_content)
-                except Exception as e:
-                    print(f"Error processing {tex_type} texture: {e}")
+        with tracing.span("manifest check"):
+            planet = self.to_planet_spec()
+            jobs = texture_jobs(planet, folders['textures'])
+            # A height map seen for the first time takes a pass over every pixel. Its statistics
+            # are cached, so texture_options() and the config only read them afterwards.
+            self.run_in_background("Measuring height map...", vertex_height_map_settings, planet)
+
+            # Only convert textures that changed since the last build of this mod. A
+            # touched source is hashed to tell, so the check runs off the GUI thread.
+            manifest = TextureManifest(folders['cache'])
+            options = texture_options(planet, jobs)
+            pending = self.run_in_background("Checking textures...", manifest.pending_jobs, jobs, options)
+
+        files = {}
+        with tracing.span("convert textures", count=len(pending)):
+            results = self.convert_textures(pending, options, files) if pending else {}
+        if results is None:
+            QMessageBox.warning(self, "Cancelled", "Texture conversion was cancelled. The mod folder is incomplete.")
+            return
+        with tracing.span("manifest update"):
+            manifest.update(jobs, results, options, files)
+            manifest.save()
+
+        # Point the config at the converted textures and write it once
+        for tex_type, error in results.items():
+            if error is not None:
+                print(f"Error processing {tex_type} texture: {error}")
+        with tracing.span("config"):
+            config_file = os.path.join(folders['config'], f"{planet.name}.cfg")
+            write_text_atomic(config_file, generate_config(planet, exported_texture_names(jobs, results)))
     
         # Create README file
-        readme_content = f"""# {self.planet_name.text()}Pack
-    Created with KSP Planet Creator
-
-    ## Installation
-    1. Copy the GameData folder to your Kerbal Space Program installation
-    2. Ensure Kopernicus is installed
-
-    ## Planet Details
-    - Name: {self.planet_name.text()}
-    - Parent Body: {self.parent_body.text()}
-    - Radius: {self.radius.value()} km
-    - Surface Gravity: {self.gravity.value()}g
-    """
-    
-        with open(os.path.join(mod_folder, 'README.md'), 'w') as f:
-            f.write(readme_content)
-    
+        with tracing.span("readme"), open(os.path.join(mod_folder, 'README.md'), 'w') as f:
+            f.write(readme_content(planet))
         QMessageBox.information(
             self, "Success",
             f"Mod folder created successfully at:\n{mod_folder}\n\nYou can now copy the GameData folder to your KSP installation."
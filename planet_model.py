@@ -0,0 +1,176 @@
+import os
+from dataclasses import asdict, dataclass, field, fields
+
+# Texture slots of a planet and the suffix used for the exported DDS name
+TEXTURE_SUFFIXES = {
+    'color': 'colormap',
+    'height': 'heightmap',
+    'normal': 'normalmap',
+    'biome': 'biomes',
+}
+# Slots exported as PNG instead of DDS. Kopernicus matches biome map pixels to
+# the biome colours exactly, which DXT compression would break.
+PNG_TEXTURES = {'biome'}
+
+# GM in m³/s² of the stock bodies a planet can orbit
+STOCK_GRAVITATIONAL_PARAMETERS = {
+    'Kerbol': 1.1723328e18,
+    'Moho': 1.6860938e11,
+    'Eve': 8.1717302e12,
+    'Gilly': 8.2894498e6,
+    'Kerbin': 3.5316e12,
+    'Mun': 6.5138398e10,
+    'Minmus': 1.7658e9,
+    'Duna': 3.0136321e11,
+    'Ike': 1.8568369e10,
+    'Dres': 2.1484489e10,
+    'Jool': 2.82528e14,
+    'Laythe': 1.962e12,
+    'Vall': 2.074815e11,
+    'Tylo': 2.82528e12,
+    'Bop': 2.4868349e9,
+    'Pol': 7.2170208e8,
+    'Eeloo': 7.4410815e10,
+}
+
+# Stock orbits as (parent, semi-major axis in km, eccentricity, longitude of
+# the ascending node plus argument of periapsis in degrees)
+STOCK_ORBITS = {
+    'Moho': ('Kerbol', 5263138.304, 0.2, 85),
+    'Eve': ('Kerbol', 9832684.544, 0.01, 15),
+    'Gilly': ('Eve', 31500, 0.55, 90),
+    'Kerbin': ('Kerbol', 13599840.256, 0.0, 0),
+    'Mun': ('Kerbin', 12000, 0.0, 0),
+    'Minmus': ('Kerbin', 47000, 0.0, 116),
+    'Duna': ('Kerbol', 20726155.264, 0.051, 135.5),
+    'Ike': ('Duna', 3200, 0.03, 0),
+    'Dres': ('Kerbol', 40839348.203, 0.145, 10),
+    'Jool': ('Kerbol', 68773560.32, 0.05, 52),
+    'Laythe': ('Jool', 27184, 0.0, 0),
+    'Vall': ('Jool', 43152, 0.0, 0),
+    'Tylo': ('Jool', 68500, 0.0, 0),
+    'Bop': ('Jool', 128500, 0.235, 35),
+    'Pol': ('Jool', 179890, 0.171, 17),
+    'Eeloo': ('Kerbol', 90118820, 0.26, 310),
+}
+
+def texture_extension(tex_type):
+    """File extension of an exported texture slot: .dds, or .png for PNG_TEXTURES"""
+    return ".png" if tex_type in PNG_TEXTURES else ".dds"
+
+def parse_hex_color(value):
+    """
+    Parse a "#rrggbb" colour string.
+
+    Args:
+        value (str): Colour in hex notation, with or without the leading "#"
+
+    Returns:
+        tuple: (red, green, blue) as ints in 0-255
+    """
+    value = value.strip().lstrip('#')
+    if len(value) != 6:
+        raise ValueError(f"Expected a #rrggbb colour, got {value!r}")
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+@dataclass
+class Biome:
+    name: str
+    color: str = "#000000"
+
+@dataclass
+class PlanetSpec:
+    """
+    Everything needed to build a planet mod, with no dependency on Qt.
+
+    Units follow the GUI: radius and semi-major axis in km, gravity in g,
+    angles in degrees, atmosphere height in m, temperature in °C and static
+    pressure in kPa.
+    """
+    name: str
+    radius: int = 1
+    gravity: float = 0.0
+    enable_rescale: bool = False
+    rescale_factor: float = 1.0
+    time_warp_levels: list = field(default_factory=list)
+
+    parent_body: str = ""
+    semi_major_axis: float = 1.0
+    eccentricity: float = 0.0
+    inclination: float = 0.0
+    longitude_of_ascending_node: float = 0.0
+    argument_of_periapsis: float = 0.0
+
+    has_atmosphere: bool = True
+    atmosphere_height: int = 0
+    atmosphere_temp: int = 0
+    static_pressure: float = 101.325
+    ambient_color: str = "#000000"
+    light_color: str = "#000000"
+    pressure_curve: str = ""
+    temperature_curve: str = ""
+    # Physical model the curves are generated from when left empty, scale
+    # height in m and lapse rate in K per km, see atmosphere.py
+    scale_height: float = 0.0
+    lapse_rate: float = 0.0
+
+    biomes: list = field(default_factory=list)
+
+    color_map: str = ""
+    height_map: str = ""
+    normal_map: str = ""
+    generate_mipmaps: bool = False
+    # Export a normal map generated from the height map instead of normal_map,
+    # with its slopes exaggerated by normal_strength, see normal_map.py
+    generate_normal_map: bool = False
+    normal_strength: float = 1.0
+    # Kopernicus biome map, one colour per entry of biomes, see biome_map.py
+    biome_map: str = ""
+    # Real elevations in m of the height map's lowest and highest pixel, the
+    # VertexHeightMap deformity and offset follow from them when max is above min
+    min_elevation: float = 0.0
+    max_elevation: float = 0.0
+
+    def texture_paths(self):
+        """Map of texture slot to source path for the slots that are set"""
+        paths = {'color': self.color_map, 'height': self.height_map, 'normal': self.normal_map,
+                 'biome': self.biome_map}
+        if self.generate_normal_map:
+            paths['normal'] = self.height_map
+        return {tex_type: path for tex_type, path in paths.items() if path}
+
+    def to_dict(self):
+        """Plain dict of every field, the inverse of from_dict() without a base_dir"""
+        values = asdict(self)
+        values['time_warp_levels'] = [list(level) for level in self.time_warp_levels]
+        return values
+
+    @classmethod
+    def from_dict(cls, data, base_dir=None):
+        """
+        Build a spec from a plain dict such as one body of a JSON or TOML file.
+
+        Args:
+            data (dict): Field values, unknown keys raise a ValueError
+            base_dir (str, optional): Directory that relative texture paths are
+                                      resolved against
+
+        Returns:
+            PlanetSpec: The planet described by data
+        """
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown planet fields: {', '.join(sorted(unknown))}")
+        if 'name' not in data:
+            raise ValueError("Every planet needs a name")
+
+        values = dict(data)
+        values['time_warp_levels'] = sorted(tuple(level) for level in values.get('time_warp_levels', []))
+        values['biomes'] = [biome if isinstance(biome, Biome) else Biome(**biome)
+                            for biome in values.get('biomes', [])]
+        if base_dir:
+            for key in ('color_map', 'height_map', 'normal_map', 'biome_map'):
+                if values.get(key):
+                    values[key] = os.path.join(base_dir, values[key])
+        return cls(**values)
@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import threading
+from planet_model import PlanetSpec
+from utility_functions import file_content_hash, write_text_atomic
+
+PROJECT_FORMAT = 1
+PROJECT_SUFFIX = ".kpk"
+STORE_FOLDER = "TextureStore"
+STORE_INDEX_NAME = "index.json"
+# Texture slot to PlanetSpec field
+TEXTURE_FIELDS = {'color': 'color_map', 'height': 'height_map', 'normal': 'normal_map', 'biome': 'biome_map'}
+
+class TextureStore:
+    """
+    Content-addressed copies of the textures used by projects.
+
+    A texture is stored once under its content hash, in
+    <hash[:2]>/<hash>/<file name>, so projects keep working after the source
+    files move and a texture shared by several projects in the same folder is
+    only copied once. The same content under another file name is a hard link
+    where the file system allows it. Hashes of source files are remembered
+    with their size and mtime, so an unchanged texture is never read again.
+    """
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Folder of the store, created on the first add
+        """
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, STORE_INDEX_NAME)
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_changed = False
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def object_path(self, digest, name):
+        return os.path.join(self.root, digest[:2], digest, name)
+
+    def stored_digest(self, path):
+        """Hash of a path that already points into this store, read from its folder name, else None"""
+        folder = os.path.dirname(os.path.abspath(path))
+        if os.path.dirname(os.path.dirname(folder)) != self.root:
+            return None
+        digest = os.path.basename(folder)
+        return digest if os.path.basename(os.path.dirname(folder)) == digest[:2] else None
+
+    def hash_file(self, path):
+        """
+        Content hash of a file, reusing the last one while size and mtime match.
+
+        Args:
+            path (str): File to hash
+
+        Returns:
+            str: Hex digest, see file_content_hash()
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._load_index().get(path)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+
+        digest = file_content_hash(path)
+        with self._lock:
+            self._load_index()[path] = [stat.st_size, stat.st_mtime_ns, digest]
+            self._index_changed = True
+        return digest
+
+    def add(self, path):
+        """
+        Store a texture unless its content is already there.
+
+        Args:
+            path (str): Source texture
+
+        Returns:
+            tuple: (content hash, path of the stored copy)
+        """
+        name = os.path.basename(path)
+        digest = self.stored_digest(path)
+        if digest is not None and os.path.exists(path):
+            return digest, os.path.abspath(path)
+
+        digest = self.hash_file(path)
+        target = self.object_path(digest, name)
+        if os.path.exists(target):
+            return digest, target
+
+        folder = os.path.dirname(target)
+        os.makedirs(folder, exist_ok=True)
+        existing = [entry for entry in os.listdir(folder) if not entry.endswith('.tmp')]
+        temp_path = target + '.tmp'
+        try:
+            if existing:
+                try:
+                    os.link(os.path.join(folder, existing[0]), temp_path)
+                except OSError:
+                    shutil.copyfile(os.path.join(folder, existing[0]), temp_path)
+            else:
+                # A copy, not a link, so editing the source in place cannot change the stored texture
+                shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest, target
+
+    def save_index(self):
+        """Write the remembered hashes if any were added"""
+        with self._lock:
+            if not self._index_changed:
+                return
+            text = json.dumps(self._index, indent=1)
+            self._index_changed = False
+        os.makedirs(self.root, exist_ok=True)
+        write_text_atomic(self.index_path, text)
+
+def store_for(project_path):
+    """The texture store shared by the projects in a project's folder"""
+    return TextureStore(os.path.join(os.path.dirname(os.path.abspath(project_path)), STORE_FOLDER))
+
+def project_document(spec, ui_state, store):
+    """
+    Everything a project file holds, with textures moved into the store.
+
+    Args:
+        spec (PlanetSpec): The planet
+        ui_state (dict): Editor state that is not part of the planet, such
+                         as the orbit view offset
+        store (TextureStore): Where textures are kept
+
+    Returns:
+        dict: JSON-ready project document
+    """
+    planet = spec.to_dict()
+    textures = {}
+    for tex_type, key in TEXTURE_FIELDS.items():
+        path = planet.pop(key)
+        if path:
+            digest, stored = store.add(path)
+            textures[tex_type] = {'hash': digest, 'name': os.path.basename(stored)}
+    store.save_index()
+    return {'format': PROJECT_FORMAT, 'planet': planet, 'textures': textures, 'ui': dict(ui_state)}
+
+def write_project(path, document):
+    write_text_atomic(path, json.dumps(document, indent=2))
+
+def save_project(path, spec, ui_state):
+    """
+    Save a planet and its editor state as a project.
+
+    Returns:
+        dict: The document written, see project_document()
+    """
+    document = project_document(spec, ui_state, store_for(path))
+    write_project(path, document)
+    return document
+
+def load_project(path):
+    """
+    Read a project written by save_project().
+
+    Args:
+        path (str): Project file
+
+    Returns:
+        tuple: (PlanetSpec with texture paths pointing into the store, ui state dict)
+
+    Raises:
+        ValueError: The file is not a project this version can read, or a
+                    texture is missing from the store
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    if not isinstance(document, dict) or document.get('format') != PROJECT_FORMAT:
+        raise ValueError(f"{path} is not a version {PROJECT_FORMAT} planet project")
+
+    store = store_for(path)
+    planet = dict(document.get('planet', {}))
+    for tex_type, texture in document.get('textures', {}).items():
+        stored = store.object_path(texture['hash'], texture['name'])
+        if not os.path.exists(stored):
+            raise ValueError(f"The {tex_type} map {texture['name']} is missing from {store.root}")
+        planet[TEXTURE_FIELDS[tex_type]] = stored
+    return PlanetSpec.from_dict(planet), document.get('ui', {})
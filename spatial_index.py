@@ -0,0 +1,63 @@
+import math
+import numpy as np
+
+class GridIndex:
+    """
+    Uniform grid over a set of 2D points for picking the nearest one.
+
+    Points are bucketed by cell once; a query only looks at the cells its
+    radius touches, so its cost does not grow with the number of points.
+    Choose a cell size close to the query radius.
+    """
+    def __init__(self, x, y, cell_size):
+        """
+        Bucket the points.
+
+        Args:
+            x (array-like): X coordinates
+            y (array-like): Y coordinates
+            cell_size (float): Edge length of a grid cell
+        """
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        if len(self.x) == 0:
+            return
+
+        cell_x = np.floor(self.x / self.cell_size).astype(np.int64)
+        cell_y = np.floor(self.y / self.cell_size).astype(np.int64)
+        order = np.lexsort((cell_y, cell_x))
+        sorted_x, sorted_y = cell_x[order], cell_y[order]
+        starts = np.flatnonzero(np.r_[True, (np.diff(sorted_x) != 0) | (np.diff(sorted_y) != 0)])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            self.cells[(int(sorted_x[start]), int(sorted_y[start]))] = order[start:end]
+
+    def __len__(self):
+        return len(self.x)
+
+    def nearest(self, x, y, radius):
+        """
+        Find the point closest to (x, y) within radius.
+
+        Returns:
+            int: Index of the point in the arrays the index was built from, or
+                 None if no point is that close
+        """
+        low_x = math.floor((x - radius) / self.cell_size)
+        high_x = math.floor((x + radius) / self.cell_size)
+        low_y = math.floor((y - radius) / self.cell_size)
+        high_y = math.floor((y + radius) / self.cell_size)
+        buckets = [self.cells[(cx, cy)]
+                   for cx in range(low_x, high_x + 1) for cy in range(low_y, high_y + 1)
+                   if (cx, cy) in self.cells]
+        if not buckets:
+            return None
+
+        candidates = np.concatenate(buckets) if len(buckets) > 1 else buckets[0]
+        distance = (self.x[candidates] - x) ** 2 + (self.y[candidates] - y) ** 2
+        best = int(np.argmin(distance))
+        if distance[best] > radius * radius:
+            return None
+        return int(candidates[best])
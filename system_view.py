@@ -0,0 +1,490 @@
+from dataclasses import dataclass
+import math
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QColor, QFontMetricsF, QPainter, QPen, QPixmap
+from PyQt6.QtCore import Qt, QPointF, QRectF, pyqtSignal
+
+from orbit_widgets import array_polygon
+from planet_model import STOCK_ORBITS
+from spatial_index import GridIndex
+
+# Orbits smaller than this on screen are skipped, along with everything orbiting inside them
+MIN_ORBIT_PIXELS = 4
+# At most this many orbits are drawn, the smallest ones on screen go first
+MAX_ORBITS = 200
+# Largest gap in pixels allowed between a polyline chord and the true orbit
+CHORD_TOLERANCE = 0.25
+MIN_SEGMENTS = 16
+MAX_SEGMENTS = 512
+# Orbits this many half window diagonals across are only drawn over the arc
+# that can be on screen, widened by ARC_MARGIN
+HUGE_ORBIT_WINDOWS = 8
+ARC_MARGIN = 1.5
+LABEL_MIN_PIXELS = 40
+MAX_LABELS = 150
+PICK_RADIUS = 8
+MARKER_RADIUS = 7
+LABEL_OFFSET = QPointF(6, -6)
+
+@dataclass
+class SystemBody:
+    name: str
+    parent: str = ""
+    semi_major_axis: float = 0.0
+    eccentricity: float = 0.0
+    # Direction of periapsis in the view in degrees, the longitude of the
+    # ascending node plus the argument of periapsis
+    angle: float = 0.0
+    editable: bool = False
+    # Dragging only resizes the orbit, for bodies whose direction is set elsewhere
+    angle_locked: bool = False
+
+def system_bodies(specs):
+    """
+    Bodies for a system view: the given planets plus every stock body they
+    orbit directly or indirectly. Parents that are neither become roots.
+
+    Args:
+        specs (list): PlanetSpec objects
+
+    Returns:
+        list: SystemBody objects
+    """
+    bodies = {}
+    for spec in specs:
+        bodies[spec.name] = SystemBody(spec.name, spec.parent_body, spec.semi_major_axis, spec.eccentricity,
+                                       spec.longitude_of_ascending_node + spec.argument_of_periapsis, True)
+
+    pending = [body.parent for body in bodies.values()]
+    while pending:
+        name = pending.pop()
+        if not name or name in bodies:
+            continue
+        if name in STOCK_ORBITS:
+            parent, semi_major_axis, eccentricity, angle = STOCK_ORBITS[name]
+            bodies[name] = SystemBody(name, parent, semi_major_axis, eccentricity, angle)
+            pending.append(parent)
+        else:
+            bodies[name] = SystemBody(name)
+    return list(bodies.values())
+
+def nearest_ellipse_parameter(center, a, b, cos_angle, sin_angle, point, tolerance):
+    """
+    Find the point of each ellipse closest to a given point.
+
+    A coarse-to-fine search over whole arrays of ellipses: each round samples
+    65 parameters around the best one so far and narrows the range 16 times.
+
+    Args:
+        center (np.ndarray): (count, 2) ellipse centers
+        a, b (np.ndarray): Semi-axes
+        cos_angle, sin_angle (np.ndarray): Rotation of each ellipse
+        point (tuple): The point to get close to
+        tolerance (float): Acceptable distance along the largest ellipse
+
+    Returns:
+        np.ndarray: Parameter t of the closest point of each ellipse
+    """
+    middle = np.zeros(len(a))
+    half_width = math.pi
+    samples = np.linspace(-1, 1, 65)
+    rows = np.arange(len(a))
+    while True:
+        t = middle[:, None] + half_width * samples
+        ellipse_x = a[:, None] * np.cos(t)
+        ellipse_y = b[:, None] * np.sin(t)
+        dx = center[:, 0, None] + ellipse_x * cos_angle[:, None] - ellipse_y * sin_angle[:, None] - point[0]
+        dy = center[:, 1, None] + ellipse_x * sin_angle[:, None] + ellipse_y * cos_angle[:, None] - point[1]
+        middle = t[rows, np.argmin(dx * dx + dy * dy, axis=1)]
+        step = half_width / 32
+        if step * a.max() < tolerance:
+            return middle
+        half_width = 2 * step
+
+class SystemLayout:
+    """
+    Positions of every body of a system in km, with the roots at the origin.
+
+    Bodies are sorted so parents come before their children and positions are
+    computed one hierarchy level at a time over whole arrays. Every body is
+    placed at its periapsis, where it is at epoch with a mean anomaly of 0.
+    """
+    def __init__(self, bodies):
+        by_name = {body.name: body for body in bodies}
+        depth = {}
+        for body in bodies:
+            chain, name = [], body.name
+            while name in by_name and name not in depth and name not in chain:
+                chain.append(name)
+                name = by_name[name].parent
+            base = depth.get(name, -1)
+            for offset, link in enumerate(reversed(chain)):
+                depth[link] = base + 1 + offset
+
+        self.bodies = sorted(bodies, key=lambda body: depth[body.name])
+        self.index = {body.name: i for i, body in enumerate(self.bodies)}
+        self.parent = np.array([self.index.get(body.parent, -1) for body in self.bodies], dtype=np.int64)
+        self.depth = np.array([depth[body.name] for body in self.bodies], dtype=np.int64)
+        # A parent cycle has no root, so it is cut where the walk found it
+        self.parent[self.depth == 0] = -1
+
+        self.semi_major_axis = np.array([body.semi_major_axis for body in self.bodies], dtype=np.float64)
+        self.eccentricity = np.array([body.eccentricity for body in self.bodies], dtype=np.float64)
+        self.angle = np.radians([body.angle for body in self.bodies]).astype(np.float64)
+        self.editable = np.array([body.editable for body in self.bodies], dtype=bool)
+        # Bumped on every change, so views can tell an edited layout from the one they cached
+        self.revision = 0
+        self.compute()
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def compute(self):
+        """Recompute positions after orbits changed"""
+        count = len(self.bodies)
+        self.position = np.zeros((count, 2))
+        self.orbit_center = np.zeros((count, 2))
+        self.semi_minor_axis = self.semi_major_axis * np.sqrt(1 - self.eccentricity**2)
+        direction = np.stack([np.cos(self.angle), np.sin(self.angle)], axis=1)
+        focus_offset = self.semi_major_axis * self.eccentricity
+        for level in range(1, int(self.depth.max(initial=0)) + 1):
+            bodies = np.flatnonzero(self.depth == level)
+            parents = self.position[self.parent[bodies]]
+            self.orbit_center[bodies] = parents - direction[bodies] * focus_offset[bodies, None]
+            self.position[bodies] = parents + direction[bodies] * (self.semi_major_axis - focus_offset)[bodies, None]
+        self.orbit_center[self.depth == 0] = self.position[self.depth == 0]
+
+    def set_orbit(self, index, semi_major_axis, angle):
+        """Move one body, and with it everything orbiting it"""
+        body = self.bodies[index]
+        body.semi_major_axis = semi_major_axis
+        body.angle = angle
+        self.semi_major_axis[index] = semi_major_axis
+        self.angle[index] = math.radians(angle)
+        self.revision += 1
+        self.compute()
+
+class SystemView(QWidget):
+    """
+    Top-down view of a whole planetary system.
+
+    Cost follows what is on screen, not the body count. Orbits smaller than a
+    few pixels are skipped together with their moons, orbits off screen are
+    culled, the smallest orbits are dropped when more than MAX_ORBITS are on
+    screen, polyline detail follows on-screen size, and huge orbits are only
+    sampled along the arc near the window. Hover and drag picking go through
+    a grid index over the bodies on screen. The drawn system is cached in a
+    pixmap, so hovering and selecting only repaint around the markers.
+
+    Drag a planet to move its orbit, drag empty space to pan and use the
+    wheel to zoom.
+    """
+    bodyChanged = pyqtSignal(object)
+    bodySelected = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(400, 400)
+        self.setMouseTracking(True)
+        self.system = SystemLayout([])
+        # Bumped by every change to what is drawn that the view position doesn't show
+        self.revision = 0
+        self.view_center = np.zeros(2)
+        self.zoom = 1.0
+        self.hovered = None
+        self.selected = None
+        self.drag_body = None
+        self.last_pos = None
+
+        self._visible = None
+        self._visible_key = None
+        self._index = None
+        self._index_key = None
+        self._arc_steps = {}
+        self._layer = None
+        self._layer_key = None
+        self._painted_key = None
+        self._last_paint_changed = False
+        self.paint_count = 0
+        self.layer_renders = 0
+        self.drawn_orbits = 0
+
+    def set_bodies(self, bodies, fit=False):
+        """
+        Show a new set of bodies.
+
+        Args:
+            bodies (list): SystemBody objects, see system_bodies()
+            fit (bool): Zoom to show the whole system
+        """
+        selected = self.system.bodies[self.selected].name if self.selected is not None else None
+        self.system = SystemLayout(bodies)
+        self.selected = self.system.index.get(selected)
+        self.hovered = None
+        self.invalidate()
+        if fit:
+            self.fit_view()
+
+    def fit_view(self):
+        if len(self.system) == 0:
+            return
+        reach = np.abs(self.system.position).max() + self.system.semi_major_axis.max()
+        self.view_center = np.zeros(2)
+        self.zoom = min(self.width(), self.height()) / (2.2 * max(reach, 1.0))
+        self.invalidate()
+
+    def invalidate(self):
+        self.revision += 1
+        self._visible_key = None
+        self._index_key = None
+        self.update()
+
+    def screen_to_world(self, point):
+        return np.array([(point.x() - self.width() / 2) / self.zoom + self.view_center[0],
+                         (point.y() - self.height() / 2) / self.zoom + self.view_center[1]])
+
+    def visible_bodies(self):
+        """
+        Work out what is on screen for the current view.
+
+        Returns:
+            tuple: (screen positions of all bodies, screen orbit centers, mask of
+                   bodies to draw, mask of orbits to draw)
+        """
+        key = (self.view_center[0], self.view_center[1], self.zoom, self.width(), self.height(),
+               self.revision, self.system.revision)
+        if key == self._visible_key:
+            return self._visible
+
+        system = self.system
+        offset = np.array([self.width() / 2, self.height() / 2]) - self.view_center * self.zoom
+        position = system.position * self.zoom + offset
+        center = system.orbit_center * self.zoom + offset
+        radius = system.semi_major_axis * self.zoom
+
+        on_screen = ((center[:, 0] + radius >= 0) & (center[:, 0] - radius <= self.width()) &
+                     (center[:, 1] + radius >= 0) & (center[:, 1] - radius <= self.height()))
+        shown = self.shown_bodies(radius, MIN_ORBIT_PIXELS)
+        orbits = shown & on_screen & (system.depth > 0)
+        if orbits.sum() > MAX_ORBITS:
+            # Raise the size limit until the busiest views fit the budget
+            limit = np.partition(radius[orbits], -MAX_ORBITS)[-MAX_ORBITS]
+            shown = self.shown_bodies(radius, limit)
+            orbits = shown & on_screen & (system.depth > 0)
+        bodies = shown & ((position[:, 0] >= -PICK_RADIUS) & (position[:, 0] <= self.width() + PICK_RADIUS) &
+                          (position[:, 1] >= -PICK_RADIUS) & (position[:, 1] <= self.height() + PICK_RADIUS))
+
+        self._visible = position, center, bodies, orbits
+        self._visible_key = key
+        return self._visible
+
+    def shown_bodies(self, radius, min_radius):
+        """A body is shown only if its orbit and every orbit above it are at least min_radius"""
+        system = self.system
+        shown = system.depth == 0
+        for level in range(1, int(system.depth.max(initial=0)) + 1):
+            bodies = np.flatnonzero(system.depth == level)
+            shown[bodies] = shown[system.parent[bodies]] & (radius[bodies] >= min_radius)
+        return shown
+
+    def pick(self, point):
+        """Index of the body under a widget position, or None"""
+        position, _, bodies, _ = self.visible_bodies()
+        if self._index_key != self._visible_key:
+            candidates = np.flatnonzero(bodies)
+            self._index = (candidates, GridIndex(position[candidates, 0], position[candidates, 1], 2 * PICK_RADIUS))
+            self._index_key = self._visible_key
+        candidates, index = self._index
+        found = index.nearest(point.x(), point.y(), PICK_RADIUS)
+        return None if found is None else int(candidates[found])
+
+    def arc_steps(self, segments):
+        """Evenly spaced fractions of an arc's half-span, -1 to 1"""
+        if segments not in self._arc_steps:
+            self._arc_steps[segments] = np.linspace(-1, 1, segments + 1)
+        return self._arc_steps[segments]
+
+    def draw_orbits(self, painter, center, orbits):
+        system = self.system
+        indices = np.flatnonzero(orbits)
+        self.drawn_orbits = len(indices)
+        if len(indices) == 0:
+            return
+
+        a = system.semi_major_axis[indices] * self.zoom
+        b = system.semi_minor_axis[indices] * self.zoom
+        cos_angle, sin_angle = np.cos(system.angle[indices]), np.sin(system.angle[indices])
+
+        # Orbits up to a few windows across are drawn whole. Huge ones, seen when
+        # zoomed in on a moon, are only sampled along the arc that can be on
+        # screen, around their point closest to the window center.
+        half_diagonal = math.hypot(self.width(), self.height()) / 2
+        middle = np.zeros(len(indices))
+        span = np.full(len(indices), math.pi)
+        huge = np.flatnonzero(b > HUGE_ORBIT_WINDOWS * half_diagonal)
+        if len(huge):
+            window_center = (self.width() / 2, self.height() / 2)
+            middle[huge] = nearest_ellipse_parameter(center[indices[huge]], a[huge], b[huge], cos_angle[huge],
+                                                     sin_angle[huge], window_center, half_diagonal / 4)
+            # Every step dt moves at least b dt along the ellipse
+            span[huge] = np.minimum(math.pi, ARC_MARGIN * 2 * half_diagonal / b[huge])
+        # A chord spanning dt of a circle of radius a strays a (1 - cos(dt/2)) ~ a dt²/8 from it
+        segments = span * np.sqrt(a / (2 * CHORD_TOLERANCE))
+        segments = np.clip(2 ** np.ceil(np.log2(np.maximum(segments, 1))),
+                           MIN_SEGMENTS, MAX_SEGMENTS).astype(np.int64)
+
+        painter.setPen(QPen(QColor(120, 120, 120), 1))
+        for count in np.unique(segments).tolist():
+            group = np.flatnonzero(segments == count)
+            t = middle[group, None] + span[group, None] * self.arc_steps(count)
+            ellipse_x = a[group, None] * np.cos(t)
+            ellipse_y = b[group, None] * np.sin(t)
+            x = center[indices[group], 0, None] + ellipse_x * cos_angle[group, None] - ellipse_y * sin_angle[group, None]
+            y = center[indices[group], 1, None] + ellipse_x * sin_angle[group, None] + ellipse_y * cos_angle[group, None]
+            for row in range(len(group)):
+                painter.drawPolyline(array_polygon(x[row], y[row]))
+
+    def draw_labels(self, painter, position, bodies):
+        system = self.system
+        radius = system.semi_major_axis * self.zoom
+        candidates = np.flatnonzero(bodies & ((radius >= LABEL_MIN_PIXELS) | (system.depth == 0)))
+        if len(candidates) > MAX_LABELS:
+            candidates = candidates[np.argsort(-radius[candidates])[:MAX_LABELS]]
+
+        painter.setPen(QPen(self.palette().windowText().color()))
+        for i in candidates.tolist():
+            painter.drawText(QPointF(*position[i]) + LABEL_OFFSET, system.bodies[i].name)
+
+    def draw_system(self, painter):
+        """Draw orbits, bodies and labels, everything but the hover and selection markers"""
+        position, center, bodies, orbits = self.visible_bodies()
+        self.draw_orbits(painter, center, orbits)
+
+        editable = self.system.editable
+        for mask, color, width in ((bodies & (self.system.depth == 0), Qt.GlobalColor.darkYellow, 12),
+                                   (bodies & ~editable & (self.system.depth > 0), Qt.GlobalColor.blue, 6),
+                                   (bodies & editable, Qt.GlobalColor.darkGreen, 6)):
+            painter.setPen(QPen(color, width))
+            painter.drawPoints(array_polygon(position[mask, 0], position[mask, 1]))
+
+        self.draw_labels(painter, position, bodies)
+
+    def render_layer(self, key):
+        """Draw the system into the cached pixmap at the widget's device pixel ratio"""
+        ratio = key[1]
+        layer = QPixmap(max(1, math.ceil(self.width() * ratio)), max(1, math.ceil(self.height() * ratio)))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.font())
+        self.draw_system(painter)
+        painter.end()
+
+        self._layer = layer
+        self._layer_key = key
+        self.layer_renders += 1
+
+    def marker_rect(self, index):
+        """Widget area covered by the hover or selection marker and label of a body"""
+        if index is None:
+            return QRectF()
+        position = QPointF(*self.visible_bodies()[0][index])
+        metrics = QFontMetricsF(self.font())
+        label = metrics.boundingRect(self.system.bodies[index].name).translated(position + LABEL_OFFSET)
+        margin = MARKER_RADIUS + 2
+        return QRectF(position.x() - margin, position.y() - margin, 2 * margin, 2 * margin).united(label)
+
+    def update_markers(self, *indices):
+        area = QRectF()
+        for index in indices:
+            area = area.united(self.marker_rect(index))
+        self.update(area.toAlignedRect().adjusted(-1, -1, 1, 1))
+
+    def set_hovered(self, index):
+        if index != self.hovered:
+            self.update_markers(self.hovered, index)
+            self.hovered = index
+
+    def set_selected(self, index):
+        if index != self.selected:
+            self.update_markers(self.selected, index)
+            self.selected = index
+
+    def paintEvent(self, event):
+        self.paint_count += 1
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if len(self.system) == 0:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No bodies to show")
+            return
+
+        position = self.visible_bodies()[0]
+        key = (self._visible_key, self.devicePixelRatioF())
+        changed = key != self._painted_key
+        if key != self._layer_key and changed and self._last_paint_changed:
+            # While panning, zooming or dragging a body the view changes every
+            # frame, caching it would only add a render and a blit per frame
+            self.draw_system(painter)
+        else:
+            if key != self._layer_key:
+                self.render_layer(key)
+            painter.drawPixmap(0, 0, self._layer)
+        self._painted_key = key
+        self._last_paint_changed = changed
+
+        for i, color in ((self.selected, Qt.GlobalColor.red), (self.hovered, Qt.GlobalColor.magenta)):
+            if i is not None:
+                painter.setPen(QPen(color, 2))
+                painter.drawEllipse(QPointF(*position[i]), MARKER_RADIUS, MARKER_RADIUS)
+                painter.setPen(QPen(self.palette().windowText().color()))
+                painter.drawText(QPointF(*position[i]) + LABEL_OFFSET, self.system.bodies[i].name)
+
+    def mousePressEvent(self, event):
+        self.last_pos = event.position()
+        found = self.pick(event.position())
+        if found != self.selected:
+            self.set_selected(found)
+            if found is not None:
+                self.bodySelected.emit(self.system.bodies[found])
+        # Root bodies have no parent to orbit, so there is nothing to drag them around
+        if found is not None and self.system.bodies[found].editable and self.system.parent[found] >= 0:
+            self.drag_body = found
+
+    def mouseMoveEvent(self, event):
+        if self.drag_body is not None:
+            parent = self.system.parent[self.drag_body]
+            relative = self.screen_to_world(event.position()) - self.system.position[parent]
+            distance = float(np.hypot(*relative))
+            if distance > 0:
+                # The body sits at periapsis, a(1 - e) from its parent
+                eccentricity = self.system.eccentricity[self.drag_body]
+                body = self.system.bodies[self.drag_body]
+                angle = body.angle if body.angle_locked else math.degrees(math.atan2(relative[1], relative[0]))
+                self.system.set_orbit(self.drag_body, distance / (1 - eccentricity), angle)
+                self.invalidate()
+                self.bodyChanged.emit(self.system.bodies[self.drag_body])
+        elif event.buttons() & Qt.MouseButton.LeftButton and self.last_pos is not None:
+            delta = event.position() - self.last_pos
+            self.view_center = self.view_center - np.array([delta.x(), delta.y()]) / self.zoom
+            self.last_pos = event.position()
+            self.invalidate()
+        else:
+            self.set_hovered(self.pick(event.position()))
+
+    def mouseReleaseEvent(self, event):
+        self.drag_body = None
+        self.last_pos = None
+
+    def wheelEvent(self, event):
+        # Zoom around the cursor so the point under it stays put
+        anchor = self.screen_to_world(event.position())
+        self.zoom *= 1.2 ** (event.angleDelta().y() / 120)
+        self.view_center = anchor - (self.screen_to_world(event.position()) - self.view_center)
+        self.invalidate()
+
+    def resizeEvent(self, event):
+        # The size is part of the view key, so nothing drawn goes stale
+        self.update()
@@ -0,0 +1,158 @@
+import struct
+import warnings
+import zlib
+import numpy as np
+import pytest
+from PIL import Image
+
+import dds_encoder
+from dds_encoder import can_read_in_strips, iter_image_strips, write_dds, write_dds_streaming
+from utility_functions import convert_to_dds
+
+# Odd sizes, so the last strip is short and the mip chain has odd levels
+WIDTH, HEIGHT = 50, 37
+
+# (file name, Pillow mode) of every uncompressed layout the strip reader
+# reads straight from the file, and every PNG layout it decodes in strips.
+# "P;4" is a 4-bit palette and "P+tRNS" a palette with a transparent entry.
+FORMATS = [
+    ("rgb.bmp", "RGB"),
+    ("palette.bmp", "P"),
+    ("rgb.tga", "RGB"),
+    ("rgba.tga", "RGBA"),
+    ("rgb.ppm", "RGB"),
+    ("gray.pgm", "L"),
+    ("rgb.tif", "RGB"),
+    ("rgba.tif", "RGBA"),
+    ("gray.tif", "L"),
+    ("rgb.png", "RGB"),
+    ("rgba.png", "RGBA"),
+    ("gray.png", "L"),
+    ("gray_alpha.png", "LA"),
+    ("bilevel.png", "1"),
+    ("gray16.png", "I;16"),
+    ("palette.png", "P"),
+    ("palette4.png", "P;4"),
+    ("transparent.png", "P+tRNS"),
+]
+
+def write_sample(folder, name, mode, width=WIDTH, height=HEIGHT):
+    rng = np.random.default_rng(0)
+    options = {}
+    if mode == "I;16":
+        image = Image.fromarray(rng.integers(0, 65536, (height, width), dtype=np.uint16))
+    else:
+        image = Image.fromarray(rng.integers(0, 256, (height, width, 4), dtype=np.uint8), "RGBA")
+    if mode == "P;4":
+        image = image.convert("RGB").quantize(16)
+        options["bits"] = 4
+    elif mode.startswith("P"):
+        image = image.convert("RGB").quantize(64)
+        if mode == "P+tRNS":
+            options["transparency"] = 0
+    elif mode != "I;16":
+        image = image.convert(mode)
+    path = folder / name
+    image.save(path, **options)
+    return str(path)
+
+@pytest.mark.parametrize("name, mode", FORMATS)
+def test_strips_match_the_decoded_image(tmp_path, name, mode):
+    path = write_sample(tmp_path, name, mode)
+    strips = list(iter_image_strips(path, 8))
+    assert [strip.size for strip in strips] == [(WIDTH, 8)] * 4 + [(WIDTH, 5)]
+    with Image.open(path) as image:
+        expected = np.asarray(image.convert("RGBA"))
+    assert np.array_equal(np.vstack([np.asarray(strip.convert("RGBA")) for strip in strips]), expected)
+
+@pytest.mark.parametrize("name, mode", [(name, mode) for name, mode in FORMATS if name.endswith(".png")])
+def test_png_strips_keep_the_decoded_values(tmp_path, name, mode):
+    path = write_sample(tmp_path, name, mode)
+    with Image.open(path) as image:
+        assert can_read_in_strips(image)
+        expected = np.asarray(image)
+    assert np.array_equal(np.concatenate([np.asarray(strip) for strip in iter_image_strips(path, 8)]), expected)
+
+def test_png_spread_over_many_chunks_is_read_in_strips(tmp_path):
+    path = write_sample(tmp_path, "large.png", "RGB", 600, 300)
+    with open(path, 'rb') as f:
+        assert f.read().count(b"IDAT") > 1
+    with Image.open(path) as image:
+        expected = np.asarray(image)
+    assert np.array_equal(np.concatenate([np.asarray(strip) for strip in iter_image_strips(path, 7)]), expected)
+
+def test_png_strips_come_before_the_whole_file_is_decoded(tmp_path):
+    path = write_sample(tmp_path, "large.png", "RGB", 600, 300)
+    with open(path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / "truncated.png"
+    truncated.write_bytes(data[:len(data) // 2])
+    strips = iter_image_strips(str(truncated), 10)
+    with Image.open(path) as image:
+        assert np.array_equal(np.asarray(next(strips)), np.asarray(image)[:10])
+    with pytest.raises(OSError):
+        list(strips)
+
+def write_interlaced_png(path, pixels):
+    """An 8-bit gray Adam7 interlaced PNG, which Pillow cannot write"""
+    data = bytearray()
+    for x, y, step_x, step_y in ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4),
+                                 (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2)):
+        for row in pixels[y::step_y, x::step_x]:
+            if row.size:
+                data += b"\x00" + row.tobytes()
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    header = struct.pack(">IIBBBBB", pixels.shape[1], pixels.shape[0], 8, 0, 0, 0, 1)
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(bytes(data)))
+                     + chunk(b"IEND", b""))
+
+def test_interlaced_png_is_decoded_whole(tmp_path):
+    pixels = np.random.default_rng(0).integers(0, 256, (HEIGHT, WIDTH), dtype=np.uint8)
+    path = tmp_path / "interlaced.png"
+    write_interlaced_png(path, pixels)
+    with Image.open(path) as image:
+        assert not can_read_in_strips(image)
+    assert np.array_equal(np.concatenate([np.asarray(strip) for strip in iter_image_strips(str(path), 8)]), pixels)
+
+def test_streaming_warns_about_sources_it_decodes_whole(tmp_path):
+    path = write_sample(tmp_path, "rgb.jpg", "RGB")
+    with pytest.warns(RuntimeWarning, match="decoded whole"):
+        write_dds_streaming(path, str(tmp_path / "jpeg.dds"), "DXT1")
+    path = write_sample(tmp_path, "rgb.png", "RGB")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        write_dds_streaming(path, str(tmp_path / "png.dds"), "DXT1")
+
+@pytest.mark.parametrize("name, mode", FORMATS)
+@pytest.mark.parametrize("memory_budget", [1, None])
+@pytest.mark.parametrize("fmt, mipmaps", [("DXT1", False), ("DXT5", True)])
+def test_streaming_matches_write_dds(tmp_path, name, mode, memory_budget, fmt, mipmaps):
+    path = write_sample(tmp_path, name, mode)
+    expected_path = tmp_path / "expected.dds"
+    with Image.open(path) as image:
+        write_dds(image, str(expected_path), fmt, mipmaps)
+    streamed_path = tmp_path / "streamed.dds"
+    if memory_budget is None:
+        write_dds_streaming(path, str(streamed_path), fmt, mipmaps)
+    else:
+        write_dds_streaming(path, str(streamed_path), fmt, mipmaps, memory_budget)
+    assert streamed_path.read_bytes() == expected_path.read_bytes()
+
+@pytest.mark.parametrize("mip_filter", ["box", "kaiser"])
+def test_maps_past_the_decompression_bomb_limit_convert(tmp_path, monkeypatch, mip_filter):
+    path = write_sample(tmp_path, "rgb.bmp", "RGB")
+    expected_path = tmp_path / "expected.dds"
+    with Image.open(path) as image:
+        write_dds(image, str(expected_path), "DXT1")
+    # Pillow refuses images over twice the limit, as it would a 32k x 16k map,
+    # and the box filter case goes through the streaming writer
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", WIDTH * HEIGHT // 3)
+    monkeypatch.setattr(dds_encoder, "STREAMING_PIXEL_THRESHOLD", WIDTH * HEIGHT - 1)
+    with pytest.raises(Image.DecompressionBombError):
+        Image.open(path)
+    output_path = tmp_path / "converted.dds"
+    convert_to_dds(path, str(output_path), "DXT1", mip_filter=mip_filter)
+    assert output_path.read_bytes() == expected_path.read_bytes()
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from mod_builder import export_texture
+
+OPTIONS = {'format': 'DXT1', 'mipmaps': False, 'mip_filter': 'box'}
+
+def test_export_swaps_in_the_finished_texture(tmp_path):
+    source = tmp_path / "color.png"
+    Image.fromarray(np.zeros((8, 16, 3), dtype=np.uint8)).save(source)
+    destination = tmp_path / "color.dds"
+    export_texture(str(source), str(destination), OPTIONS)
+    assert destination.read_bytes()[:4] == b"DDS "
+    assert set(os.listdir(tmp_path)) == {"color.png", "color.dds"}
+
+@pytest.mark.parametrize("options", [OPTIONS, {'format': 'PNG'}])
+def test_failed_export_keeps_the_previous_texture(tmp_path, options):
+    source = tmp_path / "broken.jpg"
+    source.write_bytes(b"\xff\xd8\xff" + b"\x00" * 64)
+    destination = tmp_path / "color.dds"
+    destination.write_bytes(b"previous build")
+    with pytest.raises(OSError):
+        export_texture(str(source), str(destination), options)
+    assert destination.read_bytes() == b"previous build"
+    assert set(os.listdir(tmp_path)) == {"broken.jpg", "color.dds"}
+
+def test_interrupted_export_leaves_no_partial_file(tmp_path, monkeypatch):
+    def interrupted(source, output_path, *args):
+        with open(output_path, 'wb') as f:
+            f.write(b"DDS half written")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("mod_builder.convert_to_dds", interrupted)
+    destination = tmp_path / "color.dds"
+    with pytest.raises(KeyboardInterrupt):
+        export_texture(str(tmp_path / "color.png"), str(destination), OPTIONS)
+    assert os.listdir(tmp_path) == []
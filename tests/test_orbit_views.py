@@ -0,0 +1,82 @@
+import pytest
+from PyQt6.QtCore import QEvent, QPointF, Qt
+from PyQt6.QtGui import QMouseEvent
+from PyQt6.QtWidgets import QHBoxLayout, QWidget
+
+from orbit_model import OrbitModel
+from orbit_widgets import OrbitWidget, VerticalOrbitWidget
+
+def mouse_event(event_type, position):
+    buttons = Qt.MouseButton.NoButton if event_type == QEvent.Type.MouseButtonRelease else Qt.MouseButton.LeftButton
+    button = Qt.MouseButton.NoButton if event_type == QEvent.Type.MouseMove else Qt.MouseButton.LeftButton
+    point = QPointF(*position)
+    return QMouseEvent(event_type, point, point, button, buttons, Qt.KeyboardModifier.NoModifier)
+
+@pytest.fixture
+def views(qapp):
+    model = OrbitModel()
+    model.update(eccentricity=0.3)
+    window = QWidget()
+    layout = QHBoxLayout(window)
+    top, side = OrbitWidget(model), VerticalOrbitWidget(model)
+    layout.addWidget(top)
+    layout.addWidget(side)
+    window.resize(800, 400)
+    window.show()
+    settle(qapp)
+    yield model, top, side
+    window.close()
+
+def settle(qapp):
+    # The first pass fires the model's zero timer, the repaints it asks for
+    # are posted from there and go through on the second
+    qapp.processEvents()
+    qapp.processEvents()
+
+def counts(model, top, side):
+    return model.notifications, top.paint_count, side.paint_count
+
+def test_handle_drag_tick_paints_each_view_once(qapp, views):
+    model, top, side = views
+    center_x, center_y, a, b, c = top.scene_geometry()
+    qapp.sendEvent(top, mouse_event(QEvent.Type.MouseButtonPress, (center_x + a - c, center_y + b)))
+    qapp.sendEvent(top, mouse_event(QEvent.Type.MouseMove, (center_x + a - c + 20, center_y + b + 10)))
+    settle(qapp)
+    notifications, top_paints, side_paints = counts(model, top, side)
+
+    # One animation tick moves the semi-major axis and the eccentricity together
+    top.update_timer.stop()
+    top.smooth_update()
+    settle(qapp)
+    assert counts(model, top, side) == (notifications + 1, top_paints + 1, side_paints + 1)
+    qapp.sendEvent(top, mouse_event(QEvent.Type.MouseButtonRelease, (0, 0)))
+
+def test_updates_in_one_pass_are_announced_once(qapp, views):
+    model, top, side = views
+    notifications, top_paints, side_paints = counts(model, top, side)
+    model.update(semi_major_axis=150)
+    model.update(eccentricity=0.5)
+    model.update(inclination=10)
+    settle(qapp)
+    assert counts(model, top, side) == (notifications + 1, top_paints + 1, side_paints + 1)
+
+def test_pan_tick_reuses_the_cached_layer(qapp, views):
+    model, top, side = views
+    center_x, center_y, a, b, c = top.scene_geometry()
+    # The orbit line just inside the ellipse, on the minor axis
+    start = (center_x - c, center_y - 0.9 * b)
+    qapp.sendEvent(top, mouse_event(QEvent.Type.MouseButtonPress, start))
+    settle(qapp)
+    notifications, top_paints, side_paints = counts(model, top, side)
+    renders = top.layer_renders
+
+    for step in range(1, 4):
+        qapp.sendEvent(top, mouse_event(QEvent.Type.MouseMove, (start[0] + 3 * step, start[1] + 2 * step)))
+        settle(qapp)
+        # The side view doesn't show the pan
+        assert counts(model, top, side) == (notifications + step, top_paints + step, side_paints)
+    qapp.sendEvent(top, mouse_event(QEvent.Type.MouseButtonRelease, start))
+    top.update()
+    settle(qapp)
+    # A whole-pixel pan keeps the cached layer, repaints blit it rather than render it again
+    assert top.layer_renders == renders
@@ -0,0 +1,46 @@
+import numpy as np
+
+from system_view import SystemBody, SystemView
+
+BODY_COLOR = (0, 128, 0)
+
+def pixel(view, x, y):
+    color = view.grab().toImage().pixelColor(x, y)
+    return color.red(), color.green(), color.blue()
+
+def make_view(qapp):
+    view = SystemView()
+    view.resize(400, 400)
+    view.set_bodies([SystemBody("Sun"), SystemBody("Planet", "Sun", 100.0, 0.0, 0.0, True)])
+    view.view_center = np.zeros(2)
+    view.zoom = 1.0
+    view.invalidate()
+    return view
+
+def test_orbit_edit_renders_the_layer_again(qapp):
+    view = make_view(qapp)
+    index = view.system.index["Planet"]
+    assert pixel(view, 300, 200) == BODY_COLOR
+    assert view.layer_renders == 1
+
+    view.system.set_orbit(index, 150.0, 90.0)
+    view.invalidate()
+    # The first frame after an edit is drawn straight onto the widget, the
+    # next one settles into a new cached layer
+    for _ in range(2):
+        assert pixel(view, 200, 350) == BODY_COLOR
+        assert pixel(view, 300, 200) != BODY_COLOR
+    assert view.layer_renders == 2
+
+def test_orbit_edit_without_invalidate_is_drawn(qapp):
+    view = make_view(qapp)
+    pixel(view, 0, 0)
+    view.system.set_orbit(view.system.index["Planet"], 150.0, 90.0)
+    assert pixel(view, 200, 350) == BODY_COLOR
+
+def test_new_bodies_are_drawn(qapp):
+    view = make_view(qapp)
+    pixel(view, 0, 0)
+    view.set_bodies([SystemBody("Sun"), SystemBody("Planet", "Sun", 100.0, 0.0, 180.0, True)])
+    assert pixel(view, 100, 200) == BODY_COLOR
+    assert pixel(view, 300, 200) != BODY_COLOR
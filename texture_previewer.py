@@ -1,13 +1,280 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, 
                             QSizePolicy, QScrollArea)
 from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor
-from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtCore import Qt, QSize, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
 import numpy as np
 from PIL import Image
 import io
+import os
+import threading
+from collections import OrderedDict
+from thumbnail_cache import THUMBNAIL_SIZE, get_default_cache
+from image_bridge import ImageBuffer, pil_to_array
+from tracing import span
+
+# Modes Image.reduce() can average directly, anything else is converted first
+REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "I", "F"}
+
+# Memory kept for decodes that no preview is showing any more
+DEFAULT_IDLE_DECODE_BYTES = 16 * 1024 * 1024
+
+def process_normal_map(pixels):
+    """
+    Process normal map to enhance visibility.
+    
+    Args:
+        pixels (np.ndarray): uint8 normal map pixels
+        
+    Returns:
+        np.ndarray: Processed normal map pixels
+    """
+    # v / 2 + 127.5 rounded down is ceil(v / 2) + 127, and ceil(v / 2) is
+    # v - (v >> 1). Everything runs in place on the one output array.
+    out = np.right_shift(pixels, 1)
+    np.subtract(pixels, out, out=out)
+    out += 127
+    return out
+
+def load_base_pixels(path, max_size=THUMBNAIL_SIZE):
+    """
+    Decode a texture at the lowest resolution that still covers the preview.
+    
+    Args:
+        path (str): Path to the texture file
+        max_size (int): Longest edge of the thumbnail
+        
+    Returns:
+        np.ndarray: uint8 RGB pixels no larger than max_size
+    """
+    # Open image with PIL first
+    with Image.open(path) as img:
+        # JPEG decodes straight to 1/2, 1/4 or 1/8 scale, other formats ignore this
+        img.draft('RGB', (max_size, max_size))
+        # Decode now, the file is closed once we return
+        img.load()
+        
+        # Shrink by a whole factor before colour conversion so it runs on fewer pixels
+        if img.mode not in REDUCIBLE_MODES:
+            img = img.convert('RGB')
+        factor = max(img.size) // max_size
+        if factor > 1:
+            img = img.reduce(factor)
+            
+        # Convert to RGB if necessary
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_size, max_size))
+        return pil_to_array(img)
+
+def derive_preview_pixels(base, preview_type, normal_settings=None):
+    """
+    Build the pixels a preview type shows from a decoded base image.
+    
+    Args:
+        base (np.ndarray): uint8 RGB pixels from load_base_pixels, not modified
+        preview_type (str): "color", "height" or "normal"
+        normal_settings (dict, optional): For a normal preview, the base is a
+            height map and its normals are generated with these
+            normal_map_pixels() arguments
+        
+    Returns:
+        np.ndarray: The base itself for color, (height, width) grayscale for
+                    height maps, a processed copy for normal maps
+    """
+    if preview_type == "height":
+        # Height maps are shown as grayscale, which Qt displays directly
+        return pil_to_array(Image.fromarray(base).convert('L'))
+    if preview_type == "normal" and normal_settings is not None:
+        from normal_map import normal_map_pixels
+        normals = normal_map_pixels(base[..., 0].astype(np.float32) / 255, **normal_settings)
+        return process_normal_map(np.ascontiguousarray(normals[..., :3]))
+    if preview_type == "normal":
+        # Ensure normal map colors are visible
+        return process_normal_map(base)
+    return base
+
+def load_preview_pixels(path, preview_type, max_size=THUMBNAIL_SIZE):
+    """
+    Decode a texture and reduce it to processed thumbnail pixels.
+    
+    Args:
+        path (str): Path to the texture file
+        preview_type (str): "color", "height" or "normal"
+        max_size (int): Longest edge of the thumbnail
+        
+    Returns:
+        np.ndarray: uint8 pixels no larger than max_size
+    """
+    return derive_preview_pixels(load_base_pixels(path, max_size), preview_type)
+
+def file_identity(path):
+    """Key that changes whenever the file at path is replaced or modified"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+class DecodedTexture:
+    """A base decode shared between previews, guarded so it is decoded once"""
+    def __init__(self, key, path):
+        self.key = key
+        self.path = path
+        self.pixels = None
+        self.refs = 0
+        self.lock = threading.Lock()
+        
+    def ensure_decoded(self, thumbnail_cache):
+        """Decode on first use, other callers wait for the same decode"""
+        with self.lock:
+            if self.pixels is not None:
+                return
+            # The disk cache keeps the base image under the color preview type
+            with span("thumbnail cache read"):
+                img = thumbnail_cache.get(self.path, "color")
+                if img is not None:
+                    self.pixels = pil_to_array(img)
+                    return
+            with span("decode base", source=os.path.basename(self.path)):
+                self.pixels = load_base_pixels(self.path)
+            try:
+                with span("thumbnail cache write"):
+                    thumbnail_cache.put(self.path, "color", Image.fromarray(self.pixels))
+            except OSError:
+                pass
+                
+    @property
+    def nbytes(self):
+        return self.pixels.nbytes if self.pixels is not None else 0
+
+class DecodeCache:
+    """
+    Reference counted cache of decoded base images shared by the previews.
+    
+    Every preview of the same file uses one decode. When no preview uses an
+    entry any more it is kept only while idle entries fit in max_idle_bytes,
+    oldest first, so switching back to a recent file is instant but unused
+    decodes do not pile up.
+    """
+    def __init__(self, thumbnail_cache=None, max_idle_bytes=DEFAULT_IDLE_DECODE_BYTES):
+        """
+        Initialize the cache.
+        
+        Args:
+            thumbnail_cache (ThumbnailCache, optional): Disk cache consulted before
+                              decoding, defaults to the shared cache
+            max_idle_bytes (int): Memory allowed for decodes no preview is using
+        """
+        self.thumbnail_cache = thumbnail_cache or get_default_cache()
+        self.max_idle_bytes = max_idle_bytes
+        self.entries = {}
+        self.idle = OrderedDict()
+        self.lock = threading.Lock()
+        
+    def acquire(self, path):
+        """
+        Get the decoded base image for a file, decoding it if needed.
+        
+        Args:
+            path (str): Path to the texture file
+            
+        Returns:
+            DecodedTexture: Entry whose pixels stay valid until release(entry.key)
+        """
+        key = file_identity(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = DecodedTexture(key, path)
+                self.entries[key] = entry
+            entry.refs += 1
+            self.idle.pop(key, None)
+        try:
+            entry.ensure_decoded(self.thumbnail_cache)
+        except Exception:
+            self.release(key)
+            raise
+        return entry
+        
+    def release(self, key):
+        """Drop one reference taken by acquire()"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            if entry.pixels is None:
+                del self.entries[key]
+                return
+            self.idle[key] = entry.nbytes
+            while self.idle and sum(self.idle.values()) > self.max_idle_bytes:
+                stale_key, _ = self.idle.popitem(last=False)
+                del self.entries[stale_key]
+                
+    @property
+    def nbytes(self):
+        """Memory held by all decodes, in use or idle"""
+        with self.lock:
+            return sum(entry.nbytes for entry in self.entries.values())
+
+class PreviewJobSignals(QObject):
+    """Signals a decode job uses to hand its result back to the GUI thread"""
+    finished = pyqtSignal(int, object, object)
+    failed = pyqtSignal(int, str)
+
+class PreviewDecodeJob(QRunnable):
+    """Decodes a texture preview on a QThreadPool worker"""
+    def __init__(self, generation, path, preview_type, decode_cache, normal_settings=None):
+        """
+        Initialize a decode job.
+        
+        Args:
+            generation (int): Request counter of the widget, used to drop stale results
+            path (str): Path to the texture file
+            preview_type (str): "color", "height" or "normal"
+            decode_cache (DecodeCache): Shared decodes of the base images
+            normal_settings (dict, optional): See derive_preview_pixels()
+        """
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.preview_type = preview_type
+        self.decode_cache = decode_cache
+        self.normal_settings = normal_settings
+        self.signals = PreviewJobSignals()
+        self.cancelled = threading.Event()
+        
+    def cancel(self):
+        """Ask the job to stop at its next checkpoint"""
+        self.cancelled.set()
+        
+    def run(self):
+        """
+        Decode the texture and emit an ImageBuffer wrapping its pixels, along
+        with the decode cache key the receiver has to release
+        """
+        try:
+            if self.cancelled.is_set():
+                return
+            # Includes waiting for another preview's decode of the same file
+            with span("acquire decode"):
+                entry = self.decode_cache.acquire(self.path)
+            if self.cancelled.is_set():
+                self.decode_cache.release(entry.key)
+                return
+            try:
+                with span("derive preview", preview_type=self.preview_type):
+                    pixels = derive_preview_pixels(entry.pixels, self.preview_type, self.normal_settings)
+            except Exception:
+                self.decode_cache.release(entry.key)
+                raise
+                
+            # The QImage views the array directly, the buffer travels with it
+            self.signals.finished.emit(self.generation, ImageBuffer(pixels), entry.key)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
 
 class TexturePreviewWidget(QWidget):
-    def __init__(self, preview_type="color", parent=None):
+    def __init__(self, preview_type="color", parent=None, decode_cache=None):
         """
         Initialize a texture preview widget.
         
@@ -15,10 +282,18 @@ class TexturePreviewWidget(QWidget):
             preview_type (str): Type of texture being previewed 
                               ("color", "height", or "normal")
             parent: Parent widget
+            decode_cache (DecodeCache, optional): Decodes shared with other
+                              previews, defaults to a private cache
         """
         super().__init__(parent)
         self.preview_type = preview_type
         self.current_path = None
+        self.normal_settings = None
+        self.decode_cache = decode_cache or DecodeCache()
+        self.thread_pool = QThreadPool.globalInstance()
+        self.current_job = None
+        self.current_key = None
+        self.generation = 0
         self.setup_ui()
         
         # Setup refresh timer for smooth updates
@@ -69,62 +344,71 @@ class TexturePreviewWidget(QWidget):
         if not self.refresh_timer.isActive():
             self.refresh_timer.start(100)  # 100ms delay for smooth updates
             
+    def set_normal_settings(self, settings):
+        """
+        Show normals generated from the texture, a height map, instead of the texture itself.
+        
+        Args:
+            settings (dict): normal_map_pixels() arguments, or None to show the texture
+        """
+        if settings == self.normal_settings:
+            return
+        self.normal_settings = settings
+        if self.current_path and not self.refresh_timer.isActive():
+            self.refresh_timer.start(100)
+            
     def update_preview(self):
-        """Update the preview with the current texture"""
+        """Start decoding the current texture on the thread pool"""
+        # Whatever was requested before is stale now
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.current_job = None
+        self.generation += 1
+        
         if not self.current_path:
+            self._release_current()
             self.preview_label.setText("No texture loaded")
             return
             
-        try:
-            # Open image with PIL first
-            with Image.open(self.current_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                    
-                # Process based on preview type
-                if self.preview_type == "height":
-                    # Convert height map to visible grayscale
-                    img = img.convert('L')
-                    img = img.convert('RGB')
-                elif self.preview_type == "normal":
-                    # Ensure normal map colors are visible
-                    img = self._process_normal_map(img)
-                    
-                # Convert to QImage
-                img_data = img.tobytes("raw", "RGB")
-                q_img = QImage(img_data, img.size[0], img.size[1], 
-                             img.size[0] * 3, QImage.Format.Format_RGB888)
-                
-                # Create and scale pixmap
-                pixmap = QPixmap.fromImage(q_img)
-                scaled_pixmap = self._scale_pixmap(pixmap)
-                
-                # Update preview
-                self.preview_label.setPixmap(scaled_pixmap)
-                
-        except Exception as e:
-            self.preview_label.setText(f"Error loading texture:\n{str(e)}")
-            
-    def _process_normal_map(self, img):
-        """
-        Process normal map to enhance visibility.
+        job = PreviewDecodeJob(self.generation, self.current_path, 
+                               self.preview_type, self.decode_cache, self.normal_settings)
+        job.signals.finished.connect(self._on_preview_ready)
+        job.signals.failed.connect(self._on_preview_failed)
+        self.current_job = job
+        self.preview_label.setText("Loading texture...")
+        self.thread_pool.start(job)
         
-        Args:
-            img (PIL.Image): Input normal map image
-            
-        Returns:
-            PIL.Image: Processed normal map
-        """
-        # Convert to numpy array
-        img_array = np.array(img)
+    def _on_preview_ready(self, generation, buffer, key):
+        """Show a decoded preview unless a newer one was requested meanwhile"""
+        if generation != self.generation:
+            self.decode_cache.release(key)
+            return
+        self.current_job = None
+        self._release_current()
+        self.current_key = key
         
-        # Normalize and enhance contrast
-        img_array = ((img_array / 255.0) * 0.5 + 0.5) * 255
-        img_array = img_array.astype(np.uint8)
+        with span("show preview", preview_type=self.preview_type):
+            # Create and scale pixmap
+            pixmap = QPixmap.fromImage(buffer.qimage)
+            scaled_pixmap = self._scale_pixmap(pixmap)
+            
+            # Update preview
+            self.preview_label.setPixmap(scaled_pixmap)
         
-        return Image.fromarray(img_array)
+    def _on_preview_failed(self, generation, message):
+        """Report a decode error unless the request is stale"""
+        if generation != self.generation:
+            return
+        self.current_job = None
+        self._release_current()
+        self.preview_label.setText(f"Error loading texture:\n{message}")
         
+    def _release_current(self):
+        """Let go of the decode behind the preview currently shown"""
+        if self.current_key is not None:
+            self.decode_cache.release(self.current_key)
+            self.current_key = None
+            
     def _scale_pixmap(self, pixmap):
         """
         Scale the pixmap to fit the preview area while maintaining aspect ratio.
@@ -160,10 +444,121 @@ class TexturePreviewWidget(QWidget):
         """Provide a reasonable default size"""
         return QSize(300, 300)
 
+class HeightStatsJobSignals(QObject):
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+class HeightStatsJob(QRunnable):
+    """Measures a height map on a QThreadPool worker, or reads its cached statistics"""
+    def __init__(self, generation, path):
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.signals = HeightStatsJobSignals()
+        
+    def run(self):
+        from height_stats import height_stats
+        try:
+            self.signals.finished.emit(self.generation, height_stats(self.path))
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+
+class HeightStatsLabel(QLabel):
+    """
+    Summary of the height map and the deformity and offset its elevation
+    range gives, measured in the background
+    """
+    # The statistics of a new height map arrived
+    measured = pyqtSignal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWordWrap(True)
+        self.path = None
+        self.stats = None
+        self.min_elevation = 0.0
+        self.max_elevation = 0.0
+        self.generation = 0
+        self.thread_pool = QThreadPool.globalInstance()
+        
+    def set_height_map(self, path, min_elevation, max_elevation):
+        """
+        Args:
+            path (str): Height map file, empty for none
+            min_elevation (float): Real elevation of the lowest pixel in m
+            max_elevation (float): Real elevation of the highest pixel in m
+        """
+        self.min_elevation = min_elevation
+        self.max_elevation = max_elevation
+        if path == self.path:
+            self._show()
+            return
+        self.path = path
+        self.stats = None
+        self.generation += 1
+        if not path or not os.path.isfile(path):
+            self.setText("")
+            return
+        job = HeightStatsJob(self.generation, path)
+        job.signals.finished.connect(self._on_stats)
+        job.signals.failed.connect(self._on_failed)
+        self.setText("Measuring height map...")
+        self.thread_pool.start(job)
+        
+    def _on_stats(self, generation, stats):
+        if generation == self.generation:
+            self.stats = stats
+            self._show()
+            self.measured.emit()
+            
+    def _on_failed(self, generation, message):
+        if generation == self.generation:
+            self.setText(f"Could not measure the height map: {message}")
+            
+    def _show(self):
+        if self.stats is None:
+            return
+        from height_stats import deformity_and_offset, fraction_below
+        stats = self.stats
+        text = f"Heights {stats['min']:.3f} to {stats['max']:.3f}, mean {stats['mean']:.3f}. "
+        if self.max_elevation <= self.min_elevation:
+            self.setText(text + "Set an elevation range to derive deformity and offset from them.")
+            return
+        deformity, offset = deformity_and_offset(stats, self.min_elevation, self.max_elevation)
+        text += f"Deformity {deformity:.0f} m, offset {offset:.0f} m"
+        if deformity > 0 and self.min_elevation < 0:
+            text += f", {fraction_below(stats, -offset / deformity):.0%} below sea level"
+        self.setText(text + ".")
+
+class BiomeMapJobSignals(QObject):
+    # Biome map path and the generated (color, share) biomes
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str)
+
+class BiomeMapJob(QRunnable):
+    """Generates a biome map on a QThreadPool worker, see generate_biome_map()"""
+    def __init__(self, source_path, output_path, count, source):
+        super().__init__()
+        self.source_path = source_path
+        self.output_path = output_path
+        self.count = count
+        self.source = source
+        self.signals = BiomeMapJobSignals()
+        
+    def run(self):
+        from biome_map import generate_biome_map
+        try:
+            biomes = generate_biome_map(self.source_path, self.output_path, self.count, self.source)
+            self.signals.finished.emit(self.output_path, biomes)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
 class TexturePreviewContainer(QWidget):
     """Container widget to manage multiple texture previews"""
     def __init__(self, parent=None):
         super().__init__(parent)
+        # One decode per file, shared by every preview showing it
+        self.decode_cache = DecodeCache()
         self.setup_ui()
         
     def setup_ui(self):
@@ -171,9 +566,9 @@ class TexturePreviewContainer(QWidget):
         self.layout = QVBoxLayout(self)
         
         # Create preview widgets for each texture type
-        self.color_preview = TexturePreviewWidget("color")
-        self.height_preview = TexturePreviewWidget("height")
-        self.normal_preview = TexturePreviewWidget("normal")
+        self.color_preview = TexturePreviewWidget("color", decode_cache=self.decode_cache)
+        self.height_preview = TexturePreviewWidget("height", decode_cache=self.decode_cache)
+        self.normal_preview = TexturePreviewWidget("normal", decode_cache=self.decode_cache)
         
         # Add previews to layout
         self.layout.addWidget(self.color_preview)
@@ -0,0 +1,148 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+from utility_functions import file_content_hash
+
+# Longest edge of cached preview thumbnails
+THUMBNAIL_SIZE = 768
+
+# Default cap on the total size of the cache directory
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Per-user cache directory for preview thumbnails"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "KopernicusPlanetKreator", "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    On-disk cache of preview thumbnails with LRU eviction under a size cap.
+    Safe to share between preview decode workers.
+
+    Entries are keyed by the source path, size, modification time and preview
+    type, plus the content hash when content hashing is enabled.
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, use_content_hash=False):
+        """
+        Initialize the cache and index any thumbnails already on disk.
+
+        Args:
+            cache_dir (str, optional): Directory for thumbnails, defaults to the user cache
+            max_bytes (int): Total size above which the least recently used entries are evicted
+            use_content_hash (bool): Also key entries by a hash of the file contents, so
+                                     touched but unchanged files still hit
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.use_content_hash = use_content_hash
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the LRU order from the access times of the files on disk"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".png"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            found.append((stat.st_atime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".png")
+
+    def key(self, source_path, preview_type):
+        """
+        Build the cache key for a source image.
+
+        Args:
+            source_path (str): Path to the source texture
+            preview_type (str): "color", "height" or "normal"
+
+        Returns:
+            str: Hex key identifying this version of the file and preview type
+        """
+        stat = os.stat(source_path)
+        parts = [os.path.abspath(source_path), str(stat.st_size), str(stat.st_mtime_ns), preview_type,
+                 str(THUMBNAIL_SIZE)]
+        if self.use_content_hash:
+            parts.append(file_content_hash(source_path))
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, source_path, preview_type):
+        """
+        Look up the thumbnail for a source image.
+
+        Returns:
+            PIL.Image.Image: The decoded thumbnail, or None on a miss
+        """
+        key = self.key(source_path, preview_type)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self._forget(key)
+            return None
+        return img
+
+    def put(self, source_path, preview_type, thumbnail):
+        """
+        Store a thumbnail and evict old entries if the cache is over its cap.
+
+        Args:
+            source_path (str): Path to the source texture
+            preview_type (str): "color", "height" or "normal"
+            thumbnail (PIL.Image.Image): Processed preview image
+        """
+        key = self.key(source_path, preview_type)
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        thumbnail.save(temp_path, format="PNG", compress_level=1)
+        os.replace(temp_path, path)
+
+        size = os.path.getsize(path)
+        with self.lock:
+            self._forget(key, remove_file=False)
+            self.entries[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def _forget(self, key, remove_file=True):
+        size = self.entries.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+        if remove_file and os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            self._forget(key)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Shared cache instance used by the texture previews"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ThumbnailCache()
+    return _default_cache
@@ -0,0 +1,225 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Set to a file name to trace the GUI session into it, see start_from_environment()
+TRACE_ENV = "KPK_TRACE"
+
+class _NullSpan:
+    """What span() hands out while tracing is off: entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Span:
+    """One timed region, recorded when it is left"""
+    __slots__ = ('recorder', 'name', 'args', 'start')
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = f"{exc_type.__name__}: {exc}"
+        self.recorder.add(self.name, self.start, end, self.args)
+        return False
+
+class TraceRecorder:
+    """
+    Spans recorded by every thread of a process, plus any merged in from
+    worker processes.
+
+    Times come from time.perf_counter_ns(), which is a system-wide monotonic
+    clock on the platforms we support, so spans from worker processes line
+    up with the ones recorded here.
+    """
+    def __init__(self):
+        self.pid = os.getpid()
+        # (name, start ns, end ns, pid, thread id, thread name, args)
+        self.events = []
+
+    def add(self, name, start_ns, end_ns, args):
+        # list.append is atomic, so pool threads can record without a lock
+        thread = threading.current_thread()
+        self.events.append((name, start_ns, end_ns, self.pid, thread.native_id, thread.name, args))
+
+    def merge(self, events):
+        """Add spans recorded in another process, see call_traced()"""
+        self.events.extend(events)
+
+    def chrome_trace(self):
+        """
+        The spans in Chrome's trace event format, for chrome://tracing or Perfetto.
+
+        Returns:
+            dict: JSON-ready trace document
+        """
+        events = []
+        threads = {}
+        origin = min((event[1] for event in self.events), default=0)
+        for name, start, end, pid, tid, thread_name, args in self.events:
+            threads[pid, tid] = thread_name
+            events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start - origin) / 1000, 'dur': (end - start) / 1000, 'args': args})
+        for pid in sorted({pid for pid, _ in threads}):
+            label = "Planet Kreator" if pid == self.pid else f"Worker {pid}"
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': label}})
+        for (pid, tid), thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self):
+        """
+        Time spent in each span name.
+
+        Returns:
+            list: (name, count, total ms, mean ms, max ms) tuples, most total time first
+        """
+        stats = {}
+        for name, start, end, *_ in self.events:
+            entry = stats.setdefault(name, [0, 0, 0])
+            duration = end - start
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        rows = [(name, count, total / 1e6, total / count / 1e6, longest / 1e6)
+                for name, (count, total, longest) in stats.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def format_summary(self):
+        width = max((len(row[0]) for row in self.summary()), default=4)
+        lines = [f"{'span':<{width}} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, count, total, mean, longest in self.summary():
+            lines.append(f"{name:<{width}} {count:>6} {total:10.1f} {mean:9.2f} {longest:9.1f}")
+        return "\n".join(lines)
+
+_recorder = None
+_output_path = None
+
+def start(output_path=None):
+    """
+    Start recording spans in this process.
+
+    Args:
+        output_path (str, optional): Where finish() writes the trace
+
+    Returns:
+        TraceRecorder: The new recorder
+    """
+    global _recorder, _output_path
+    _recorder = TraceRecorder()
+    _output_path = output_path
+    return _recorder
+
+def start_from_environment():
+    """Start tracing if KPK_TRACE names an output file"""
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        start(path)
+
+def stop():
+    """
+    Stop recording.
+
+    Returns:
+        TraceRecorder: What was recorded, or None if tracing was off
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+def enabled():
+    return _recorder is not None
+
+def span(name, **args):
+    """
+    Time a block as a named span: with span("generate config"): ...
+
+    Costs one global lookup while tracing is off.
+
+    Args:
+        name (str): Span name, spans with the same name are summed in the summary
+        **args: Details shown with the span in the trace viewer
+
+    Returns:
+        Context manager for the block
+    """
+    recorder = _recorder
+    if recorder is None:
+        return NULL_SPAN
+    return Span(recorder, name, args)
+
+def traced(name):
+    """Decorator that records every call of a function as a span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            with Span(recorder, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def merge(events):
+    """Add spans returned by call_traced() in a worker process"""
+    if _recorder is not None and events:
+        _recorder.merge(events)
+
+def call_traced(trace, name, func, *args, **kwargs):
+    """
+    Run func in a worker process, recording its spans when trace is True.
+
+    Submit this to a process pool instead of func itself and hand the events
+    to merge(). If func raises, the exception carries them as trace_events.
+
+    Args:
+        trace (bool): Whether the submitting process is tracing, usually enabled()
+        name (str): Name of the span around the whole call
+
+    Returns:
+        tuple: (func's result, list of recorded events)
+    """
+    if not trace:
+        return func(*args, **kwargs), []
+    recorder = start()
+    try:
+        with span(name):
+            result = func(*args, **kwargs)
+    except BaseException as e:
+        e.trace_events = stop().events
+        raise
+    stop()
+    return result, recorder.events
+
+def finish():
+    """Stop tracing, write the trace file given to start() and print the summary"""
+    recorder = stop()
+    if recorder is None:
+        return
+    if _output_path:
+        recorder.write(_output_path)
+        print(f"Trace written to {_output_path}", file=sys.stderr)
+    print(recorder.format_summary(), file=sys.stderr)
@@ -1,43 +1,70 @@
-import os
-import shutil
-from PIL import Image
-
-def convert_to_dds(input_path, output_path):
-    # Check if the file is already in DDS format
-    if input_path.lower().endswith('.dds'):
-        # If it is, just copy the file
-        shutil.copy(input_path, output_path)
-    else:
-        # If it's not, convert it to PNG first (as Pillow doesn't support direct DDS conversion)
-        with Image.open(input_path) as img:
-            png_path = os.path.splitext(output_path)[0] + '.png'
-            img.save(png_path)
-        
-        # Now use the texconv tool to convert PNG to DDS
-        os.system(f'texconv -f DXT5 -o "{os.path.dirname(output_path)}" "{png_path}"')
-
-def save_config(self):
-    config = self.generate_config()
-    file_name, _ = QFileDialog.getSaveFileName(self, "Save Kopernicus Config", "", "Config Files (*.cfg)")
-    if file_name:
-        with open(file_name, 'w') as f:
-            f.write(config)
-       
-        # Copy and convert texture files to the same directory as the config file
-        config_dir = os.path.dirname(file_name)
-        for texture_field in [self.color_map, self.height_map, self.normal_map]:
-            texture_path = texture_field.text()
-            if texture_path:
-                texture_filename = os.path.basename(texture_path)
-                base_name, _ = os.path.splitext(texture_filename)
-                destination = os.path.join(config_dir, base_name + '.dds')
-                try:
-                    self.convert_to_dds(texture_path, destination)
-                    # Update the config file with the new DDS filename
-                    with open(file_name, 'r') as f:
-                        config_content = f.read()
-                    config_content = config_content.replace(texture_filename, base_name + '.dds')
-                    with open(file_name, 'w') as f:
-                        f.write(config_content)
-                except Exception as e:
-                    print(f"Error converting {texture_path} to DDS: {e}")
+import os
+import shutil
+import hashlib
+from tracing import span
+
+def convert_to_dds(input_path, output_path, fmt="DXT5", mipmaps=False, mip_filter="box", memory_budget=None):
+    with span("convert_to_dds", source=os.path.basename(input_path), fmt=fmt, mipmaps=mipmaps):
+        # Check if the file is already in DDS format
+        if input_path.lower().endswith('.dds'):
+            # If it is, just copy the file
+            shutil.copy(input_path, output_path)
+            return
+
+        # Imported here so startup does not pay for NumPy and Pillow
+        from PIL import Image
+        from dds_encoder import (write_dds, write_dds_streaming, unlimited_image_pixels,
+                                 DEFAULT_STREAM_BUDGET, STREAMING_PIXEL_THRESHOLD)
+
+        # Very large maps are converted in strips so memory stays within the budget.
+        # Streaming builds its mip chain with the box filter.
+        if memory_budget is None and mip_filter == "box":
+            with unlimited_image_pixels(), Image.open(input_path) as img:
+                if img.width * img.height > STREAMING_PIXEL_THRESHOLD:
+                    memory_budget = DEFAULT_STREAM_BUDGET
+        if memory_budget is not None:
+            write_dds_streaming(input_path, output_path, fmt, mipmaps, memory_budget)
+        else:
+            # Encode the decoded image straight to DDS, no intermediate file or texconv needed
+            with unlimited_image_pixels(), Image.open(input_path) as img:
+                write_dds(img, output_path, fmt, mipmaps, mip_filter)
+
+def convert_to_png(input_path, output_path):
+    """Export a map losslessly as PNG, copying files that already are one"""
+    with span("convert_to_png", source=os.path.basename(input_path)):
+        if input_path.lower().endswith('.png'):
+            shutil.copy(input_path, output_path)
+            return
+
+        from PIL import Image
+        with Image.open(input_path) as img:
+            img.save(output_path, "PNG")
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """
+    Hash the bytes of a file without decoding it.
+
+    Args:
+        path (str): File to hash
+        chunk_size (int): Bytes read per iteration
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_text_atomic(path, text):
+    # Write next to the target and swap it in, so readers never see a partially written file
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise